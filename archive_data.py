@@ -0,0 +1,44 @@
+"""
+Retention CLI - moves old ADK session events and aged interactions into the
+compressed archive database, then incrementally vacuums the hot databases
+and reports the space reclaimed.
+
+Usage:
+    python archive_data.py --dry-run
+    python archive_data.py --event-days 30 --keep-per-session 100 --interaction-days 365
+    python archive_data.py --enable-incremental-vacuum   # once, for databases created earlier
+
+Defaults come from EVENT_RETENTION_DAYS, EVENT_KEEP_PER_SESSION and
+INTERACTION_RETENTION_DAYS; 0 disables a rule.
+"""
+
+import argparse
+import json
+
+
+def main():
+    from business_agent import retention, sharding
+
+    parser = argparse.ArgumentParser(description="Archive old session events and interactions")
+    parser.add_argument("--event-days", type=int, default=retention.EVENT_RETENTION_DAYS, help="Archive invocations older than this")
+    parser.add_argument("--keep-per-session", type=int, default=retention.EVENT_KEEP_PER_SESSION, help="Keep at least this many recent events per session")
+    parser.add_argument("--interaction-days", type=int, default=retention.INTERACTION_RETENTION_DAYS, help="Archive interactions older than this")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true", help="Switch the databases to incremental vacuum first (full VACUUM, locks each file)")
+    parser.add_argument("--database", help="SQLite database path (defaults to the app's business_agent.db)")
+    args = parser.parse_args()
+
+    if args.database:
+        from business_agent.tools import database_tools
+        database_tools.SESSIONS_DB = f"sqlite:///{args.database}"
+
+    if args.enable_incremental_vacuum and not args.dry_run:
+        for path in dict.fromkeys([sharding.main_db_path()] + sharding.list_shards()):
+            print(json.dumps(retention.enable_incremental_vacuum(path)))
+
+    report = retention.run_retention(args.event_days, args.keep_per_session, args.interaction_days, args.dry_run)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Backup CLI - takes online snapshots of the main database, every shard and the
+retention archive while the app keeps running, lists them, and restores one.
+
+Usage:
+    python backup_data.py backup
+    python backup_data.py backup --no-compress --keep 14
+    python backup_data.py list
+    python backup_data.py restore 20260101T030000Z                  # in place, online
+    python backup_data.py restore 20260101T030000Z --target-dir /tmp/restored
+
+Defaults come from BACKUP_DIR, BACKUP_KEEP, BACKUP_COMPRESS,
+BACKUP_PAGES_PER_STEP and BACKUP_STEP_PAUSE_MS.
+"""
+
+import argparse
+import json
+
+
+def main():
+    from business_agent import backup
+
+    parser = argparse.ArgumentParser(description="Online backups and snapshot restore")
+    parser.add_argument("--database", help="SQLite database path (defaults to the app's business_agent.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup_parser = commands.add_parser("backup", help="Take a snapshot of every database")
+    backup_parser.add_argument("--no-compress", action="store_true", help="Keep the copies as plain .db files")
+    backup_parser.add_argument("--keep", type=int, default=backup.BACKUP_KEEP, help="Snapshots to keep after rotation (0 keeps all)")
+
+    commands.add_parser("list", help="List snapshots, newest first")
+
+    restore_parser = commands.add_parser("restore", help="Restore a snapshot")
+    restore_parser.add_argument("snapshot", help="Snapshot name as shown by list")
+    restore_parser.add_argument("--target-dir", default="", help="Write the restored databases here instead of over the live files")
+    args = parser.parse_args()
+
+    if args.database:
+        from business_agent.tools import database_tools
+        database_tools.SESSIONS_DB = f"sqlite:///{args.database}"
+
+    if args.command == "backup":
+        manifest = backup.create_snapshot(compress=not args.no_compress, keep=args.keep)
+        print(json.dumps(manifest, indent=2))
+    elif args.command == "list":
+        for manifest in backup.list_snapshots():
+            size = sum(entry.get("compressed_bytes", entry["size_bytes"]) for entry in manifest["files"])
+            print(f"{manifest['snapshot']}  {len(manifest['files'])} databases  {size:,} bytes  {manifest['duration_ms']:.0f}ms")
+    else:
+        for name, destination in backup.restore_snapshot(args.snapshot, args.target_dir):
+            print(f"{name} -> {destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Batch chat CLI - runs many users' messages through the business agent
+concurrently and writes one NDJSON result line per job.
+
+Usage:
+    python batch_chat.py jobs.jsonl --concurrency 8 > results.ndjson
+    cat jobs.jsonl | python batch_chat.py - --concurrency 4
+
+Each input line is a JSON object: {"user_id": "...", "message": "...", "job_id": "..."}
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+
+def load_jobs(path: str) -> list:
+    """Read jobs from a JSONL file (or stdin when path is '-')."""
+    handle = sys.stdin if path == '-' else open(path)
+    try:
+        return [json.loads(line) for line in handle if line.strip()]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run chat jobs for many users concurrently")
+    parser.add_argument("jobs", help="JSONL file of {user_id, message} jobs, or '-' for stdin")
+    parser.add_argument("--concurrency", type=int, default=None, help="Maximum turns in flight at once")
+    parser.add_argument("--output", help="Write NDJSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    # Importing main sets up the database, session service and runner
+    from main import run_batch, DEFAULT_BATCH_CONCURRENCY
+
+    jobs = load_jobs(args.jobs)
+    concurrency = args.concurrency or DEFAULT_BATCH_CONCURRENCY
+    print(f"📦 Running {len(jobs)} jobs with concurrency {concurrency}", file=sys.stderr)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    counts = {"success": 0, "error": 0}
+    started = time.perf_counter()
+
+    async def drain():
+        async for result in run_batch(jobs, concurrency):
+            counts[result.get("status", "error")] = counts.get(result.get("status", "error"), 0) + 1
+            output.write(json.dumps(result, default=str) + "\n")
+            output.flush()
+
+    try:
+        asyncio.run(drain())
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {counts['success']} succeeded, ❌ {counts['error']} failed in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Offline agent benchmark - drives the real Runner, DatabaseSessionService and
+business tools with a scripted local stand-in for the Gemini model.
+
+Usage:
+    python -m benchmarks.agent_benchmark --sizes 100 1000 --concurrency 1 4 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from benchmarks.synthetic_data import load_dataset
+from business_agent.agent import build_run_config, root_agent
+from business_agent.date_resolution import annotate_message_with_dates
+from business_agent.tools import database_tools
+
+SCENARIOS_FILE = os.path.join(os.path.dirname(__file__), "scenarios.json")
+
+
+class ScriptedLlm(BaseLlm):
+    """Stand-in model that replays recorded function-call/text sequences.
+
+    Each scenario is keyed by the user message that starts the turn. The step
+    to replay is the number of model replies already given in that turn, so a
+    scenario of N steps produces N model round trips through the Runner.
+    """
+
+    model: str = "scripted-stand-in"
+    scenarios: dict = {}
+    latency_ms: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        message, step_index, last_response = _current_turn(llm_request.contents)
+        # Messages may carry a resolved-dates block appended after the original text
+        scenario = next(
+            (scenario for key, scenario in self.scenarios.items() if message.startswith(key)), {}
+        )
+        steps = scenario.get("steps", [])
+
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        if step_index < len(steps) and "call" in steps[step_index]:
+            step = steps[step_index]
+            args = {key: _resolve_arg(value, last_response) for key, value in step["args"].items()}
+            part = types.Part(function_call=types.FunctionCall(name=step["call"], args=args))
+        else:
+            text = steps[step_index]["text"] if step_index < len(steps) else "Done."
+            part = types.Part(text=text)
+
+        prompt_tokens = sum(len(str(content)) for content in llm_request.contents) // 4
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=len(str(part)) // 4,
+                total_token_count=prompt_tokens + len(str(part)) // 4,
+            ),
+        )
+
+
+def _current_turn(contents):
+    """Find the user message of the current turn, the step reached and the last tool result."""
+    message, step_index, last_response = "", 0, {}
+    for content in contents:
+        parts = content.parts or []
+        texts = [part.text for part in parts if part.text]
+        responses = [part.function_response for part in parts if part.function_response]
+        if content.role == "user" and texts and not responses:
+            message, step_index, last_response = texts[-1].strip(), 0, {}
+        elif content.role == "model":
+            step_index += 1
+        elif responses:
+            last_response = responses[-1].response or {}
+    return message, step_index, last_response
+
+
+def _resolve_arg(value, last_response):
+    """Resolve "$last.path.to.field" placeholders against the previous tool result."""
+    if not isinstance(value, str) or not value.startswith("$last."):
+        return value
+    current = last_response
+    for key in value[len("$last."):].split("."):
+        if isinstance(current, list):
+            current = current[int(key)] if len(current) > int(key) else None
+        elif isinstance(current, dict):
+            current = current.get(key)
+        if current is None:
+            return 0
+    return current
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+async def run_turn(runner, session_service, user_id: str, session_id: str, message: str, run_config=None) -> dict:
+    """Run one chat turn the way main.chat() does and time each stage."""
+    started = time.perf_counter()
+    session = await session_service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        await session_service.create_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=session_id,
+            state={"user_id": user_id, "user_name": user_id},
+        )
+    session_done = time.perf_counter()
+
+    agent_message, _ = annotate_message_with_dates(message)
+    content = types.Content(role="user", parts=[types.Part(text=agent_message)])
+    events = []
+    async for event in runner.run_async(
+        user_id=user_id, session_id=session_id, new_message=content, run_config=run_config or build_run_config()
+    ):
+        events.append(event)
+    agent_done = time.perf_counter()
+
+    tool_calls = 0
+    text_parts = []
+    for event in events:
+        if event.content and event.content.parts:
+            for part in event.content.parts:
+                if part.text and part.text.strip():
+                    text_parts.append(part.text.strip())
+                elif part.function_call:
+                    tool_calls += 1
+    finished = time.perf_counter()
+
+    return {
+        "latency_ms": (finished - started) * 1000,
+        "session_ms": (session_done - started) * 1000,
+        "agent_ms": (agent_done - session_done) * 1000,
+        "events_ms": (finished - agent_done) * 1000,
+        "tool_calls": tool_calls,
+        "events": len(events),
+        "ok": bool(text_parts),
+    }
+
+
+async def run_level(runner, session_service, users: list, scenarios: dict, turns: int, concurrency: int) -> dict:
+    """Run `turns` scripted turns with at most `concurrency` in flight."""
+    # Fresh sessions per level so conversation history does not carry over
+    session_tag = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+    user_locks = {user_id: asyncio.Lock() for user_id in users}
+    messages = [scenario["message"] for scenario in scenarios.values()]
+    results, errors = [], []
+    # The production run config, so sync tools run off the loop as they do in main.py
+    run_config = build_run_config()
+
+    async def job(index: int):
+        user_id = users[index % len(users)]
+        message = messages[index % len(messages)]
+        async with semaphore, user_locks[user_id]:
+            try:
+                results.append(await run_turn(
+                    runner, session_service, user_id, f"session_{user_id}_{session_tag}", message, run_config
+                ))
+            except Exception as e:
+                errors.append(str(e))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(job(i) for i in range(turns)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [result["latency_ms"] for result in results]
+    return {
+        "concurrency": concurrency,
+        "turns": turns,
+        "completed": len(results),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_tps": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_session_ms": statistics.fmean(r["session_ms"] for r in results) if results else 0.0,
+        "mean_agent_ms": statistics.fmean(r["agent_ms"] for r in results) if results else 0.0,
+        "mean_tool_calls": statistics.fmean(r["tool_calls"] for r in results) if results else 0.0,
+    }
+
+
+async def run_benchmark(args) -> list:
+    with open(args.scenarios) as f:
+        scenarios = json.load(f)
+
+    stand_in = ScriptedLlm(
+        scenarios={scenario["message"]: scenario for scenario in scenarios.values()},
+        latency_ms=args.model_latency_ms,
+    )
+    agent = LlmAgent(
+        model=stand_in,
+        name=root_agent.name,
+        description=root_agent.description,
+        instruction=root_agent.instruction,
+        tools=list(root_agent.tools),
+    )
+
+    report = []
+    original_db = database_tools.SESSIONS_DB
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            db_path = os.path.join(workdir, "benchmark.db")
+            database_tools.SESSIONS_DB = f"sqlite:///{db_path}"
+            try:
+                database_tools.initialize_business_database()
+                users = [f"bench_user_{i}" for i in range(args.users)]
+                load_dataset({user_id: size for user_id in users})
+
+                session_service = DatabaseSessionService(db_url=database_tools.session_service_url())
+                runner = Runner(agent=agent, session_service=session_service, app_name="business_agent")
+
+                for concurrency in args.concurrency:
+                    level = await run_level(runner, session_service, users, scenarios, args.turns, concurrency)
+                    level["dataset_rows_per_user"] = size
+                    report.append(level)
+                    _print_level(level)
+            finally:
+                database_tools.SESSIONS_DB = original_db
+    return report
+
+
+def _print_level(level: dict):
+    print(
+        f"rows/user={level['dataset_rows_per_user']:>7} "
+        f"concurrency={level['concurrency']:>3} "
+        f"p50={level['p50_ms']:8.1f}ms p95={level['p95_ms']:8.1f}ms p99={level['p99_ms']:8.1f}ms "
+        f"throughput={level['throughput_tps']:7.2f} turns/s "
+        f"errors={level['errors']}"
+    )
+    if level["first_error"]:
+        print(f"   ❌ First error: {level['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the business agent with a scripted stand-in model")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Invoices per user in the dataset")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent turns to test")
+    parser.add_argument("--users", type=int, default=16, help="Number of distinct users")
+    parser.add_argument("--turns", type=int, default=64, help="Turns per concurrency level")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Simulated model latency per round trip")
+    parser.add_argument("--scenarios", default=SCENARIOS_FILE, help="JSON file of recorded turn scripts")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    print("🏁 Running offline agent benchmark...")
+    report = asyncio.run(run_benchmark(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "results": report}, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Startup profile - imports main.py in a fresh interpreter under
+`python -X importtime` and reports where the cold start goes, so import-time
+regressions show up before they reach production.
+
+Usage:
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --top 30 --max-ms 1500 --output startup.json
+
+Exits with status 1 when the import of main.py takes longer than --max-ms, or
+when a module listed in --forbid (by default the ADK runner, sessions and
+genai types, which load on the first chat) is imported at startup.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FORBIDDEN = ["google.adk.runners", "google.adk.sessions", "google.adk.agents.llm_agent", "google.genai.types"]
+
+_IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_startup() -> dict:
+    """Import main.py in a subprocess against a scratch database and parse -X importtime.
+
+    Returns:
+        Wall time, the per-module self/cumulative import times and the startup phases
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+        # main.py refuses to start without credentials; none are used here
+        env.setdefault("GOOGLE_API_KEY", "startup-profile")
+        script = "import json, main; print(json.dumps(main.STARTUP_PROFILE))"
+
+        started = time.perf_counter()
+        # Run from a scratch directory so the relative SESSIONS_DB lands there
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing main.py failed:\n{completed.stderr[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_PATTERN.match(line)
+        if match:
+            modules.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2,
+            })
+
+    phases = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"wall_ms": round(wall_ms, 1), "phases": phases, "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of main.py")
+    parser.add_argument("--top", type=int, default=20, help="Slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=0, help="Fail when main.py's imports take longer than this (0 disables)")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN, help="Modules that must not load at startup")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    profile = profile_startup()
+    loaded = {module["module"] for module in profile["modules"]}
+    forbidden = [name for name in args.forbid if name in loaded]
+    slowest = sorted(profile["modules"], key=lambda module: module["self_ms"], reverse=True)[:args.top]
+
+    print(f"⏱️  Interpreter + import of main.py: {profile['wall_ms']:.0f}ms")
+    for phase, duration_ms in profile["phases"].items():
+        print(f"   {phase}: {duration_ms:.0f}ms")
+    print(f"\nSlowest {len(slowest)} modules by self time:")
+    for module in slowest:
+        print(f"  {module['self_ms']:8.1f}ms self {module['cumulative_ms']:8.1f}ms cumulative  {module['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "forbidden_loaded": forbidden, **profile}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    failed = False
+    if forbidden:
+        print(f"\n❌ Loaded at startup but meant to load lazily: {', '.join(forbidden)}")
+        failed = True
+    if args.max_ms and profile["phases"]["imports_ms"] > args.max_ms:
+        print(f"\n❌ Imports took {profile['phases']['imports_ms']:.0f}ms, budget is {args.max_ms:.0f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Synthetic business data - a deterministic generator of tenants with realistic
+contacts, invoices, payments, expenses, events and interactions, bulk-loaded
+into each tenant's shard.
+
+Usage:
+    python -m benchmarks.synthetic_data --database /tmp/synthetic.db --tenants 50 --invoices 100000
+    SHARD_MODE=tenant python -m benchmarks.synthetic_data --database /tmp/synthetic.db --tenants 200 --invoices 1000000
+
+The same seed and anchor date always produce the same rows. Each tenant has its
+own random stream, so a tenant's data does not depend on which other tenants
+are generated or on the shard layout. Distributions:
+
+    tenant size    Zipf-like: a few large tenants, a long tail of small ones
+    contacts       one per ~10 invoices; activity skewed towards top clients
+    invoices       log-normal amounts, issue dates weighted to recent months,
+                   15-60 day terms, the older an invoice the likelier it is paid
+    revenue        one payment per paid invoice (10% split in two), paid a
+                   log-normal number of days after issue
+    expenses       half as many as invoices, per-category log-normal amounts
+                   with rare outliers for anomaly detection
+    events         past and upcoming meetings, mostly with a contact
+    interactions   calls, emails and meetings with templated summaries
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from business_agent import sharding, storage
+
+# Rows per executemany batch; bounds memory at a million invoices
+BATCH_ROWS = 20_000
+HISTORY_DAYS = 730
+
+FIRST_NAMES = ["Ava", "Liam", "Noah", "Emma", "Olivia", "Lucas", "Mia", "Ethan", "Sofia", "Omar",
+               "Aisha", "Hiro", "Chen", "Priya", "Mateo", "Zara", "Ivan", "Leila", "Kofi", "Nina"]
+LAST_NAMES = ["Smith", "Johnson", "Khan", "Garcia", "Nguyen", "Patel", "Müller", "Rossi", "Kim", "Silva",
+              "Okafor", "Novak", "Haddad", "Tanaka", "Cohen", "Larsen", "Dubois", "Ali", "Brown", "Lopez"]
+COMPANY_WORDS = ["Tech", "Design", "Global", "Green", "Blue", "Summit", "Nova", "Atlas", "Pioneer", "Bright",
+                 "Harbor", "Peak", "Urban", "Quantum", "Cedar", "Vertex", "Orbit", "Solar", "Iron", "Maple"]
+COMPANY_SUFFIXES = ["Corp", "Studio", "Consulting", "Labs", "Partners", "Group", "Systems", "Co", "Ventures", "Works"]
+CONTACT_STATUSES = (["client", "prospect", "lead"], [45, 25, 30])
+INVOICE_NOTES = ["Consulting services", "Design work", "Development project", "Monthly retainer",
+                 "Workshop", "Audit", "Maintenance", "Training", "License resale", "Support hours"]
+PAYMENT_TERMS = [15, 30, 30, 30, 45, 60]
+# category: (median amount, log-normal sigma, relative frequency)
+EXPENSE_CATEGORIES = {
+    "Software": (120, 0.8, 18),
+    "Travel": (450, 0.9, 12),
+    "Marketing": (600, 1.0, 10),
+    "Office Supplies": (80, 0.7, 20),
+    "Payroll": (4000, 0.3, 8),
+    "Rent": (2500, 0.1, 4),
+    "Meals": (60, 0.6, 18),
+    "Utilities": (200, 0.3, 10),
+}
+EXPENSE_OUTLIER_RATE = 0.005
+EVENT_TITLES = ["Client Meeting", "Design Review", "Quarterly Review", "Kickoff", "Demo", "Planning Session",
+                "Contract Negotiation", "Check-in Call"]
+INTERACTION_TYPES = (["email", "call", "meeting"], [50, 30, 20])
+INTERACTION_TOPICS = ["pricing", "project requirements", "invoice payment", "renewal", "proposal", "timeline",
+                      "support issue", "new features", "contract terms", "onboarding"]
+INTERACTION_TEMPLATES = ["Discussed {topic} with {name}", "Sent {name} an update on {topic}",
+                         "Follow-up on {topic}", "{name} asked about {topic}", "Reviewed {topic} at {company}"]
+
+
+def tenant_sizes(total_invoices: int, tenants: int, skew: float = 1.1) -> list:
+    """Split total_invoices across tenants by Zipf-like weights, largest first."""
+    weights = [1 / (rank + 1) ** skew for rank in range(tenants)]
+    scale = total_invoices / sum(weights)
+    sizes = [max(1, int(weight * scale)) for weight in weights]
+    sizes[0] += max(0, total_invoices - sum(sizes))
+    return sizes
+
+
+def tenant_ids(tenants: int, prefix: str = "tenant") -> list:
+    return [f"{prefix}_{index:05d}" for index in range(tenants)]
+
+
+def _next_ids(cursor) -> dict:
+    """Next free explicit id per table, so bulk rows can reference each other."""
+    return {
+        table: cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+        for table in ("contact", "invoice", "revenue", "expense", "event", "interaction")
+    }
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    return round(rng.lognormvariate(math.log(median), sigma), 2)
+
+
+def _past_day(rng: random.Random, anchor: date, days: int = HISTORY_DAYS) -> date:
+    # Skewed towards the anchor: growing businesses invoice more in recent months
+    return anchor - timedelta(days=int(days * rng.random() ** 1.3))
+
+
+class _BatchWriter:
+    """Buffers rows per INSERT statement and flushes them with executemany.
+
+    Every buffer is flushed together, in the order the tables were first
+    added, so parent rows always land before the rows referencing them.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.pending = {}
+        self.counts = {}
+
+    def add(self, table: str, statement: str, row: tuple):
+        rows = self.pending.setdefault((table, statement), [])
+        rows.append(row)
+        if len(rows) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        for (table, statement), rows in self.pending.items():
+            if rows:
+                self.cursor.executemany(statement, rows)
+                self.counts[table] = self.counts.get(table, 0) + len(rows)
+                rows.clear()
+
+
+_INSERT = {
+    "contact": "INSERT INTO contact (id, user_id, name, email, phone, company, notes, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "invoice": "INSERT INTO invoice (id, user_id, contact_id, issue_date, due_date, total_amount, status, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "revenue": "INSERT INTO revenue (id, invoice_id, amount, date) VALUES (?, ?, ?, ?)",
+    "expense": "INSERT INTO expense (id, user_id, amount, category, description, date) VALUES (?, ?, ?, ?, ?, ?)",
+    "event": "INSERT INTO event (id, user_id, contact_id, title, date, description, location) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "interaction": "INSERT INTO interaction (id, user_id, contact_id, date, type, summary) VALUES (?, ?, ?, ?, ?, ?)",
+}
+
+
+def _generate_tenant(writer: _BatchWriter, ids: dict, user_id: str, invoices: int, seed: int, anchor: date):
+    """Stream one tenant's rows into writer, advancing ids past the rows written."""
+    rng = random.Random(f"{seed}:{user_id}")
+    add = lambda table, row: writer.add(table, _INSERT[table], row)
+
+    contacts = []
+    for _ in range(max(3, invoices // 10)):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        company = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+        contact_id = ids["contact"]
+        ids["contact"] += 1
+        contacts.append((contact_id, f"{first} {last}", company))
+        status = rng.choices(*CONTACT_STATUSES)[0]
+        email = f"{first}.{last}{contact_id}@{company.split()[0].lower()}.example.com".lower()
+        add("contact", (contact_id, user_id, f"{first} {last}", email, f"555-{rng.randint(0, 9999):04d}",
+                        company, f"{status.title()} since {_past_day(rng, anchor).year}", status))
+    # A handful of clients account for most of the billing
+    contact_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(contacts))))
+
+    for _ in range(invoices):
+        invoice_id = ids["invoice"]
+        ids["invoice"] += 1
+        contact_id = rng.choices(contacts, cum_weights=contact_weights)[0][0]
+        issued = _past_day(rng, anchor)
+        due = issued + timedelta(days=rng.choice(PAYMENT_TERMS))
+        amount = max(25.0, _lognormal(rng, 1200, 0.9))
+        age_days = (anchor - issued).days
+        paid = rng.random() < (0.3 if due > anchor else min(0.97, 0.6 + age_days / 400))
+        add("invoice", (invoice_id, user_id, contact_id, issued.isoformat(), due.isoformat(), amount,
+                        "paid" if paid else "unpaid", rng.choice(INVOICE_NOTES)))
+        if paid:
+            payments = [amount] if rng.random() > 0.1 else [round(amount / 2, 2), round(amount - round(amount / 2, 2), 2)]
+            for payment in payments:
+                paid_on = min(anchor, issued + timedelta(days=int(rng.lognormvariate(math.log(20), 0.6))))
+                add("revenue", (ids["revenue"], invoice_id, payment, paid_on.isoformat()))
+                ids["revenue"] += 1
+
+    categories = list(EXPENSE_CATEGORIES)
+    category_weights = [EXPENSE_CATEGORIES[category][2] for category in categories]
+    for _ in range(invoices // 2):
+        category = rng.choices(categories, weights=category_weights)[0]
+        median, sigma, _ = EXPENSE_CATEGORIES[category]
+        amount = _lognormal(rng, median, sigma)
+        if rng.random() < EXPENSE_OUTLIER_RATE:
+            amount = round(amount * rng.uniform(6, 12), 2)
+        add("expense", (ids["expense"], user_id, amount, category, f"{category} expense",
+                        _past_day(rng, anchor).isoformat()))
+        ids["expense"] += 1
+
+    for _ in range(max(3, invoices // 20)):
+        contact = rng.choices(contacts, cum_weights=contact_weights)[0] if rng.random() < 0.7 else None
+        when = datetime.combine(anchor, datetime.min.time()) + timedelta(
+            days=rng.randint(-365, 90), hours=rng.randint(9, 17), minutes=rng.choice([0, 15, 30, 45])
+        )
+        title = rng.choice(EVENT_TITLES)
+        add("event", (ids["event"], user_id, contact[0] if contact else None, title, when.strftime("%Y-%m-%d %H:%M:%S"),
+                      f"{title} with {contact[1]}" if contact else title, contact[2] if contact else "Our Office"))
+        ids["event"] += 1
+
+    for _ in range(invoices // 4):
+        contact = rng.choices(contacts, cum_weights=contact_weights)[0]
+        summary = rng.choice(INTERACTION_TEMPLATES).format(
+            topic=rng.choice(INTERACTION_TOPICS), name=contact[1], company=contact[2]
+        )
+        add("interaction", (ids["interaction"], user_id, contact[0], _past_day(rng, anchor).isoformat(),
+                            rng.choices(*INTERACTION_TYPES)[0], summary))
+        ids["interaction"] += 1
+
+
+def load_dataset(tenants: dict, seed: int = 7, anchor: date = None) -> dict:
+    """Generate and bulk-load tenants into their shards.
+
+    Args:
+        tenants: Invoices to generate per user_id
+        seed: Seed of every tenant's random stream
+        anchor: "Today" for the generated history (defaults to the current date)
+
+    Returns:
+        Rows inserted per table, tenants loaded and load time in seconds
+    """
+    anchor = anchor or date.today()
+    started = time.perf_counter()
+    counts = {}
+
+    for user_id, invoices in tenants.items():
+        db_path = sharding.db_path_for(user_id)
+        conn = storage.raw_connection(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO user (id, name, email, company, phone) VALUES (?, ?, ?, ?, ?)",
+                (user_id, user_id.replace("_", " ").title(), f"{user_id}@example.com", "Synthetic Co", "555-0000"),
+            )
+            writer = _BatchWriter(cursor)
+            _generate_tenant(writer, _next_ids(cursor), user_id, invoices, seed, anchor)
+            # The expense triggers fold every bulk row into the anomaly statistics
+            writer.flush()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        for table, rows in writer.counts.items():
+            counts[table] = counts.get(table, 0) + rows
+
+    return {"tenants": len(tenants), "rows": counts, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load deterministic synthetic business data")
+    parser.add_argument("--database", required=True, help="Main SQLite database path (shards go next to it)")
+    parser.add_argument("--tenants", type=int, default=20, help="Number of tenants")
+    parser.add_argument("--invoices", type=int, default=10_000, help="Invoices across all tenants")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of tenant sizes (0 for equal tenants)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    parser.add_argument("--anchor-date", help="Date the history ends on, YYYY-MM-DD (defaults to today)")
+    args = parser.parse_args()
+
+    from business_agent.tools import database_tools
+    database_tools.SESSIONS_DB = f"sqlite:///{args.database}"
+    database_tools.initialize_business_database()
+
+    sizes = tenant_sizes(args.invoices, args.tenants, args.skew)
+    anchor = date.fromisoformat(args.anchor_date) if args.anchor_date else None
+    report = load_dataset(dict(zip(tenant_ids(args.tenants), sizes)), args.seed, anchor)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Tool scale benchmark - calls every agent tool directly against synthetic
+datasets of growing size and records latency, peak Python memory and result
+payload size per tool, so runs can be compared as the code changes.
+
+Usage:
+    python -m benchmarks.tool_benchmark --sizes 1000 10000 100000 1000000 --output tools.json
+    python -m benchmarks.tool_benchmark --sizes 1000 10000 --tools get_unpaid_invoices profit_loss_report
+    python -m benchmarks.tool_benchmark --sizes 10000 --baseline tools.json
+
+Each size is the benchmarked tenant's invoice count; --background-ratio adds
+that many times more invoices spread over other tenants, so shared tables hold
+realistic amounts of other tenants' rows. The first call of a tool is reported
+separately from the median of the warm repeats, since several tools cache
+per data version.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from benchmarks.synthetic_data import load_dataset, tenant_ids, tenant_sizes
+from business_agent import sharding, storage
+from business_agent.agent import TOOLS
+from business_agent.tools import database_tools
+
+BENCH_USER_ID = "bench_tenant"
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+class BenchToolContext:
+    """Minimal stand-in for the ADK ToolContext the tools read user_id from."""
+
+    def __init__(self, user_id: str):
+        self.state = {"user_id": user_id}
+        # No invocation ID: repeated write calls are not deduplicated
+        self.invocation_id = None
+
+
+def tool_arguments(user_id: str) -> dict:
+    """Arguments for every tool, pointing at the benchmarked tenant's busiest records."""
+    conn = storage.raw_connection(sharding.db_path_for(user_id))
+    try:
+        contact_id, contact_name = conn.execute(
+            "SELECT contact_id, c.name FROM invoice i JOIN contact c ON c.id = i.contact_id "
+            "WHERE i.user_id = ? GROUP BY contact_id ORDER BY COUNT(*) DESC LIMIT 1", (user_id,)
+        ).fetchone()
+        invoice_id = conn.execute(
+            "SELECT id FROM invoice WHERE user_id = ? AND status = 'unpaid' ORDER BY id LIMIT 1", (user_id,)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    today = date.today()
+    return {
+        "get_business_insights": {},
+        "create_contact": {"name": "Bench Contact", "email": "bench@example.com", "phone": "555-0199",
+                           "company": "Bench Co", "notes": "Benchmark", "status": "lead"},
+        "read_all_contacts": {},
+        "resolve_contact": {"contact_name": contact_name},
+        "create_invoice": {"contact_id": contact_id, "issue_date": today.isoformat(),
+                           "due_date": (today + timedelta(days=30)).isoformat(), "total_amount": 1500.0,
+                           "status": "unpaid", "notes": "Benchmark", "contact_name": ""},
+        "read_invoice": {"invoice_id": invoice_id},
+        "mark_invoice_paid": {"invoice_id": invoice_id},
+        "get_unpaid_invoices": {},
+        "create_revenue": {"invoice_id": invoice_id, "amount": 100.0, "date": today.isoformat()},
+        "create_expense": {"amount": 42.0, "category": "Software", "description": "Benchmark", "date": today.isoformat()},
+        "create_event": {"title": "Benchmark sync", "contact_id": contact_id,
+                         "date": (today + timedelta(days=3)).isoformat() + " 10:00:00",
+                         "description": "Benchmark", "location": "Office", "contact_name": ""},
+        "list_upcoming_events": {},
+        "log_interaction": {"contact_id": contact_id, "date": today.isoformat(), "interaction_type": "call",
+                            "summary": "Benchmark call", "contact_name": ""},
+        "read_interactions": {"contact_id": contact_id},
+        "generate_report": {"report_type": "revenue", "period": "this_year"},
+        "profit_loss_report": {"period": "this_year"},
+        "get_current_datetime": {},
+        "parse_natural_date": {"date_text": "next friday"},
+        "get_financial_timeseries": {"granularity": "month", "start_date": (today - timedelta(days=365)).isoformat(),
+                                     "end_date": today.isoformat()},
+        "get_ar_aging": {},
+        "list_open_invoices": {"page": 1, "page_size": 50, "aging_bucket": ""},
+        "forecast_cash_flow": {"horizon_days": 90, "granularity": "week", "starting_balance": 10000.0},
+        "get_top_rankings": {"ranking_type": "customers", "limit": 10, "period": "this_year"},
+        "detect_expense_anomalies": {"lookback_days": 90},
+        "search_business_records": {"query": "invoice payment", "limit": 20},
+    }
+
+
+def _call(tool, arguments: dict, context: BenchToolContext) -> dict:
+    if "tool_context" in tool.__code__.co_varnames[:tool.__code__.co_argcount]:
+        return tool(tool_context=context, **arguments)
+    return tool(**arguments)
+
+
+def measure_tool(tool, arguments: dict, context: BenchToolContext, repeat: int) -> dict:
+    """Time one tool: a first call, warm repeats, and a traced call for peak memory."""
+    timings = []
+    result = None
+    for _ in range(1 + repeat):
+        started = time.perf_counter()
+        result = _call(tool, arguments, context)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # Traced separately (tracing slows calls down) and on a fresh data version
+    # so cached tools show what a cache miss allocates
+    database_tools.bump_data_version(context.state["user_id"])
+    tracemalloc.start()
+    try:
+        _call(tool, arguments, context)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    warm = timings[1:] or timings
+    return {
+        "tool": tool.__name__,
+        "status": result.get("status") if isinstance(result, dict) else None,
+        "first_ms": round(timings[0], 2),
+        "p50_ms": round(statistics.median(warm), 2),
+        "max_ms": round(max(warm), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "payload_bytes": len(json.dumps(result, default=str)),
+    }
+
+
+def run_size(size: int, args) -> dict:
+    """Load a dataset with a size-invoice benchmark tenant and measure every selected tool."""
+    original_db = database_tools.SESSIONS_DB
+    with tempfile.TemporaryDirectory() as workdir:
+        database_tools.SESSIONS_DB = f"sqlite:///{os.path.join(workdir, 'tools.db')}"
+        try:
+            database_tools.initialize_business_database()
+            tenants = {BENCH_USER_ID: size}
+            background = int(size * args.background_ratio)
+            if background and args.tenants > 1:
+                tenants.update(zip(tenant_ids(args.tenants - 1), tenant_sizes(background, args.tenants - 1)))
+            dataset = load_dataset(tenants, args.seed)
+            print(f"📦 {size:,} invoices for {BENCH_USER_ID} ({sum(dataset['rows'].values()):,} rows, "
+                  f"{dataset['tenants']} tenants) loaded in {dataset['seconds']:.1f}s")
+
+            context = BenchToolContext(BENCH_USER_ID)
+            arguments = tool_arguments(BENCH_USER_ID)
+            results = []
+            for tool in TOOLS:
+                if args.tools and tool.__name__ not in args.tools:
+                    continue
+                measured = measure_tool(tool, arguments[tool.__name__], context, args.repeat)
+                measured["size"] = size
+                results.append(measured)
+                _print_result(measured)
+        finally:
+            database_tools.SESSIONS_DB = original_db
+    return {"size": size, "dataset": dataset, "results": results}
+
+
+def _print_result(result: dict, baseline: dict = None):
+    line = (
+        f"  {result['tool']:<26} first={result['first_ms']:9.1f}ms p50={result['p50_ms']:9.1f}ms "
+        f"peak={result['peak_memory_kb']:10.1f}KB payload={result['payload_bytes']:>9,}B"
+    )
+    if baseline:
+        change = (result["p50_ms"] - baseline["p50_ms"]) / baseline["p50_ms"] * 100 if baseline["p50_ms"] else 0.0
+        line += f"  ({change:+.0f}% p50 vs baseline)"
+    print(line)
+
+
+def compare(report: list, baseline_path: str):
+    """Print each tool's p50 change against a previous run's JSON output."""
+    with open(baseline_path) as f:
+        baseline = {
+            (result["size"], result["tool"]): result
+            for level in json.load(f)["levels"] for result in level["results"]
+        }
+    print(f"\nCompared with {baseline_path}:")
+    for level in report:
+        print(f"size={level['size']:,}")
+        for result in level["results"]:
+            _print_result(result, baseline.get((result["size"], result["tool"])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every agent tool against synthetic datasets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Invoices of the benchmarked tenant")
+    parser.add_argument("--tools", nargs="*", default=[], help="Only these tools (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm calls per tool after the first")
+    parser.add_argument("--tenants", type=int, default=20, help="Tenants in each dataset, including the benchmarked one")
+    parser.add_argument("--background-ratio", type=float, default=1.0, help="Other tenants' invoices, as a multiple of the size")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    parser.add_argument("--baseline", help="Previous --output file to compare against")
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        report.append(run_size(size, args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "shard_mode": sharding.SHARD_MODE,
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "levels": report,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
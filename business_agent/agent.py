@@ -1,8 +1,10 @@
-from google.adk.agents import LlmAgent
+import os
+
 from business_agent.prompt import BUSINESS_AGENT_PROMPT
 from .tools.database_tools import (
     create_contact,
     read_all_contacts,
+    resolve_contact,
     create_invoice,
     read_invoice,
     mark_invoice_paid,
@@ -19,29 +21,71 @@ from .tools.database_tools import (
     get_current_datetime,
     parse_natural_date,
 )
-
-root_agent = LlmAgent(
-    model='gemini-2.0-flash-001',
-    name='business_analyst_agent',
-    description='Intelligent Business Analyst Assistant with comprehensive database access for CRM, financial management, and business analytics.',
-    instruction=BUSINESS_AGENT_PROMPT,
-    tools=[
-        get_business_insights,
-        create_contact,
-        read_all_contacts,
-        create_invoice,
-        read_invoice,
-        mark_invoice_paid,
-        get_unpaid_invoices,
-        create_revenue,
-        create_expense,
-        create_event,
-        list_upcoming_events,
-        log_interaction,
-        read_interactions,
-        generate_report,
-        profit_loss_report,
-        get_current_datetime,
-        parse_natural_date,
-    ]
+from .tools.analytics_tools import (
+    get_financial_timeseries,
+    get_ar_aging,
+    list_open_invoices,
+    forecast_cash_flow,
+    get_top_rankings,
+    detect_expense_anomalies,
 )
+from .tools.search_tools import search_business_records
+
+# Every tool the agent can call, importable without loading the ADK agent classes
+TOOLS = [
+    get_business_insights,
+    create_contact,
+    read_all_contacts,
+    resolve_contact,
+    create_invoice,
+    read_invoice,
+    mark_invoice_paid,
+    get_unpaid_invoices,
+    create_revenue,
+    create_expense,
+    create_event,
+    list_upcoming_events,
+    log_interaction,
+    read_interactions,
+    generate_report,
+    profit_loss_report,
+    get_current_datetime,
+    parse_natural_date,
+    get_financial_timeseries,
+    get_ar_aging,
+    list_open_invoices,
+    forecast_cash_flow,
+    get_top_rankings,
+    detect_expense_anomalies,
+    search_business_records,
+]
+
+# Worker threads per event loop for the synchronous tools; they block on the
+# database and the write queue there, so concurrent turns (and their writes'
+# group commits) overlap instead of queueing on the loop
+TOOL_THREAD_WORKERS = max(1, int(os.getenv("TOOL_THREAD_WORKERS", os.getenv("BATCH_CONCURRENCY", "8"))))
+
+
+def build_run_config():
+    """RunConfig every runner of this agent uses: sync tools run on ADK's tool thread pool."""
+    from google.adk.agents.run_config import RunConfig, ToolThreadPoolConfig
+
+    return RunConfig(tool_thread_pool_config=ToolThreadPoolConfig(max_workers=TOOL_THREAD_WORKERS))
+
+
+def __getattr__(name):
+    # The ADK agent classes are slow to import, so root_agent is built on first
+    # access (the Runner in main.py, or the ADK loader's hasattr check)
+    if name == "root_agent":
+        from google.adk.agents import LlmAgent
+
+        agent = LlmAgent(
+            model='gemini-2.0-flash-001',
+            name='business_analyst_agent',
+            description='Intelligent Business Analyst Assistant with comprehensive database access for CRM, financial management, and business analytics.',
+            instruction=BUSINESS_AGENT_PROMPT,
+            tools=TOOLS,
+        )
+        globals()["root_agent"] = agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,278 @@
+"""Online backups and point-in-time snapshots of the SQLite databases.
+
+A snapshot copies the main database, every shard and the retention archive
+with SQLite's online backup API, BACKUP_PAGES_PER_STEP pages at a time with
+a short pause between steps, so the live app keeps reading and writing
+while it runs. Each copy is checked with PRAGMA integrity_check before it is
+kept, optionally gzip-compressed, and listed with its checksum in the
+snapshot's manifest.json. Snapshots live in timestamped directories under
+BACKUP_DIR; the newest BACKUP_KEEP are kept.
+
+Each file in a snapshot is consistent on its own; shards are copied one
+after another, not at one shared instant. restore_snapshot copies a
+snapshot back through the backup API as well, so connections to the live
+files see either the old or the restored database, never a torn one.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from business_agent import retention, sharding
+
+# Defaults to a "backups" directory next to the main database
+BACKUP_DIR = os.getenv("BACKUP_DIR", "")
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_PAUSE_MS = float(os.getenv("BACKUP_STEP_PAUSE_MS", "5"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "true").lower() != "false"
+
+SNAPSHOT_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
+_stats_lock = threading.Lock()
+_stats = {
+    "snapshots": 0,
+    "failed_snapshots": 0,
+    "files": 0,
+    "pages": 0,
+    "steps": 0,
+    "restarts": 0,
+    "duration_ms_total": 0.0,
+    "last_snapshot": None,
+}
+
+
+class BackupError(Exception):
+    """Raised when a backup copy fails its integrity check or a snapshot cannot be found."""
+
+
+def backup_dir() -> str:
+    return BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(sharding.main_db_path())), "backups")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _integrity_check(path: str) -> str:
+    conn = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+    finally:
+        conn.close()
+    return "ok" if problems == ["ok"] else "; ".join(problems[:5])
+
+
+def online_copy(source_path: str, target_path: str, pages_per_step: int = 0) -> dict:
+    """Copy a live database with the backup API in page batches; returns step metrics.
+
+    A write to the source from another connection between steps makes SQLite
+    start the copy over; those restarts are counted separately.
+    """
+    pages_per_step = pages_per_step or BACKUP_PAGES_PER_STEP
+    progress = {"steps": 0, "pages": 0, "restarts": 0, "remaining": None}
+
+    def on_step(status, remaining, total):
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            progress["restarts"] += 1
+        progress["remaining"] = remaining
+        progress["steps"] += 1
+        progress["pages"] = total
+
+    started = time.perf_counter()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        # Readers and writers get the database back between steps
+        source.backup(target, pages=pages_per_step, progress=on_step, sleep=BACKUP_STEP_PAUSE_MS / 1000)
+    finally:
+        target.close()
+        source.close()
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    return {
+        "pages": progress["pages"],
+        "steps": progress["steps"],
+        "restarts": progress["restarts"],
+        "pages_per_step": pages_per_step,
+        "duration_ms": round(duration_ms, 1),
+        "avg_step_ms": round(duration_ms / max(1, progress["steps"]), 3),
+    }
+
+
+def _snapshot_sources() -> dict:
+    """Relative snapshot name -> live path of every database worth keeping."""
+    main_path = sharding.main_db_path()
+    sources = {os.path.basename(main_path): main_path}
+    for shard_path in sharding.list_shards():
+        if shard_path != main_path:
+            sources[os.path.join("shards", os.path.basename(shard_path))] = shard_path
+    if os.path.exists(retention.archive_path()):
+        sources[os.path.basename(retention.archive_path())] = retention.archive_path()
+    return sources
+
+
+def create_snapshot(compress: bool = BACKUP_COMPRESS, keep: int = BACKUP_KEEP) -> dict:
+    """Back up every database into a new snapshot directory, then rotate old snapshots.
+
+    Returns:
+        The snapshot manifest: per-file pages, steps, duration, size, checksum and integrity
+    """
+    started = time.perf_counter()
+    name = datetime.now(timezone.utc).strftime(SNAPSHOT_TIME_FORMAT)
+    snapshot_path = os.path.join(backup_dir(), name)
+    suffix = 1
+    while os.path.exists(snapshot_path) or os.path.exists(snapshot_path + ".partial"):
+        suffix += 1
+        snapshot_path = os.path.join(backup_dir(), f"{name}-{suffix}")
+    name = os.path.basename(snapshot_path)
+    partial_path = snapshot_path + ".partial"
+    os.makedirs(partial_path, exist_ok=True)
+
+    manifest = {"snapshot": name, "created_at": datetime.now(timezone.utc).isoformat(), "compressed": compress, "files": []}
+    try:
+        for relative_name, source_path in _snapshot_sources().items():
+            target_path = os.path.join(partial_path, relative_name)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+            entry = {"name": relative_name, "source": source_path}
+            entry.update(online_copy(source_path, target_path))
+            entry["integrity"] = _integrity_check(target_path)
+            if entry["integrity"] != "ok":
+                raise BackupError(f"Backup of {source_path} failed integrity check: {entry['integrity']}")
+            entry["size_bytes"] = os.path.getsize(target_path)
+
+            if compress:
+                with open(target_path, "rb") as raw, gzip.open(target_path + ".gz", "wb", compresslevel=6) as packed:
+                    shutil.copyfileobj(raw, packed, 1 << 20)
+                os.remove(target_path)
+                target_path += ".gz"
+                entry["name"] += ".gz"
+                entry["compressed_bytes"] = os.path.getsize(target_path)
+            entry["sha256"] = _sha256(target_path)
+            manifest["files"].append(entry)
+
+        manifest["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        with open(os.path.join(partial_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        # Only complete, verified snapshots ever carry their final name
+        os.rename(partial_path, snapshot_path)
+    except Exception:
+        shutil.rmtree(partial_path, ignore_errors=True)
+        with _stats_lock:
+            _stats["failed_snapshots"] += 1
+        raise
+
+    with _stats_lock:
+        _stats["snapshots"] += 1
+        _stats["files"] += len(manifest["files"])
+        _stats["pages"] += sum(entry["pages"] for entry in manifest["files"])
+        _stats["steps"] += sum(entry["steps"] for entry in manifest["files"])
+        _stats["restarts"] += sum(entry["restarts"] for entry in manifest["files"])
+        _stats["duration_ms_total"] += manifest["duration_ms"]
+        _stats["last_snapshot"] = name
+
+    manifest["rotated"] = rotate_snapshots(keep)
+    print(f"💾 Snapshot {name}: {len(manifest['files'])} databases in {manifest['duration_ms']:.0f}ms")
+    return manifest
+
+
+def list_snapshots() -> list:
+    """Manifests of the complete snapshots, newest first."""
+    root = backup_dir()
+    if not os.path.isdir(root):
+        return []
+    manifests = []
+    for name in sorted(os.listdir(root), reverse=True):
+        manifest_path = os.path.join(root, name, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifests.append(json.load(f))
+    return manifests
+
+
+def rotate_snapshots(keep: int = BACKUP_KEEP) -> list:
+    """Delete all but the newest keep snapshots; returns the names removed."""
+    if keep <= 0:
+        return []
+    removed = [manifest["snapshot"] for manifest in list_snapshots()[keep:]]
+    for name in removed:
+        shutil.rmtree(os.path.join(backup_dir(), name), ignore_errors=True)
+    return removed
+
+
+def restore_snapshot(name: str, target_dir: str = "") -> list:
+    """Restore a snapshot's databases, verified against the manifest checksums.
+
+    Without target_dir the live files are overwritten in place through the
+    backup API, which is safe while the app runs; with it, plain copies are
+    written there for inspection.
+
+    Returns:
+        List of (snapshot file, restored path) pairs
+    """
+    snapshot_path = os.path.join(backup_dir(), name)
+    manifest_path = os.path.join(snapshot_path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        raise BackupError(f"Snapshot not found: {name}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    restored = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for entry in manifest["files"]:
+            stored_path = os.path.join(snapshot_path, entry["name"])
+            if _sha256(stored_path) != entry["sha256"]:
+                raise BackupError(f"Checksum mismatch for {entry['name']} in snapshot {name}")
+
+            plain_path = stored_path
+            if entry["name"].endswith(".gz"):
+                plain_path = os.path.join(workdir, os.path.basename(entry["name"])[:-3])
+                with gzip.open(stored_path, "rb") as packed, open(plain_path, "wb") as raw:
+                    shutil.copyfileobj(packed, raw, 1 << 20)
+
+            if target_dir:
+                destination = os.path.join(target_dir, entry["name"][:-3] if entry["name"].endswith(".gz") else entry["name"])
+            else:
+                destination = entry["source"]
+            os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+            online_copy(plain_path, destination)
+            restored.append((entry["name"], destination))
+            print(f"♻️ Restored {entry['name']} -> {destination}")
+
+    if not target_dir:
+        # Every cached read is stale after the databases change underneath it.
+        # Data versions move forward rather than back to 0, so a later write
+        # cannot land on a version a cache has already seen; change_log
+        # sequence numbers do go back, so the series caches are dropped outright
+        from business_agent import contact_resolution, prefetch
+        from business_agent.tools import analytics_tools, database_tools
+        database_tools.bump_all_data_versions()
+        contact_resolution.clear_contact_indexes()
+        prefetch.discard_all_prefetched()
+        analytics_tools._series_cache.clear()
+        analytics_tools._forecast_cache.clear()
+    return restored
+
+
+def get_backup_stats() -> dict:
+    """Snapshot counts, pages copied and average step time so far."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["avg_snapshot_ms"] = round(stats["duration_ms_total"] / max(1, stats["snapshots"]), 1)
+    stats["pages_per_step"] = BACKUP_PAGES_PER_STEP
+    stats["effective_pages_per_step"] = round(stats["pages"] / max(1, stats["steps"]), 1)
+    stats["backup_dir"] = backup_dir()
+    stats["keep"] = BACKUP_KEEP
+    return stats
@@ -0,0 +1,195 @@
+"""Append-only change feed over the business tables, for incremental sync.
+
+Triggers on contact, invoice, revenue, expense, event and interaction append
+one row per insert, update or delete to change_log on the same shard: a
+sequence number, the owning user, the table, the row id and the operation.
+Sequence numbers come from AUTOINCREMENT, so they only grow and are never
+reused; a user's records all live on one shard, so their feed is ordered.
+
+Clients keep the last sequence number they saw and long-poll
+wait_for_changes (GET /changes?since=<seq>). When nothing has changed the
+call parks on a condition that the write tools notify after each commit, and
+re-checks the log every CHANGES_RECHECK_SECONDS only to catch writes from
+other processes, so an idle feed costs one indexed query per recheck.
+
+Entries older than CHANGE_LOG_RETENTION_HOURS are pruned. A client whose
+cursor falls behind the oldest entry kept (or ahead of the newest, after a
+restore) gets reset=true and should reload everything, e.g. from
+/data?type=raw, before following the feed again.
+"""
+
+import os
+import threading
+import time
+
+from business_agent import sharding, storage
+
+CHANGES_LONG_POLL_SECONDS = float(os.getenv("CHANGES_LONG_POLL_SECONDS", "25"))
+CHANGES_RECHECK_SECONDS = float(os.getenv("CHANGES_RECHECK_SECONDS", "5"))
+CHANGES_PAGE_LIMIT = int(os.getenv("CHANGES_PAGE_LIMIT", "500"))
+CHANGE_LOG_RETENTION_HOURS = float(os.getenv("CHANGE_LOG_RETENTION_HOURS", "168"))
+
+# Table -> SQL for the owning user of a {row}; revenue is owned through its invoice
+CHANGE_FEED_TABLES = {
+    "contact": "{row}.user_id",
+    "invoice": "{row}.user_id",
+    "revenue": "(SELECT user_id FROM invoice WHERE id = {row}.invoice_id)",
+    "expense": "{row}.user_id",
+    "event": "{row}.user_id",
+    "interaction": "{row}.user_id",
+}
+
+_change_condition = threading.Condition()
+# Per-user count of committed writes, bumped by notify_changes
+_change_counters = {}
+_stats = {"polls": 0, "immediate": 0, "woken": 0, "timeouts": 0, "resets": 0, "waiting": 0}
+
+
+def change_log_statements() -> list:
+    """CREATE statements for change_log, its index and the triggers feeding it."""
+    statements = ['''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''', "CREATE INDEX IF NOT EXISTS idx_change_log_user_seq ON change_log (user_id, seq)"]
+
+    log = "INSERT INTO change_log (user_id, table_name, row_id, op)"
+    for table, owner in CHANGE_FEED_TABLES.items():
+        for op, event, row in (("insert", "INSERT", "NEW"), ("update", "UPDATE", "NEW"), ("delete", "DELETE", "OLD")):
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_change_{op} AFTER {event} ON {table}
+                BEGIN
+                    {log} VALUES ({owner.format(row=row)}, '{table}', {row}.id, '{op}');
+                END
+            ''')
+    return statements
+
+
+def prune_change_log(cursor) -> int:
+    """Delete change_log entries older than CHANGE_LOG_RETENTION_HOURS; returns rows deleted."""
+    if CHANGE_LOG_RETENTION_HOURS <= 0:
+        return 0
+    cursor.execute(
+        "DELETE FROM change_log WHERE changed_at < datetime('now', ?)",
+        (f"-{CHANGE_LOG_RETENTION_HOURS} hours",),
+    )
+    return cursor.rowcount
+
+
+def latest_change_seq(cursor, user_id: str) -> int:
+    """Sequence number of a user's newest logged change, or 0 if none are kept.
+
+    Visible to every process sharing the shard, unlike the in-process data
+    version, so results cached against it go stale on any writer's commit.
+    """
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log WHERE user_id = ?", (user_id,))
+    return cursor.fetchone()[0]
+
+
+def notify_changes(user_id: str):
+    """Wake the long polls waiting on a user's feed; call after their write commits."""
+    with _change_condition:
+        _change_counters[user_id] = _change_counters.get(user_id, 0) + 1
+        _change_condition.notify_all()
+
+
+def read_changes(user_id: str, since: int, limit: int) -> dict:
+    """Return up to limit of a user's changes with a sequence number above since.
+
+    Returns:
+        Dict with the changes, next_since (the cursor for the next call), the
+        shard's newest sequence number as head, and reset (with no changes and
+        next_since at head) when entries after since may have been pruned or
+        the cursor is ahead of the log
+    """
+    conn = storage.read_connection(sharding.db_path_for(user_id))
+    try:
+        rows = conn.execute('''
+            SELECT seq, table_name, row_id, op, changed_at
+            FROM change_log
+            WHERE user_id = ? AND seq > ?
+            ORDER BY seq
+            LIMIT ?
+        ''', (user_id, since, limit)).fetchall()
+        oldest = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+        # Sequence numbers survive pruning in sqlite_sequence even when the log is empty
+        head = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'").fetchone()[0]
+    finally:
+        conn.close()
+
+    first_kept = oldest if oldest is not None else head + 1
+    if since > head or (since > 0 and since + 1 < first_kept):
+        # The client has to reload; following the feed from head afterwards misses nothing
+        return {"user_id": user_id, "since": since, "changes": [], "next_since": head,
+                "head": head, "more": False, "reset": True}
+
+    changes = [
+        {"seq": seq, "table": table, "row_id": row_id, "op": op, "changed_at": changed_at}
+        for seq, table, row_id, op, changed_at in rows
+    ]
+    return {
+        "user_id": user_id,
+        "since": since,
+        "changes": changes,
+        "next_since": changes[-1]["seq"] if changes else max(since, 0),
+        "head": head,
+        "more": len(changes) == limit,
+        "reset": False,
+    }
+
+
+def wait_for_changes(user_id: str, since: int, timeout: float = CHANGES_LONG_POLL_SECONDS,
+                     limit: int = CHANGES_PAGE_LIMIT) -> dict:
+    """Long-poll a user's change feed: return as soon as there are changes after since.
+
+    Waits up to timeout seconds; an empty changes list means nothing happened.
+    """
+    started = time.perf_counter()
+    deadline = time.monotonic() + max(0.0, timeout)
+    waited = False
+    with _change_condition:
+        _stats["polls"] += 1
+
+    while True:
+        # Taken before the query, so a commit landing during it still wakes the wait below
+        with _change_condition:
+            seen = _change_counters.get(user_id, 0)
+
+        result = read_changes(user_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if result["changes"] or result["reset"] or remaining <= 0:
+            with _change_condition:
+                if result["reset"]:
+                    _stats["resets"] += 1
+                elif result["changes"]:
+                    _stats["woken" if waited else "immediate"] += 1
+                else:
+                    _stats["timeouts"] += 1
+            result["waited_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+
+        with _change_condition:
+            _stats["waiting"] += 1
+            try:
+                _change_condition.wait_for(
+                    lambda: _change_counters.get(user_id, 0) != seen,
+                    timeout=min(remaining, CHANGES_RECHECK_SECONDS),
+                )
+            finally:
+                _stats["waiting"] -= 1
+        waited = True
+
+
+def get_change_feed_stats() -> dict:
+    """Long-poll counts: answered immediately, woken by a write, timed out, reset, waiting now."""
+    with _change_condition:
+        stats = dict(_stats)
+    stats["long_poll_seconds"] = CHANGES_LONG_POLL_SECONDS
+    stats["recheck_seconds"] = CHANGES_RECHECK_SECONDS
+    stats["retention_hours"] = CHANGE_LOG_RETENTION_HOURS
+    return stats
@@ -0,0 +1,163 @@
+"""Local fuzzy resolution of contact names to contact IDs.
+
+Keeps a per-user in-memory index of normalized contact names, companies and
+emails. A trigram inverted index narrows the candidates and a per-word edit
+similarity ranks them, so "Sarah from Design Studio" or a misspelled
+"Sara Jonson" maps to a contact_id without the model first dumping every
+contact with read_all_contacts. An index is rebuilt lazily when the user's
+data version changes.
+"""
+
+import re
+import threading
+from difflib import SequenceMatcher
+
+from business_agent import sharding, storage
+
+# A match is accepted when it scores at least this and beats the runner-up by the margin
+RESOLVE_MIN_SCORE = 0.75
+RESOLVE_MIN_MARGIN = 0.1
+# Candidates scoring below this are not worth suggesting
+CANDIDATE_MIN_SCORE = 0.4
+MAX_CANDIDATES = 5
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# "Sarah from Design Studio", "Mike at Wilson Consulting", "John (TechCorp)"
+_COMPANY_SPLIT_PATTERN = re.compile(r"\s+(?:from|at|of|with)\s+|\s*[(,]\s*", re.IGNORECASE)
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def normalize(text: str) -> list:
+    """Lower-cased alphanumeric words of a name, company or email."""
+    return _WORD_PATTERN.findall((text or "").lower())
+
+
+def trigrams(word: str) -> set:
+    """Padded character trigrams of a word, so short words still share grams."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(word: str, other: str) -> float:
+    return SequenceMatcher(None, word, other).ratio()
+
+
+class ContactIndex:
+    """Trigram index over one user's contacts."""
+
+    def __init__(self, rows: list):
+        self.contacts = []
+        self.by_email = {}
+        self.postings = {}
+
+        for contact_id, name, company, email, status in rows:
+            entry = {
+                "contact": {"id": contact_id, "name": name, "company": company, "email": email, "status": status},
+                "name_words": normalize(name),
+                "company_words": normalize(company),
+            }
+            position = len(self.contacts)
+            self.contacts.append(entry)
+            if email:
+                self.by_email[email.strip().lower()] = position
+            for word in entry["name_words"] + entry["company_words"]:
+                for gram in trigrams(word):
+                    self.postings.setdefault(gram, set()).add(position)
+
+    @staticmethod
+    def _words_score(query_words: list, candidate_words: list) -> float:
+        """Average best per-word similarity of the query words against a candidate's words."""
+        if not query_words or not candidate_words:
+            return 0.0
+        return sum(
+            max(_similarity(word, candidate) for candidate in candidate_words)
+            for word in query_words
+        ) / len(query_words)
+
+    def search(self, query: str) -> list:
+        """Score contacts against a query; best first, as (score, contact) pairs."""
+        query = (query or "").strip()
+        if not query:
+            return []
+
+        email_position = self.by_email.get(query.lower())
+        if email_position is not None:
+            return [(1.0, self.contacts[email_position]["contact"])]
+
+        parts = [part for part in _COMPANY_SPLIT_PATTERN.split(query.rstrip(")")) if part.strip()]
+        name_words = normalize(parts[0])
+        company_words = normalize(" ".join(parts[1:]))
+
+        candidates = set()
+        for word in name_words + company_words:
+            for gram in trigrams(word):
+                candidates |= self.postings.get(gram, set())
+
+        scored = []
+        for position in candidates:
+            entry = self.contacts[position]
+            name_score = self._words_score(name_words, entry["name_words"])
+            if company_words:
+                # Both a name and a company were given; both should agree
+                score = 0.6 * name_score + 0.4 * self._words_score(company_words, entry["company_words"])
+            else:
+                # A lone phrase may be either the person or their company
+                score = max(name_score, 0.9 * self._words_score(name_words, entry["company_words"]))
+            scored.append((round(score, 3), entry["contact"]))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
+
+
+def get_contact_index(user_id: str) -> ContactIndex:
+    """Return the user's contact index, rebuilding it if their data has changed."""
+    # Imported lazily: database_tools imports this module for its write tools
+    from business_agent.tools import database_tools
+
+    version = database_tools.get_data_version(user_id)
+    with _lock:
+        cached = _indexes.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    conn = storage.read_connection(sharding.db_path_for(user_id))
+    try:
+        rows = conn.execute(
+            "SELECT id, name, company, email, status FROM contact WHERE user_id = ?", (user_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    index = ContactIndex(rows)
+    with _lock:
+        _indexes[user_id] = (version, index)
+    return index
+
+
+def clear_contact_indexes():
+    """Drop every cached contact index; each is rebuilt on its next lookup."""
+    with _lock:
+        _indexes.clear()
+
+
+def resolve_contact_name(user_id: str, contact_name: str) -> dict:
+    """Resolve a contact name, company or email to a single contact.
+
+    Returns:
+        Dictionary with 'contact' set when the match is confident, and the
+        scored 'candidates' otherwise
+    """
+    scored = get_contact_index(user_id).search(contact_name)
+    candidates = [
+        dict(contact, match_score=score)
+        for score, contact in scored[:MAX_CANDIDATES]
+        if score >= CANDIDATE_MIN_SCORE
+    ]
+
+    best = scored[0][0] if scored else 0.0
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+    if best >= RESOLVE_MIN_SCORE and best - runner_up >= RESOLVE_MIN_MARGIN:
+        return {"contact": candidates[0], "candidates": candidates}
+    return {"contact": None, "candidates": candidates}
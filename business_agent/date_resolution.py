@@ -0,0 +1,93 @@
+"""Local pre-resolution of natural-language dates in chat messages.
+
+Finds date phrases such as "next Friday at 2pm" or "in 3 days" in a user
+message and resolves them with the same parser behind the parse_natural_date
+tool, so the model can call create_event/create_invoice directly instead of
+spending a round trip on parse_natural_date first.
+"""
+
+import re
+from datetime import datetime
+
+from business_agent.tools.database_tools import resolve_natural_date
+
+_TIME = r'(?:\s+at\s+\d{1,2}(?::\d{2})?\s*(?:am|pm)|\s+at\s+noon)?'
+_WEEKDAY = r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)'
+_MONTH = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|'
+          r'sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+
+# Ordered so that longer, more specific phrases win over their fragments
+DATE_PHRASE_PATTERN = re.compile(
+    r'\b(?:'
+    rf'(?:today|tomorrow|yesterday|tonight){_TIME}'
+    rf'|next\s+(?:week|month){_TIME}'
+    r'|in\s+\d+\s+(?:days?|weeks?|months?)'
+    rf'|(?:next\s+|this\s+|on\s+)?{_WEEKDAY}{_TIME}'
+    rf'|{_MONTH}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?{_TIME}'
+    r')\b',
+    re.IGNORECASE,
+)
+_HAS_TIME_PATTERN = re.compile(r'\d(?:am|pm)\b|\s(?:am|pm)\b|\bnoon\b|\btonight\b', re.IGNORECASE)
+_LEADING_ON_PATTERN = re.compile(r'^on\s+', re.IGNORECASE)
+
+RESOLVED_DATES_HEADER = "[Resolved dates - use these values directly, no need to call parse_natural_date]"
+
+
+def find_date_phrases(message: str) -> list:
+    """Return the distinct date phrases found in a message, in order of appearance."""
+    phrases = []
+    for match in DATE_PHRASE_PATTERN.finditer(message):
+        phrase = match.group(0).strip()
+        if phrase.lower() not in (p.lower() for p in phrases):
+            phrases.append(phrase)
+    return phrases
+
+
+def resolve_message_dates(message: str, now: datetime = None) -> list:
+    """Resolve every date phrase in a message against the current time.
+
+    Returns:
+        List of dicts with the original phrase, formatted_date and, when the
+        phrase carries a time of day, formatted_datetime.
+    """
+    now = now or datetime.now()
+    reference = now.replace(second=0, microsecond=0)
+    resolved = []
+
+    for phrase in find_date_phrases(message):
+        date_text = _LEADING_ON_PATTERN.sub('', phrase.strip().lower())
+        try:
+            parsed = resolve_natural_date(date_text, reference)
+        except Exception as e:
+            print(f"⚠️ Could not pre-resolve date phrase '{phrase}': {e}")
+            continue
+
+        entry = {
+            "phrase": phrase,
+            "formatted_date": parsed.strftime("%Y-%m-%d"),
+            "day_of_week": parsed.strftime("%A"),
+        }
+        if _HAS_TIME_PATTERN.search(phrase):
+            entry["formatted_datetime"] = parsed.strftime("%Y-%m-%d %H:%M:%S")
+        resolved.append(entry)
+
+    return resolved
+
+
+def annotate_message_with_dates(message: str, now: datetime = None) -> tuple:
+    """Append the locally resolved dates to a user message.
+
+    Returns:
+        Tuple of (message to send to the agent, list of resolved dates).
+        The message is unchanged when no date phrases are found.
+    """
+    resolved = resolve_message_dates(message, now)
+    if not resolved:
+        return message, []
+
+    lines = [RESOLVED_DATES_HEADER]
+    for entry in resolved:
+        value = entry.get("formatted_datetime", entry["formatted_date"])
+        lines.append(f'- "{entry["phrase"]}" = {value} ({entry["day_of_week"]})')
+
+    return f"{message}\n\n" + "\n".join(lines), resolved
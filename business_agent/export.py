@@ -0,0 +1,166 @@
+"""Streaming, user-scoped export of business tables.
+
+Rows are read from a cursor in fixed-size chunks with fetchmany and encoded
+chunk by chunk, so memory stays constant however large a table is. Supported
+formats are CSV, NDJSON and, when pyarrow is installed, Parquet and Arrow IPC
+(one row group / record batch per chunk).
+"""
+
+import csv
+import io
+import json
+import os
+
+from business_agent import sharding, storage
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# Every export query is scoped to one user; revenue has no user_id of its own
+# and is scoped through its invoice. Keys are export names, mapped to
+# (source table, query) so columnar formats can take types from the schema.
+EXPORT_QUERIES = {
+    "contacts": ("contact", "SELECT * FROM contact WHERE user_id = ? ORDER BY id"),
+    "invoices": ("invoice", "SELECT * FROM invoice WHERE user_id = ? ORDER BY id"),
+    "revenue": ("revenue", '''
+        SELECT r.* FROM revenue r
+        JOIN invoice i ON r.invoice_id = i.id
+        WHERE i.user_id = ?
+        ORDER BY r.id
+    '''),
+    "expenses": ("expense", "SELECT * FROM expense WHERE user_id = ? ORDER BY id"),
+    "events": ("event", "SELECT * FROM event WHERE user_id = ? ORDER BY id"),
+    "interactions": ("interaction", "SELECT * FROM interaction WHERE user_id = ? ORDER BY id"),
+}
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+class ExportError(Exception):
+    """Raised for an unknown table or format, or a missing optional dependency."""
+
+
+def validate_export(table: str, export_format: str):
+    """Check a table/format pair before any rows are streamed."""
+    if table not in EXPORT_QUERIES:
+        raise ExportError(f"Unknown table: {table}. Use one of: {', '.join(EXPORT_QUERIES)}")
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format: {export_format}. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format in ("parquet", "arrow"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportError(f"{export_format} export requires pyarrow (pip install pyarrow)")
+
+
+def _connect(user_id: str):
+    return storage.read_connection(sharding.db_path_for(user_id))
+
+
+def column_types(user_id: str, table: str) -> list:
+    """(column, declared SQLite type) pairs of an export's source table on the user's shard."""
+    conn = _connect(user_id)
+    try:
+        return [(row[1], row[2].upper()) for row in conn.execute(f"PRAGMA table_info({EXPORT_QUERIES[table][0]})")]
+    finally:
+        conn.close()
+
+
+def iter_chunks(user_id: str, table: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield (columns, rows) chunks of a user's table, at most chunk_size rows each.
+
+    An empty table yields a single chunk with no rows, so headers are still written.
+    """
+    conn = _connect(user_id)
+    try:
+        cursor = conn.execute(EXPORT_QUERIES[table][1], (user_id,))
+        columns = [description[0] for description in cursor.description]
+        rows = cursor.fetchmany(chunk_size)
+        yield columns, rows
+        while rows:
+            rows = cursor.fetchmany(chunk_size)
+            if rows:
+                yield columns, rows
+    finally:
+        conn.close()
+
+
+def _csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for columns, rows in chunks:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _ndjson_chunks(chunks):
+    for columns, rows in chunks:
+        yield "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows).encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are handed out after each chunk."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _arrow_chunks(chunks, user_id: str, table: str, export_format: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Fixed schema from the declared column types, so every chunk agrees
+    # even when a column happens to be all NULL in one of them
+    arrow_types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    schema = pa.schema([(column, arrow_types.get(declared, pa.string())) for column, declared in column_types(user_id, table)])
+
+    sink = _DrainableSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for columns, rows in chunks:
+            batch = pa.Table.from_pydict(
+                {column: [row[i] for row in rows] for i, column in enumerate(columns)},
+                schema=schema,
+            )
+            writer.write_table(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(user_id: str, table: str, export_format: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield the encoded bytes of a user's table export, one chunk at a time."""
+    validate_export(table, export_format)
+    chunks = iter_chunks(user_id, table, chunk_size)
+
+    if export_format == "csv":
+        yield from _csv_chunks(chunks)
+    elif export_format == "ndjson":
+        yield from _ndjson_chunks(chunks)
+    else:
+        yield from _arrow_chunks(chunks, user_id, table, export_format)
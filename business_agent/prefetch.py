@@ -0,0 +1,163 @@
+"""Speculative prefetch of read-only business data alongside the first model call.
+
+A cheap keyword classifier guesses which read-only tools a chat message will
+need (e.g. "unpaid" -> get_unpaid_invoices). Those queries start in background
+threads while the model's first round trip is in flight, and the tool call
+that follows picks up the result instead of hitting SQLite again. Results
+are discarded if a write tool changes the user's data in the meantime.
+
+Set PREFETCH_ENABLED=false to turn speculation off.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() != "false"
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "30"))
+
+# Keyword rules mapping a message to the read-only tools it is likely to call
+PREFETCH_RULES = [
+    (re.compile(r'\b(unpaid|outstanding|overdue|owes?|owed|collections?|receivables?)\b', re.IGNORECASE),
+     "get_unpaid_invoices"),
+    (re.compile(r'\b(insights?|overview|metrics|kpis?|how\b.{0,20}\bbusiness|performing|performance|health)\b', re.IGNORECASE),
+     "get_business_insights"),
+]
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+_lock = threading.Lock()
+_pending = {}
+_stats = {}
+
+
+def _loaders() -> dict:
+    # Imported lazily: database_tools imports this module to consume results
+    from business_agent.tools.database_tools import compute_business_insights, query_unpaid_invoices
+
+    return {
+        "get_business_insights": compute_business_insights,
+        "get_unpaid_invoices": query_unpaid_invoices,
+    }
+
+
+def _count(tool_name: str, outcome: str):
+    tool_stats = _stats.setdefault(tool_name, {"started": 0, "hits": 0, "wasted": 0, "stale": 0, "errors": 0})
+    tool_stats[outcome] += 1
+
+
+def classify_message(message: str) -> list:
+    """Return the read-only tools a message is likely to call."""
+    return [tool_name for pattern, tool_name in PREFETCH_RULES if pattern.search(message)]
+
+
+def start_prefetch(user_id: str, message: str) -> list:
+    """Start background queries for the tools a message is likely to need.
+
+    Returns:
+        List of tool names that were prefetched
+    """
+    if not PREFETCH_ENABLED:
+        return []
+
+    from business_agent.tools.database_tools import get_data_version
+
+    loaders = _loaders()
+    started = []
+    for tool_name in classify_message(message):
+        with _lock:
+            if (user_id, tool_name) in _pending:
+                continue
+            future = _executor.submit(loaders[tool_name], user_id)
+            _pending[(user_id, tool_name)] = (future, get_data_version(user_id), time.monotonic())
+            _count(tool_name, "started")
+        started.append(tool_name)
+
+    if started:
+        print(f"⚡ Prefetching {started} for {user_id}")
+    return started
+
+
+def take_prefetched(user_id: str, tool_name: str):
+    """Claim a prefetched tool result, waiting for it if still in flight.
+
+    Returns:
+        The tool result, or None if nothing usable was prefetched
+    """
+    with _lock:
+        entry = _pending.pop((user_id, tool_name), None)
+    if entry is None:
+        return None
+
+    from business_agent.tools.database_tools import get_data_version
+
+    future, version, created = entry
+    if version != get_data_version(user_id) or time.monotonic() - created > PREFETCH_TTL_SECONDS:
+        with _lock:
+            _count(tool_name, "stale")
+        return None
+
+    try:
+        result = future.result()
+    except Exception as e:
+        print(f"❌ Prefetch of {tool_name} failed: {e}")
+        with _lock:
+            _count(tool_name, "errors")
+        return None
+
+    if not isinstance(result, dict) or result.get("status") != "success":
+        with _lock:
+            _count(tool_name, "errors")
+        return None
+
+    with _lock:
+        _count(tool_name, "hits")
+    print(f"⚡ Prefetch hit: {tool_name} for {user_id}")
+    return result
+
+
+def finish_prefetch(user_id: str):
+    """Discard any prefetched results the user's turn did not use."""
+    with _lock:
+        unused = [key for key in _pending if key[0] == user_id]
+        for key in unused:
+            future, _, _ = _pending.pop(key)
+            future.cancel()
+            _count(key[1], "wasted")
+
+
+def discard_all_prefetched():
+    """Discard every pending prefetch, e.g. after the databases were restored underneath them."""
+    with _lock:
+        for key in list(_pending):
+            future, _, _ = _pending.pop(key)
+            future.cancel()
+            _count(key[1], "stale")
+
+
+def get_prefetch_stats() -> dict:
+    """Hit and waste ratios per prefetched tool, for tuning the keyword rules."""
+    with _lock:
+        per_tool = {}
+        for tool_name, counts in _stats.items():
+            started = counts["started"] or 1
+            per_tool[tool_name] = dict(
+                counts,
+                hit_ratio=round(counts["hits"] / started, 3),
+                waste_ratio=round((counts["wasted"] + counts["stale"]) / started, 3),
+            )
+        totals = {key: sum(counts[key] for counts in _stats.values())
+                  for key in ("started", "hits", "wasted", "stale", "errors")}
+
+    started = totals["started"] or 1
+    return {
+        "enabled": PREFETCH_ENABLED,
+        "totals": dict(
+            totals,
+            hit_ratio=round(totals["hits"] / started, 3),
+            waste_ratio=round((totals["wasted"] + totals["stale"]) / started, 3),
+        ),
+        "per_tool": per_tool,
+        "in_flight": len(_pending),
+    }
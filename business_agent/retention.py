@@ -0,0 +1,335 @@
+"""Retention and archival of ADK session events and aged business records.
+
+ADK never prunes its events table, which shares the main database with
+everything else. archive_events moves whole invocations out of it once they
+are older than EVENT_RETENTION_DAYS or fall outside the last
+EVENT_KEEP_PER_SESSION events of their session (whole invocations, so a
+session never starts with a tool response whose call was archived).
+archive_interactions does the same for interactions older than
+INTERACTION_RETENTION_DAYS on every shard. A setting of 0 disables its rule.
+Change feed entries past CHANGE_LOG_RETENTION_HOURS are dropped as well, and
+pending insight change-log entries are folded into the users' totals.
+
+Rows are copied column for column, whatever ADK schema version is in use,
+grouped per user into zlib-compressed JSON batches in ARCHIVE_DB, and deleted
+from the hot database in the same transaction. iter_archived reads them back.
+
+Freed pages are then returned to the filesystem by incremental vacuum in
+VACUUM_STEP_PAGES steps, so writers are never blocked for long. Databases
+created before auto_vacuum was enabled need one full VACUUM to switch over
+(enable_incremental_vacuum).
+"""
+
+import base64
+import json
+import os
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from business_agent import sharding, storage
+from business_agent.changes import prune_change_log
+from business_agent.tools import analytics
+from business_agent.tools.database_tools import bump_data_version
+from business_agent.write_queue import run_write
+
+EVENT_RETENTION_DAYS = int(os.getenv("EVENT_RETENTION_DAYS", "90"))
+EVENT_KEEP_PER_SESSION = int(os.getenv("EVENT_KEEP_PER_SESSION", "200"))
+INTERACTION_RETENTION_DAYS = int(os.getenv("INTERACTION_RETENTION_DAYS", "730"))
+# Defaults to <main database>_archive.db
+ARCHIVE_DB = os.getenv("ARCHIVE_DB", "")
+ARCHIVE_BATCH_ROWS = int(os.getenv("ARCHIVE_BATCH_ROWS", "500"))
+VACUUM_STEP_PAGES = int(os.getenv("VACUUM_STEP_PAGES", "256"))
+VACUUM_STEP_PAUSE_MS = float(os.getenv("VACUUM_STEP_PAUSE_MS", "10"))
+
+# Invocations to archive: the newest event is past the cutoff, or no event of
+# the invocation is among the session's last :keep events
+_EXPIRED_EVENTS_SQL = '''
+    WITH ranked AS (
+        SELECT rowid AS row_id, app_name, user_id, session_id, invocation_id, timestamp,
+               ROW_NUMBER() OVER (
+                   PARTITION BY app_name, user_id, session_id ORDER BY timestamp DESC
+               ) AS recency
+        FROM events
+    ),
+    invocations AS (
+        SELECT app_name, user_id, session_id, invocation_id,
+               MAX(timestamp) AS newest, MIN(recency) AS best_recency
+        FROM ranked
+        GROUP BY app_name, user_id, session_id, invocation_id
+    )
+    SELECT r.row_id, r.user_id
+    FROM ranked r
+    JOIN invocations i USING (app_name, user_id, session_id, invocation_id)
+    WHERE i.newest < :cutoff OR i.best_recency > :keep
+    ORDER BY r.user_id, r.timestamp
+'''
+
+
+def archive_path() -> str:
+    return ARCHIVE_DB or os.path.splitext(sharding.main_db_path())[0] + "_archive.db"
+
+
+def _create_archive_schema():
+    conn = storage.raw_connection(archive_path())
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive_batch (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                raw_bytes INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_batch_user ON archive_batch (source, user_id)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _encode(value):
+    # ADK v0 stores event actions as a pickled BLOB
+    if isinstance(value, bytes):
+        return {"$b64": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def _decode(value):
+    if isinstance(value, dict) and "$b64" in value:
+        return base64.b64decode(value["$b64"])
+    return value
+
+
+def _empty_totals() -> dict:
+    return {"rows": 0, "batches": 0, "users": 0, "raw_bytes": 0, "compressed_bytes": 0}
+
+
+def _table_exists(cursor, table: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def _archive_rows(db_path: str, source: str, expired: list, dry_run: bool) -> dict:
+    """Move (rowid, user_id) rows of source into the archive, one user batch per transaction."""
+    totals = _empty_totals()
+    totals["rows"] = len(expired)
+    totals["users"] = len({user_id for _, user_id in expired})
+    if dry_run or not expired:
+        return totals
+
+    by_user = {}
+    for row_id, user_id in expired:
+        by_user.setdefault(user_id, []).append(row_id)
+
+    conn = storage.raw_connection(db_path, autocommit=True)
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS archive", (archive_path(),))
+    try:
+        for user_id, row_ids in by_user.items():
+            for start in range(0, len(row_ids), ARCHIVE_BATCH_ROWS):
+                chunk = row_ids[start:start + ARCHIVE_BATCH_ROWS]
+                placeholders = ", ".join("?" for _ in chunk)
+
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.execute(f"SELECT * FROM main.{source} WHERE rowid IN ({placeholders})", chunk)
+                    columns = [description[0] for description in cursor.description]
+                    rows = cursor.fetchall()
+                    if rows:
+                        raw = json.dumps({"columns": columns, "rows": rows}, default=_encode).encode("utf-8")
+                        payload = zlib.compress(raw, 9)
+                        cursor.execute('''
+                            INSERT INTO archive.archive_batch (source, user_id, row_count, raw_bytes, payload)
+                            VALUES (?, ?, ?, ?, ?)
+                        ''', (source, user_id, len(rows), len(raw), payload))
+                        cursor.execute(f"DELETE FROM main.{source} WHERE rowid IN ({placeholders})", chunk)
+                        totals["batches"] += 1
+                        totals["raw_bytes"] += len(raw)
+                        totals["compressed_bytes"] += len(payload)
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+    finally:
+        cursor.execute("DETACH DATABASE archive")
+        conn.close()
+
+    print(f"🗄️ Archived {totals['rows']} {source} rows for {totals['users']} users from {db_path}")
+    return totals
+
+
+def archive_events(retention_days: int = EVENT_RETENTION_DAYS, keep_per_session: int = EVENT_KEEP_PER_SESSION,
+                   dry_run: bool = False) -> dict:
+    """Archive expired invocations from the ADK events table in the main database."""
+    db_path = sharding.main_db_path()
+    # ADK stores naive local timestamps as ISO text
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S") if retention_days > 0 else ""
+    keep = keep_per_session if keep_per_session > 0 else 2 ** 62
+
+    conn = storage.raw_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        if not _table_exists(cursor, "events"):
+            return _empty_totals()
+        cursor.execute(_EXPIRED_EVENTS_SQL, {"cutoff": cutoff, "keep": keep})
+        expired = cursor.fetchall()
+    finally:
+        conn.close()
+
+    return _archive_rows(db_path, "events", expired, dry_run)
+
+
+def archive_interactions(retention_days: int = INTERACTION_RETENTION_DAYS, dry_run: bool = False) -> dict:
+    """Archive interactions dated before the retention window on every shard."""
+    totals = _empty_totals()
+    if retention_days <= 0:
+        return totals
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+
+    for db_path in sharding.list_shards():
+        sharding.migrate_database(db_path)
+        conn = storage.raw_connection(db_path)
+        try:
+            expired = conn.execute(
+                "SELECT id, user_id FROM interaction WHERE date < ? ORDER BY user_id, date", (cutoff,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        shard_totals = _archive_rows(db_path, "interaction", expired, dry_run)
+        for key in totals:
+            totals[key] += shard_totals[key]
+        if not dry_run:
+            # Interaction reports and search results are cached per data version
+            for user_id in {user_id for _, user_id in expired}:
+                bump_data_version(user_id)
+
+    return totals
+
+
+def incremental_vacuum(db_path: str) -> dict:
+    """Return free pages to the filesystem in small steps and report the space reclaimed."""
+    conn = storage.raw_connection(db_path, autocommit=True)
+    try:
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        report = {"path": db_path, "free_pages": free_pages, "steps": 0, "reclaimed_bytes": 0}
+        if auto_vacuum != 2:
+            report["note"] = "auto_vacuum is not INCREMENTAL; run enable_incremental_vacuum once"
+            return report
+
+        while free_pages > 0:
+            # execute() stops after the pragma's first page; executescript runs it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+            report["steps"] += 1
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free_pages:
+                break
+            free_pages = remaining
+            if free_pages and VACUUM_STEP_PAUSE_MS > 0:
+                time.sleep(VACUUM_STEP_PAUSE_MS / 1000)
+
+        pages_after = conn.execute("PRAGMA page_count").fetchone()[0]
+        report["free_pages"] = free_pages
+        report["reclaimed_bytes"] = (pages_before - pages_after) * page_size
+        report["size_bytes"] = pages_after * page_size
+        return report
+    finally:
+        conn.close()
+
+
+def enable_incremental_vacuum(db_path: str) -> dict:
+    """Switch a database to auto_vacuum=INCREMENTAL; needs one full VACUUM, which locks the file."""
+    conn = storage.raw_connection(db_path, autocommit=True)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return {"path": db_path, "converted": False}
+        size_before = os.path.getsize(db_path)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    print(f"🧹 Enabled incremental vacuum on {db_path}")
+    return {"path": db_path, "converted": True, "reclaimed_bytes": size_before - os.path.getsize(db_path)}
+
+
+def prune_change_logs() -> int:
+    """Drop change feed entries past CHANGE_LOG_RETENTION_HOURS on every shard; returns rows deleted."""
+    deleted = 0
+    for db_path in sharding.list_shards():
+        sharding.migrate_database(db_path)
+        conn = storage.raw_connection(db_path)
+        try:
+            deleted += prune_change_log(conn.cursor())
+            conn.commit()
+        finally:
+            conn.close()
+    return deleted
+
+
+def fold_insight_change_logs() -> int:
+    """Fold pending insight_change_log entries into their users' totals on every shard.
+
+    Entries otherwise wait for the user's next get_business_insights call;
+    folding them here keeps the log short for users who rarely ask.
+
+    Returns:
+        Number of users whose totals were refreshed
+    """
+    folded = 0
+    for db_path in sharding.list_shards():
+        sharding.migrate_database(db_path)
+        conn = storage.read_connection(db_path)
+        try:
+            user_ids = [row[0] for row in conn.execute("SELECT DISTINCT user_id FROM insight_change_log")]
+        finally:
+            conn.close()
+        for user_id in user_ids:
+            run_write(db_path, lambda cursor, user_id=user_id: analytics.refresh_insight_totals(cursor, user_id))
+            folded += 1
+    return folded
+
+
+def run_retention(event_days: int = EVENT_RETENTION_DAYS, keep_per_session: int = EVENT_KEEP_PER_SESSION,
+                  interaction_days: int = INTERACTION_RETENTION_DAYS, dry_run: bool = False) -> dict:
+    """Archive expired events and interactions, then incrementally vacuum the hot databases."""
+    started = time.perf_counter()
+    _create_archive_schema()
+
+    report = {
+        "archive_db": archive_path(),
+        "dry_run": dry_run,
+        "events": archive_events(event_days, keep_per_session, dry_run),
+        "interactions": archive_interactions(interaction_days, dry_run),
+        "vacuum": [],
+    }
+    if not dry_run:
+        report["change_log_pruned"] = prune_change_logs()
+        report["insight_users_folded"] = fold_insight_change_logs()
+        paths = dict.fromkeys([sharding.main_db_path()] + sharding.list_shards())
+        report["vacuum"] = [incremental_vacuum(path) for path in paths]
+    report["reclaimed_bytes"] = sum(entry["reclaimed_bytes"] for entry in report["vacuum"])
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def iter_archived(source: str, user_id: str):
+    """Yield a user's archived rows of source ('events' or 'interaction') as dicts, oldest batch first."""
+    conn = storage.raw_connection(archive_path())
+    try:
+        batches = conn.execute(
+            "SELECT payload FROM archive_batch WHERE source = ? AND user_id = ? ORDER BY id", (source, user_id)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    for (payload,) in batches:
+        batch = json.loads(zlib.decompress(payload))
+        for row in batch["rows"]:
+            yield {column: _decode(value) for column, value in zip(batch["columns"], row)}
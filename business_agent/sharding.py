@@ -0,0 +1,233 @@
+"""Routing of each user's business records to a SQLite shard.
+
+SHARD_MODE picks the layout:
+
+    single  every user in the main database (SESSIONS_DB), the default
+    tenant  one database file per user under SHARD_DIR
+    hash    SHARD_COUNT database files under SHARD_DIR, users assigned by a
+            stable hash of their user_id
+
+ADK sessions and usage rollups always stay in the main database. A shard is
+migrated with the business schema the first time it is routed to in this
+process, so new shards come up ready and existing ones pick up schema
+changes lazily; files already at SCHEMA_VERSION skip the DDL. Admin reports
+that span every user fan out across the shard files with fan_out().
+"""
+
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+SHARD_MODES = ("single", "tenant", "hash")
+SHARD_MODE = os.getenv("SHARD_MODE", "single").lower()
+# Defaults to a "shards" directory next to the main database
+SHARD_DIR = os.getenv("SHARD_DIR", "")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "16"))
+# Upper bound on database handles kept open across all shards
+MAX_OPEN_SHARDS = int(os.getenv("MAX_OPEN_SHARDS", "32"))
+FAN_OUT_WORKERS = int(os.getenv("SHARD_FAN_OUT_WORKERS", "8"))
+
+if SHARD_MODE not in SHARD_MODES:
+    raise ValueError(f"Unknown SHARD_MODE: {SHARD_MODE}. Use one of: {', '.join(SHARD_MODES)}")
+
+_UNSAFE_FILENAME_PATTERN = re.compile(r"[^A-Za-z0-9_.-]+")
+
+_migration_lock = threading.Lock()
+_migrated = set()
+
+
+class HandleCache:
+    """Bounded LRU of open database handles (connections, engines) keyed by path.
+
+    Opening a handle per shard per call is cheap, but keeping every tenant's
+    handle open is not; the least recently used handle is closed once more
+    than capacity are open.
+    """
+
+    def __init__(self, capacity: int, connect, close=None):
+        self.capacity = max(1, capacity)
+        self._connect = connect
+        self._close = close or (lambda handle: handle.close())
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evicted = 0
+
+    def get(self, db_path: str):
+        """Return the open handle for db_path, opening it (and evicting the LRU one) if needed."""
+        with self._lock:
+            conn = self._handles.get(db_path)
+            if conn is not None:
+                self._handles.move_to_end(db_path)
+                return conn
+
+            conn = self._handles[db_path] = self._connect(db_path)
+            self.opened += 1
+            while len(self._handles) > self.capacity:
+                _, stale = self._handles.popitem(last=False)
+                self._close(stale)
+                self.evicted += 1
+            return conn
+
+    def discard(self, db_path: str):
+        """Close and forget db_path's handle, e.g. after a failed transaction."""
+        with self._lock:
+            conn = self._handles.pop(db_path, None)
+        if conn is not None:
+            self._close(conn)
+
+    def items(self) -> list:
+        """Snapshot of (path, handle) pairs, least recently used first."""
+        with self._lock:
+            return list(self._handles.items())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._handles), "capacity": self.capacity, "opened": self.opened, "evicted": self.evicted}
+
+
+def main_db_path() -> str:
+    """Path of the main database holding ADK sessions and usage rollups."""
+    # Imported lazily: database_tools imports this module for its connections
+    from business_agent.tools import database_tools
+    return database_tools.SESSIONS_DB.replace("sqlite:///", "")
+
+
+def shard_dir() -> str:
+    return SHARD_DIR or os.path.join(os.path.dirname(os.path.abspath(main_db_path())), "shards")
+
+
+def shard_name(user_id: str) -> str:
+    """Stable shard name for a user; the main database's name in single mode."""
+    if SHARD_MODE == "single":
+        return "main"
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+    if SHARD_MODE == "hash":
+        return f"shard_{int(digest[:8], 16) % SHARD_COUNT:03d}"
+    # Readable prefix plus a digest, so distinct IDs never share a file after sanitizing
+    return f"tenant_{_UNSAFE_FILENAME_PATTERN.sub('_', user_id)[:40]}_{digest[:8]}"
+
+
+def shard_path(user_id: str) -> str:
+    """Database file holding a user's business records, without migrating it."""
+    if SHARD_MODE == "single":
+        return main_db_path()
+    return os.path.join(shard_dir(), f"{shard_name(user_id)}.db")
+
+
+def _apply_schema(db_path: str, conn):
+    from business_agent import storage
+    from business_agent.tools import database_tools
+
+    is_main = db_path == main_db_path()
+    if SHARD_MODE == "single" or not is_main:
+        storage.create_tables(db_path)
+        database_tools.migrate_business_schema(conn.cursor())
+    if is_main:
+        database_tools.migrate_main_schema(conn.cursor())
+
+
+def migrate_database(db_path: str):
+    """Bring a database file's schema up to SCHEMA_VERSION once per process.
+
+    PRAGMA user_version records the version a file was last migrated to, so
+    a current file costs a single query and no DDL. Shards get the business
+    schema, the main database the usage rollups (and the business schema too
+    in single mode).
+    """
+    if db_path in _migrated:
+        return
+
+    from business_agent import storage
+    from business_agent.changes import prune_change_log
+    from business_agent.tools import database_tools
+    from business_agent.write_queue import prune_idempotency_keys
+
+    with _migration_lock:
+        if db_path in _migrated:
+            return
+        if SHARD_MODE != "single":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = storage.raw_connection(db_path)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != database_tools.SCHEMA_VERSION:
+                _apply_schema(db_path, conn)
+                conn.execute(f"PRAGMA user_version = {database_tools.SCHEMA_VERSION}")
+                print(f"🧱 Schema v{database_tools.SCHEMA_VERSION} applied to {db_path} (was v{version})")
+            if SHARD_MODE == "single" or db_path != main_db_path():
+                prune_idempotency_keys(conn.cursor())
+                prune_change_log(conn.cursor())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        _migrated.add(db_path)
+
+
+def db_path_for(user_id: str) -> str:
+    """Route a user to their shard's database file, migrating it on first use."""
+    db_path = shard_path(user_id)
+    migrate_database(db_path)
+    return db_path
+
+
+def list_shards() -> list:
+    """Paths of every shard database that exists so far."""
+    if SHARD_MODE == "single":
+        return [main_db_path()]
+    pattern = "tenant_*.db" if SHARD_MODE == "tenant" else "shard_*.db"
+    return sorted(glob.glob(os.path.join(shard_dir(), pattern)))
+
+
+def _query_shard(db_path: str, query: str, params: tuple) -> list:
+    from business_agent import storage
+
+    migrate_database(db_path)
+    conn = storage.read_connection(db_path, sqlite3.Row)
+    try:
+        return [dict(row) for row in conn.execute(query, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def fan_out(query: str, params: tuple = ()) -> list:
+    """Run a read query on every shard in parallel.
+
+    Returns:
+        List of (shard path, rows as dicts) pairs in shard order
+    """
+    shards = list_shards()
+    if len(shards) == 1:
+        return [(shards[0], _query_shard(shards[0], query, params))]
+    with ThreadPoolExecutor(max_workers=max(1, min(FAN_OUT_WORKERS, len(shards)))) as pool:
+        results = pool.map(lambda db_path: _query_shard(db_path, query, params), shards)
+        return list(zip(shards, results))
+
+
+def shard_summary() -> dict:
+    """Per-shard user and row counts for admin reports, with totals across shards."""
+    tables = ("user", "contact", "invoice", "revenue", "expense", "event", "interaction")
+    query = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table}) AS {table}" for table in tables)
+
+    shards = []
+    totals = dict.fromkeys(tables, 0)
+    for db_path, rows in fan_out(query):
+        counts = rows[0]
+        for table in tables:
+            totals[table] += counts[table]
+        shards.append({
+            "shard": os.path.splitext(os.path.basename(db_path))[0],
+            "path": db_path,
+            "size_bytes": os.path.getsize(db_path),
+            "counts": counts,
+        })
+
+    return {"mode": SHARD_MODE, "shard_count": len(shards), "totals": totals, "shards": shards}
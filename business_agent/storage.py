@@ -0,0 +1,237 @@
+"""Pooled SQLAlchemy Core storage backend for the business tables.
+
+models.py is the single source of truth for the business table schema:
+create_tables() builds it from the models' metadata. Only the simple
+statements are compiled from Core constructs (once, at import, into SQL
+with named parameters): the inserts, the per-user row listings, the invoice
+lookup and the mark-paid update. The reports, searches, updates and
+aggregates stay hand-written SQL in tools/database_tools.py and
+tools/analytics.py (window functions, FTS5, UPSERTs). Both kinds run on
+plain DBAPI cursors, so they share the group-commit writer and the pools.
+
+Connections come from one pooled engine per database file (per shard), so
+pool size, overflow and checkout timeout are tuned here with
+STORAGE_POOL_SIZE, STORAGE_MAX_OVERFLOW and STORAGE_POOL_TIMEOUT. An engine
+for ":memory:" shares a single connection, so the whole backend can be
+exercised against an in-memory SQLite database.
+
+Reports and analytics read through a second pool per file (read_connection):
+query_only connections with a larger page cache and memory-mapped I/O, each
+checkout reading from one snapshot. Database files run in WAL mode, so those
+long scans and the writers on the first pool no longer block each other.
+"""
+
+import os
+import sqlite3
+
+from sqlalchemy import bindparam, create_engine, event, insert, literal_column, select, update
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from business_agent.sharding import MAX_OPEN_SHARDS, HandleCache
+from models import Contact, Event, Expense, Interaction, Invoice, Revenue, User, db
+
+STORAGE_POOL_SIZE = int(os.getenv("STORAGE_POOL_SIZE", "5"))
+STORAGE_MAX_OVERFLOW = int(os.getenv("STORAGE_MAX_OVERFLOW", "10"))
+STORAGE_POOL_TIMEOUT = float(os.getenv("STORAGE_POOL_TIMEOUT", "30"))
+STORAGE_READ_POOL_SIZE = int(os.getenv("STORAGE_READ_POOL_SIZE", "8"))
+STORAGE_READ_MAX_OVERFLOW = int(os.getenv("STORAGE_READ_MAX_OVERFLOW", "16"))
+# Page cache per read connection, in KiB, and the memory-mapped window for reads
+READ_CACHE_KIB = int(os.getenv("READ_CACHE_KIB", "32768"))
+READ_MMAP_BYTES = int(os.getenv("READ_MMAP_MB", "256")) * 1024 * 1024
+
+metadata = db.metadata
+user = User.__table__
+contact = Contact.__table__
+invoice = Invoice.__table__
+revenue = Revenue.__table__
+expense = Expense.__table__
+event_table = Event.__table__
+interaction = Interaction.__table__
+
+_DIALECT = sqlite_dialect.dialect(paramstyle="named")
+
+
+def precompile(statement, columns: tuple = ()) -> str:
+    """Compile a Core statement to SQLite SQL with :name parameters.
+
+    For INSERTs, columns names the values to bind, each as a parameter of
+    the same name.
+    """
+    if columns:
+        return str(statement.compile(dialect=_DIALECT, column_keys=list(columns)))
+    return str(statement.compile(dialect=_DIALECT))
+
+
+def _user_rows(table):
+    return select(table).where(table.c.user_id == bindparam("user_id"))
+
+
+INSERT_USER = precompile(insert(user), ("id", "name", "email", "company", "phone"))
+INSERT_CONTACT = precompile(insert(contact), ("user_id", "name", "email", "phone", "company", "notes", "status"))
+INSERT_INVOICE = precompile(
+    insert(invoice), ("user_id", "contact_id", "issue_date", "due_date", "total_amount", "status", "notes")
+)
+INSERT_REVENUE = precompile(insert(revenue), ("invoice_id", "amount", "date"))
+INSERT_EXPENSE = precompile(insert(expense), ("user_id", "amount", "category", "description", "date"))
+INSERT_EVENT = precompile(insert(event_table), ("user_id", "contact_id", "title", "date", "description", "location"))
+INSERT_INTERACTION = precompile(insert(interaction), ("user_id", "contact_id", "date", "type", "summary"))
+
+SELECT_USER = precompile(select(user).where(user.c.id == bindparam("user_id")))
+SELECT_USER_CONTACTS = precompile(_user_rows(contact))
+SELECT_USER_INVOICES = precompile(_user_rows(invoice))
+SELECT_USER_EXPENSES = precompile(_user_rows(expense))
+SELECT_USER_EVENTS = precompile(_user_rows(event_table))
+SELECT_USER_INTERACTIONS = precompile(_user_rows(interaction))
+# Revenue has no user_id of its own and is scoped through its invoice
+SELECT_USER_REVENUE = precompile(
+    select(revenue)
+    .join(invoice, revenue.c.invoice_id == invoice.c.id)
+    .where(invoice.c.user_id == bindparam("user_id"))
+)
+SELECT_INVOICE_WITH_CONTACT = precompile(
+    select(invoice, contact.c.name.label("contact_name"), contact.c.company, contact.c.email)
+    .outerjoin(contact, invoice.c.contact_id == contact.c.id)
+    .where(invoice.c.id == bindparam("invoice_id"), invoice.c.user_id == bindparam("user_id"))
+)
+MARK_INVOICE_PAID = precompile(
+    update(invoice).where(invoice.c.id == bindparam("invoice_id")).values(status=literal_column("'paid'"))
+)
+
+
+def _create_engine(db_path: str, read_only: bool = False):
+    if db_path == ":memory:":
+        engine = create_engine(
+            "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+    else:
+        engine = create_engine(
+            f"sqlite:///{db_path}",
+            poolclass=QueuePool,
+            pool_size=STORAGE_READ_POOL_SIZE if read_only else STORAGE_POOL_SIZE,
+            max_overflow=STORAGE_READ_MAX_OVERFLOW if read_only else STORAGE_MAX_OVERFLOW,
+            pool_timeout=STORAGE_POOL_TIMEOUT,
+            connect_args={"check_same_thread": False},
+        )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if read_only:
+            dbapi_connection.execute("PRAGMA query_only = ON")
+            dbapi_connection.execute(f"PRAGMA cache_size = -{READ_CACHE_KIB}")
+            dbapi_connection.execute(f"PRAGMA mmap_size = {READ_MMAP_BYTES}")
+            return
+        dbapi_connection.execute("PRAGMA foreign_keys = ON")
+        # Takes effect only on a new, empty database; lets retention reclaim space in steps
+        dbapi_connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        if db_path != ":memory:":
+            try:
+                # Persistent per file: readers keep their snapshot while writers commit
+                dbapi_connection.execute("PRAGMA journal_mode = WAL")
+            except sqlite3.OperationalError as e:
+                # Switching needs a moment without other connections; the next connect retries
+                print(f"⚠️ WAL not enabled yet for {db_path}: {e}")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        # Undo per-checkout settings from raw_connection before the next borrower
+        if dbapi_connection is not None:
+            dbapi_connection.row_factory = None
+            dbapi_connection.isolation_level = ""
+
+    return engine
+
+
+# One engine (and pool) per database file, the least recently used disposed
+_engines = HandleCache(MAX_OPEN_SHARDS, _create_engine, close=lambda engine: engine.dispose())
+_read_engines = HandleCache(
+    MAX_OPEN_SHARDS, lambda db_path: _create_engine(db_path, read_only=True), close=lambda engine: engine.dispose()
+)
+
+
+def get_engine(db_path: str):
+    """Return the pooled engine for a database file."""
+    return _engines.get(db_path)
+
+
+def raw_connection(db_path: str, row_factory=None, autocommit: bool = False):
+    """Check out a pooled DBAPI connection to db_path; close() returns it to the pool.
+
+    Args:
+        db_path: Database file, as routed by sharding.db_path_for
+        row_factory: sqlite3 row factory for this checkout (e.g. sqlite3.Row)
+        autocommit: Leave transaction control to the caller (BEGIN/COMMIT)
+    """
+    conn = get_engine(db_path).raw_connection()
+    driver_connection = conn.driver_connection
+    driver_connection.row_factory = row_factory
+    if autocommit:
+        driver_connection.isolation_level = None
+    return conn
+
+
+def get_read_engine(db_path: str):
+    """Return the pooled read-only engine for a database file.
+
+    An in-memory database has a single shared connection, so its reads go
+    through the regular engine.
+    """
+    if db_path == ":memory:":
+        return get_engine(db_path)
+    return _read_engines.get(db_path)
+
+
+def read_connection(db_path: str, row_factory=None):
+    """Check out a query_only connection reading from one snapshot; close() ends it.
+
+    Every query until close() sees the database as of the first one, however
+    many writes commit meanwhile, so multi-query reports stay consistent.
+
+    Args:
+        db_path: Database file, as routed by sharding.db_path_for
+        row_factory: sqlite3 row factory for this checkout (e.g. sqlite3.Row)
+    """
+    conn = get_read_engine(db_path).raw_connection()
+    driver_connection = conn.driver_connection
+    driver_connection.row_factory = row_factory
+    if db_path != ":memory:":
+        driver_connection.isolation_level = None
+        driver_connection.execute("BEGIN")
+    return conn
+
+
+def renew_snapshot(conn):
+    """Move a read_connection on to a snapshot including everything committed since."""
+    driver_connection = conn.driver_connection
+    if driver_connection.isolation_level is None:
+        driver_connection.rollback()
+        driver_connection.execute("BEGIN")
+
+
+def create_tables(db_path: str):
+    """Create any missing business tables on db_path from the models."""
+    metadata.create_all(get_engine(db_path))
+
+
+def _pool_sizes(engines: HandleCache) -> dict:
+    sizes = {}
+    for db_path, engine in engines.items():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            sizes[db_path] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+            }
+    return sizes
+
+
+def pool_stats() -> dict:
+    """Open engines plus checked-out and idle connections per database file, for writes and reads."""
+    return {
+        "engines": _engines.stats(),
+        "pools": _pool_sizes(_engines),
+        "read_engines": _read_engines.stats(),
+        "read_pools": _pool_sizes(_read_engines),
+    }
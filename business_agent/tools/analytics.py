@@ -0,0 +1,697 @@
+"""Shared aggregation engine for the report and insight tools.
+
+All grouping and summing is pushed into SQLite (GROUP BY over indexed
+user_id columns) so reports never materialize per-row Python dicts just to
+total them; detail lists are capped (recent_rows). Every aggregate takes an
+open cursor and a user_id.
+"""
+
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+
+def _grouped(cursor, sql: str, params: tuple) -> dict:
+    """Run a two-column (key, value) aggregate and return it as a dict."""
+    cursor.execute(sql, params)
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def recent_rows(cursor, sql: str, params: tuple, limit: int) -> list:
+    """The first limit rows of an ORDER BY ... DESC query as dicts; needs a sqlite3.Row cursor.
+
+    Reports list only the most recent records next to their SQL aggregates,
+    so a report's size doesn't grow with the user's history.
+    """
+    cursor.execute(f"{sql} LIMIT ?", (*params, limit))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def expense_summary(cursor, user_id: str) -> dict:
+    """Total, count and per-category totals of a user's expenses, in one grouped pass."""
+    cursor.execute('''
+        SELECT category, COUNT(*), SUM(amount)
+        FROM expense
+        WHERE user_id = ?
+        GROUP BY category
+    ''', (user_id,))
+    rows = cursor.fetchall()
+
+    return {
+        "total": sum(row[2] for row in rows),
+        "count": sum(row[1] for row in rows),
+        "by_category": {row[0]: row[2] for row in rows},
+    }
+
+
+def invoice_summary(cursor, user_id: str) -> dict:
+    """Counts and amounts of a user's invoices, overall and per status."""
+    cursor.execute('''
+        SELECT status, COUNT(*), COALESCE(SUM(total_amount), 0)
+        FROM invoice
+        WHERE user_id = ?
+        GROUP BY status
+    ''', (user_id,))
+    rows = cursor.fetchall()
+
+    return {
+        "count": sum(row[1] for row in rows),
+        "total": sum(row[2] for row in rows),
+        "status_counts": {row[0]: row[1] for row in rows},
+        "status_amounts": {row[0]: row[2] for row in rows},
+    }
+
+
+def revenue_summary(cursor, user_id: str) -> dict:
+    """Total and count of revenue records for a user's invoices."""
+    cursor.execute('''
+        SELECT COUNT(*), COALESCE(SUM(r.amount), 0)
+        FROM revenue r
+        JOIN invoice i ON r.invoice_id = i.id
+        WHERE i.user_id = ?
+    ''', (user_id,))
+    count, total = cursor.fetchone()
+
+    return {"total": total, "count": count}
+
+
+def contact_status_counts(cursor, user_id: str) -> dict:
+    """Number of a user's contacts per status."""
+    return _grouped(cursor, '''
+        SELECT status, COUNT(*)
+        FROM contact
+        WHERE user_id = ?
+        GROUP BY status
+    ''', (user_id,))
+
+
+def interaction_type_counts(cursor, user_id: str) -> dict:
+    """Number of a user's interactions per type."""
+    return _grouped(cursor, '''
+        SELECT type, COUNT(*)
+        FROM interaction
+        WHERE user_id = ?
+        GROUP BY type
+    ''', (user_id,))
+
+
+# SQL expressions mapping an ISO date column to the start of its bucket
+PERIOD_BUCKETS = {
+    "day": "date({col})",
+    "week": "date({col}, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {col})",
+}
+
+
+def bucket_start(granularity: str, value):
+    """Start of the day/week (Monday)/month bucket containing a date."""
+    if granularity == "month":
+        return value.replace(day=1)
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    return value
+
+
+def bucket_starts(granularity: str, start, end) -> list:
+    """Every bucket start between two dates, used to gap-fill a series."""
+    current = bucket_start(granularity, start)
+    if granularity == "month":
+        step = relativedelta(months=1)
+    elif granularity == "week":
+        step = timedelta(weeks=1)
+    else:
+        step = timedelta(days=1)
+
+    starts = []
+    while current <= end:
+        starts.append(current.strftime("%Y-%m-%d"))
+        current += step
+    return starts
+
+
+def revenue_expense_series(cursor, user_id: str, granularity: str, start, end) -> list:
+    """Revenue, expenses and net profit per bucket, gap-filled with zeros.
+
+    Revenue and expenses are bucketed together in a single grouped pass.
+    """
+    bucket = PERIOD_BUCKETS[granularity].format(col="day")
+    start_text, end_text = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+    cursor.execute(f'''
+        SELECT {bucket} AS bucket, SUM(revenue), SUM(expenses)
+        FROM (
+            SELECT r.date AS day, r.amount AS revenue, 0 AS expenses
+            FROM revenue r
+            JOIN invoice i ON r.invoice_id = i.id
+            WHERE i.user_id = ? AND r.date BETWEEN ? AND ?
+            UNION ALL
+            SELECT e.date AS day, 0 AS revenue, e.amount AS expenses
+            FROM expense e
+            WHERE e.user_id = ? AND e.date BETWEEN ? AND ?
+        )
+        GROUP BY bucket
+    ''', (user_id, start_text, end_text, user_id, start_text, end_text))
+    totals = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+    series = []
+    for period in bucket_starts(granularity, start, end):
+        revenue, expenses = totals.get(period, (0, 0))
+        series.append({
+            "period": period,
+            "revenue": round(revenue, 2),
+            "expenses": round(expenses, 2),
+            "net_profit": round(revenue - expenses, 2),
+        })
+    return series
+
+
+# Invoice statuses that still count as money owed
+OPEN_INVOICE_STATUSES = ("unpaid", "overdue")
+
+# Aging buckets as (name, lowest days past due, highest days past due)
+AGING_BUCKETS = [
+    ("current", None, 0),
+    ("days_1_30", 1, 30),
+    ("days_31_60", 31, 60),
+    ("days_61_90", 61, 90),
+    ("days_over_90", 91, None),
+]
+
+
+def _aging_condition(low, high) -> str:
+    if low is None:
+        return f"days_past_due <= {high}"
+    if high is None:
+        return f"days_past_due >= {low}"
+    return f"days_past_due BETWEEN {low} AND {high}"
+
+
+def receivables_aging(cursor, user_id: str, as_of: str) -> list:
+    """Open invoice counts and amounts per aging bucket, per contact.
+
+    Computed in a single aggregation over the (user_id, status, due_date)
+    index. Invoices without a due date are treated as current.
+    """
+    bucket_columns = ",\n".join(
+        f"SUM(CASE WHEN {_aging_condition(low, high)} THEN 1 ELSE 0 END) AS {name}_count, "
+        f"ROUND(SUM(CASE WHEN {_aging_condition(low, high)} THEN total_amount ELSE 0 END), 2) AS {name}_amount"
+        for name, low, high in AGING_BUCKETS
+    )
+    placeholders = ", ".join("?" for _ in OPEN_INVOICE_STATUSES)
+
+    cursor.execute(f'''
+        SELECT a.contact_id, COALESCE(c.name, 'Unknown') AS contact_name, c.company,
+               COUNT(*) AS invoice_count, ROUND(SUM(total_amount), 2) AS total_outstanding,
+               MAX(days_past_due) AS oldest_days_past_due,
+               {bucket_columns}
+        FROM (
+            SELECT contact_id, total_amount,
+                   COALESCE(CAST(julianday(?) - julianday(due_date) AS INTEGER), 0) AS days_past_due
+            FROM invoice
+            WHERE user_id = ? AND status IN ({placeholders})
+        ) a
+        LEFT JOIN contact c ON a.contact_id = c.id
+        GROUP BY a.contact_id
+        ORDER BY total_outstanding DESC
+    ''', (as_of, user_id, *OPEN_INVOICE_STATUSES))
+
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def open_invoices_page(cursor, user_id: str, as_of: str, limit: int, offset: int, bucket: str = "") -> list:
+    """One page of open invoices, oldest due date first, with days past due."""
+    placeholders = ", ".join("?" for _ in OPEN_INVOICE_STATUSES)
+    condition = ""
+    for name, low, high in AGING_BUCKETS:
+        if name == bucket:
+            condition = f"WHERE {_aging_condition(low, high)}"
+
+    cursor.execute(f'''
+        SELECT * FROM (
+            SELECT i.id, i.contact_id, c.name AS contact_name, c.company, i.issue_date, i.due_date,
+                   i.total_amount, i.status, i.notes,
+                   COALESCE(CAST(julianday(?) - julianday(i.due_date) AS INTEGER), 0) AS days_past_due
+            FROM invoice i
+            LEFT JOIN contact c ON i.contact_id = c.id
+            WHERE i.user_id = ? AND i.status IN ({placeholders})
+        )
+        {condition}
+        ORDER BY due_date, id
+        LIMIT ? OFFSET ?
+    ''', (as_of, user_id, *OPEN_INVOICE_STATUSES, limit, offset))
+
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def payment_delays(cursor, user_id: str) -> tuple:
+    """Average days between due date and payment, per contact and overall.
+
+    Measured from paid invoices that have a revenue record. Positive values
+    mean the contact usually pays late.
+
+    Returns:
+        Tuple of ({contact_id: average delay in days}, overall average delay)
+    """
+    cursor.execute('''
+        SELECT i.contact_id, AVG(julianday(r.date) - julianday(i.due_date)), COUNT(*)
+        FROM invoice i
+        JOIN revenue r ON r.invoice_id = i.id
+        WHERE i.user_id = ? AND i.due_date IS NOT NULL AND i.due_date != ''
+        GROUP BY i.contact_id
+    ''', (user_id,))
+    rows = cursor.fetchall()
+
+    paid_count = sum(row[2] for row in rows)
+    overall = sum(row[1] * row[2] for row in rows) / paid_count if paid_count else 0.0
+    return {row[0]: row[1] for row in rows}, overall
+
+
+def open_invoice_amounts(cursor, user_id: str) -> list:
+    """(contact_id, due_date, total_amount) for every open invoice."""
+    placeholders = ", ".join("?" for _ in OPEN_INVOICE_STATUSES)
+    cursor.execute(f'''
+        SELECT contact_id, due_date, total_amount
+        FROM invoice
+        WHERE user_id = ? AND status IN ({placeholders})
+    ''', (user_id, *OPEN_INVOICE_STATUSES))
+    return cursor.fetchall()
+
+
+def monthly_category_expenses(cursor, user_id: str, since: str) -> list:
+    """Per category and month: total spend, number of expenses and average day of month."""
+    cursor.execute('''
+        SELECT category, strftime('%Y-%m', date) AS month, SUM(amount), COUNT(*),
+               AVG(CAST(strftime('%d', date) AS INTEGER))
+        FROM expense
+        WHERE user_id = ? AND date >= ?
+        GROUP BY category, month
+    ''', (user_id, since))
+    return cursor.fetchall()
+
+
+def period_bounds(period: str, today) -> tuple:
+    """Inclusive (start, end) ISO dates for a named reporting period.
+
+    Supports this_month, last_month, this_quarter, last_quarter, this_year,
+    last_year and all_time (also the fallback for unknown names).
+    """
+    period = (period or "all_time").strip().lower()
+    month_start = today.replace(day=1)
+    quarter_start = today.replace(month=3 * ((today.month - 1) // 3) + 1, day=1)
+    year_start = today.replace(month=1, day=1)
+
+    if period == "this_month":
+        start, end = month_start, month_start + relativedelta(months=1, days=-1)
+    elif period == "last_month":
+        start, end = month_start - relativedelta(months=1), month_start - timedelta(days=1)
+    elif period == "this_quarter":
+        start, end = quarter_start, quarter_start + relativedelta(months=3, days=-1)
+    elif period == "last_quarter":
+        start, end = quarter_start - relativedelta(months=3), quarter_start - timedelta(days=1)
+    elif period == "this_year":
+        start, end = year_start, year_start + relativedelta(years=1, days=-1)
+    elif period == "last_year":
+        start, end = year_start - relativedelta(years=1), year_start - timedelta(days=1)
+    else:
+        return "0000-01-01", "9999-12-31"
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def _ranked(cursor, sql: str, params: tuple) -> list:
+    cursor.execute(sql, params)
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def top_customers_by_revenue(cursor, user_id: str, start: str, end: str, limit: int) -> list:
+    """Top contacts by revenue received in a date range, with share of total."""
+    return _ranked(cursor, '''
+        SELECT i.contact_id, COALESCE(c.name, 'Unknown') AS name, c.company,
+               ROUND(SUM(r.amount), 2) AS total, COUNT(*) AS payments,
+               ROUND(100.0 * SUM(r.amount) / SUM(SUM(r.amount)) OVER (), 2) AS share_pct,
+               ROUND(SUM(SUM(r.amount)) OVER (), 2) AS grand_total
+        FROM revenue r
+        JOIN invoice i ON r.invoice_id = i.id
+        LEFT JOIN contact c ON i.contact_id = c.id
+        WHERE i.user_id = ? AND r.date BETWEEN ? AND ?
+        GROUP BY i.contact_id
+        ORDER BY total DESC
+        LIMIT ?
+    ''', (user_id, start, end, limit))
+
+
+def top_expense_categories(cursor, user_id: str, start: str, end: str, limit: int) -> list:
+    """Top expense categories by spend in a date range, with share of total."""
+    return _ranked(cursor, '''
+        SELECT category AS name, ROUND(SUM(amount), 2) AS total, COUNT(*) AS expenses,
+               ROUND(100.0 * SUM(amount) / SUM(SUM(amount)) OVER (), 2) AS share_pct,
+               ROUND(SUM(SUM(amount)) OVER (), 2) AS grand_total
+        FROM expense
+        WHERE user_id = ? AND date BETWEEN ? AND ?
+        GROUP BY category
+        ORDER BY total DESC
+        LIMIT ?
+    ''', (user_id, start, end, limit))
+
+
+def largest_open_invoices(cursor, user_id: str, start: str, end: str, limit: int) -> list:
+    """Largest open invoices issued in a date range, with share of total outstanding."""
+    placeholders = ", ".join("?" for _ in OPEN_INVOICE_STATUSES)
+    return _ranked(cursor, f'''
+        SELECT i.id AS invoice_id, i.contact_id, COALESCE(c.name, 'Unknown') AS name, c.company,
+               i.issue_date, i.due_date, i.status, ROUND(i.total_amount, 2) AS total,
+               ROUND(100.0 * i.total_amount / SUM(i.total_amount) OVER (), 2) AS share_pct,
+               ROUND(SUM(i.total_amount) OVER (), 2) AS grand_total
+        FROM invoice i
+        LEFT JOIN contact c ON i.contact_id = c.id
+        WHERE i.user_id = ? AND i.status IN ({placeholders})
+          AND COALESCE(i.issue_date, '') BETWEEN ? AND ?
+        ORDER BY i.total_amount DESC
+        LIMIT ?
+    ''', (user_id, *OPEN_INVOICE_STATUSES, start if start != "0000-01-01" else "", end, limit))
+
+
+# Incremental insight totals. Each source keeps per-user (key -> count, amount)
+# running totals plus a watermark: the highest rowid already folded in and the
+# last change-log entry applied. Triggers created by initialize_business_database
+# log updates and deletes of already-folded rows (and inserts that reuse a rowid
+# at or below the watermark) into insight_change_log, so totals stay exact.
+# Rows above the watermark, and users who never asked for insights, are not
+# logged: the next refresh reads those rows from the tables as they are.
+INSIGHT_SOURCES = {
+    "invoice": {
+        "key": "{row}.status",
+        "amount": "{row}.total_amount",
+        "user": "{row}.user_id",
+        "watched": "status, total_amount",
+        "new_rows": '''
+            SELECT status, COUNT(*), SUM(total_amount), MAX(id)
+            FROM invoice WHERE user_id = ? AND id > ?
+            GROUP BY status
+        ''',
+    },
+    "expense": {
+        "key": "{row}.category",
+        "amount": "{row}.amount",
+        "user": "{row}.user_id",
+        "watched": "category, amount",
+        "new_rows": '''
+            SELECT category, COUNT(*), SUM(amount), MAX(id)
+            FROM expense WHERE user_id = ? AND id > ?
+            GROUP BY category
+        ''',
+    },
+    "revenue": {
+        "key": "''",
+        "amount": "{row}.amount",
+        "user": "(SELECT user_id FROM invoice WHERE id = {row}.invoice_id)",
+        "watched": "amount",
+        "new_rows": '''
+            SELECT '', COUNT(*), SUM(r.amount), MAX(r.id)
+            FROM revenue r JOIN invoice i ON r.invoice_id = i.id
+            WHERE i.user_id = ? AND r.id > ?
+            GROUP BY 1
+        ''',
+    },
+}
+
+
+def insight_trigger_statements() -> list:
+    """(Re)CREATE TRIGGER statements feeding insight_change_log for every source.
+
+    Ends with a cleanup of logged entries the current guards would skip.
+    """
+    statements = []
+    for source, spec in INSIGHT_SOURCES.items():
+        old = {name: spec[name].format(row="OLD") for name in ("key", "amount", "user")}
+        new = {name: spec[name].format(row="NEW") for name in ("key", "amount", "user")}
+        log = "INSERT INTO insight_change_log (user_id, source, row_id, old_key, old_amount, new_key, new_amount)"
+
+        def folded(row: str, user: str) -> str:
+            # The row is at or below its user's watermark, i.e. already in their totals
+            return (f"{row}.id <= COALESCE((SELECT last_rowid FROM insight_watermark "
+                    f"WHERE user_id = {user} AND source = '{source}'), 0)")
+
+        for operation in ("insert", "update", "delete"):
+            statements.append(f"DROP TRIGGER IF EXISTS trg_{source}_insight_{operation}")
+        statements.append(f'''
+            CREATE TRIGGER trg_{source}_insight_insert AFTER INSERT ON {source}
+            WHEN {folded("NEW", new["user"])}
+            BEGIN
+                {log} VALUES ({new["user"]}, '{source}', NEW.id, NULL, NULL, {new["key"]}, {new["amount"]});
+            END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER trg_{source}_insight_update AFTER UPDATE OF {spec["watched"]} ON {source}
+            WHEN ({old["key"]} IS NOT {new["key"]} OR {old["amount"]} IS NOT {new["amount"]})
+                 AND {folded("OLD", old["user"])}
+            BEGIN
+                {log} VALUES ({new["user"]}, '{source}', NEW.id, {old["key"]}, {old["amount"]}, {new["key"]}, {new["amount"]});
+            END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER trg_{source}_insight_delete AFTER DELETE ON {source}
+            WHEN {folded("OLD", old["user"])}
+            BEGIN
+                {log} VALUES ({old["user"]}, '{source}', OLD.id, {old["key"]}, {old["amount"]}, NULL, NULL);
+            END
+        ''')
+    # Entries the guards above would not have logged are never applied; drop them
+    statements.append('''
+        DELETE FROM insight_change_log
+        WHERE NOT EXISTS (
+            SELECT 1 FROM insight_watermark w
+            WHERE w.user_id = insight_change_log.user_id AND w.source = insight_change_log.source
+              AND insight_change_log.row_id <= w.last_rowid
+        )
+    ''')
+    return statements
+
+
+def refresh_insight_totals(cursor, user_id: str) -> dict:
+    """Fold rows added or changed since the user's watermark into their running totals.
+
+    Run it as one write (write_queue.run_write) so concurrent writers cannot
+    slip rows in between reading the change log and advancing the watermark.
+
+    Returns:
+        {source: {key: (count, amount)}} for invoice, expense and revenue
+    """
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM insight_change_log WHERE user_id = ?", (user_id,))
+    last_change = cursor.fetchone()[0]
+
+    for source, spec in INSIGHT_SOURCES.items():
+        cursor.execute(
+            "SELECT last_rowid, last_change_id FROM insight_watermark WHERE user_id = ? AND source = ?",
+            (user_id, source),
+        )
+        last_rowid, applied_change = cursor.fetchone() or (0, 0)
+
+        deltas = {}
+        # Changes to rows above the watermark are picked up with the new rows below
+        cursor.execute('''
+            SELECT old_key, old_amount, new_key, new_amount
+            FROM insight_change_log
+            WHERE user_id = ? AND source = ? AND id > ? AND id <= ? AND row_id <= ?
+            ORDER BY id
+        ''', (user_id, source, applied_change, last_change, last_rowid))
+        for old_key, old_amount, new_key, new_amount in cursor.fetchall():
+            if old_key is not None:
+                delta = deltas.setdefault(old_key, [0, 0.0])
+                delta[0] -= 1
+                delta[1] -= old_amount
+            if new_key is not None:
+                delta = deltas.setdefault(new_key, [0, 0.0])
+                delta[0] += 1
+                delta[1] += new_amount
+
+        cursor.execute(spec["new_rows"], (user_id, last_rowid))
+        for key, count, amount, max_id in cursor.fetchall():
+            delta = deltas.setdefault(key, [0, 0.0])
+            delta[0] += count
+            delta[1] += amount or 0
+            last_rowid = max(last_rowid, max_id)
+
+        for key, (count, amount) in deltas.items():
+            cursor.execute('''
+                INSERT INTO insight_totals (user_id, source, key, count, amount)
+                VALUES (?, ?, ?, ?, ROUND(?, 6))
+                ON CONFLICT (user_id, source, key) DO UPDATE SET
+                    count = count + excluded.count,
+                    amount = ROUND(amount + excluded.amount, 6)
+            ''', (user_id, source, key, count, amount))
+
+        cursor.execute('''
+            INSERT INTO insight_watermark (user_id, source, last_rowid, last_change_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, source) DO UPDATE SET
+                last_rowid = excluded.last_rowid,
+                last_change_id = excluded.last_change_id
+        ''', (user_id, source, last_rowid, last_change))
+
+    cursor.execute("DELETE FROM insight_totals WHERE user_id = ? AND count <= 0", (user_id,))
+    cursor.execute("DELETE FROM insight_change_log WHERE user_id = ? AND id <= ?", (user_id, last_change))
+
+    cursor.execute("SELECT source, key, count, amount FROM insight_totals WHERE user_id = ?", (user_id,))
+    totals = {source: {} for source in INSIGHT_SOURCES}
+    for source, key, count, amount in cursor.fetchall():
+        totals[source][key] = (count, amount)
+    return totals
+
+
+# Per-category expense statistics. expense_category_stats holds Welford running
+# (count, mean, M2) per user and category, kept current by triggers on expense
+# whichever code path writes it, so a new expense is scored and folded in with
+# O(1) work; rebuild_expense_stats backfills them set-wise from history.
+_STATS_ADD = '''
+    INSERT INTO expense_category_stats (user_id, category, count, mean, m2, last_expense_id)
+    VALUES ({row}.user_id, {row}.category, 1, {row}.amount, 0, {row}.id)
+    ON CONFLICT (user_id, category) DO UPDATE SET
+        count = count + 1,
+        mean = mean + (excluded.mean - mean) / (count + 1.0),
+        m2 = m2 + (excluded.mean - mean) * (excluded.mean - mean - (excluded.mean - mean) / (count + 1.0)),
+        last_expense_id = MAX(last_expense_id, excluded.last_expense_id);
+'''
+# Welford's update in reverse, as remove_from_stats
+_STATS_REMOVE = '''
+    UPDATE expense_category_stats SET
+        count = MAX(count - 1, 0),
+        mean = CASE WHEN count <= 1 THEN 0 ELSE (count * mean - {row}.amount) / (count - 1.0) END,
+        m2 = CASE WHEN count <= 1 THEN 0
+                  ELSE MAX(m2 - ({row}.amount - mean) * ({row}.amount - (count * mean - {row}.amount) / (count - 1.0)), 0) END
+    WHERE user_id = {row}.user_id AND category = {row}.category;
+'''
+
+
+def expense_stats_trigger_statements() -> list:
+    """(Re)CREATE TRIGGER statements folding every expense insert, update and delete into its statistics."""
+    statements = [f"DROP TRIGGER IF EXISTS trg_expense_stats_{operation}" for operation in ("insert", "update", "delete")]
+    statements.append(f'''
+        CREATE TRIGGER trg_expense_stats_insert AFTER INSERT ON expense
+        BEGIN
+            {_STATS_ADD.format(row="NEW")}
+        END
+    ''')
+    statements.append(f'''
+        CREATE TRIGGER trg_expense_stats_update AFTER UPDATE OF user_id, category, amount ON expense
+        WHEN OLD.user_id IS NOT NEW.user_id OR OLD.category IS NOT NEW.category OR OLD.amount IS NOT NEW.amount
+        BEGIN
+            {_STATS_REMOVE.format(row="OLD")}
+            {_STATS_ADD.format(row="NEW")}
+        END
+    ''')
+    statements.append(f'''
+        CREATE TRIGGER trg_expense_stats_delete AFTER DELETE ON expense
+        BEGIN
+            {_STATS_REMOVE.format(row="OLD")}
+        END
+    ''')
+    return statements
+
+
+def rebuild_expense_stats(cursor, user_id: str = "", category: str = ""):
+    """Recompute category statistics from the expense table in one pass.
+
+    Limited to one user (and optionally one category) when given; rebuilds
+    every user's statistics otherwise.
+    """
+    conditions, params = [], []
+    if user_id:
+        conditions.append("user_id = ?")
+        params.append(user_id)
+    if category:
+        conditions.append("category = ?")
+        params.append(category)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor.execute(f"DELETE FROM expense_category_stats {where}", params)
+    cursor.execute(f'''
+        INSERT INTO expense_category_stats (user_id, category, count, mean, m2, last_expense_id)
+        SELECT e.user_id, e.category, COUNT(*), a.mean,
+               SUM((e.amount - a.mean) * (e.amount - a.mean)), MAX(e.id)
+        FROM expense e
+        JOIN (
+            SELECT user_id, category, AVG(amount) AS mean
+            FROM expense {where}
+            GROUP BY user_id, category
+        ) a ON a.user_id = e.user_id AND a.category = e.category
+        GROUP BY e.user_id, e.category
+    ''', params)
+
+
+def expense_category_stats(cursor, user_id: str, category: str) -> tuple:
+    """(count, mean, m2) for a user's category; zeros when it has no expenses yet."""
+    cursor.execute(
+        "SELECT count, mean, m2 FROM expense_category_stats WHERE user_id = ? AND category = ?", (user_id, category)
+    )
+    return cursor.fetchone() or (0, 0.0, 0.0)
+
+
+def unscored_categories(cursor, user_id: str, since: str) -> list:
+    """Categories with expenses since a date but no statistics row, e.g. after a manual cleanup."""
+    cursor.execute('''
+        SELECT DISTINCT e.category
+        FROM expense e
+        WHERE e.user_id = ? AND e.date >= ?
+          AND NOT EXISTS (
+              SELECT 1 FROM expense_category_stats s WHERE s.user_id = e.user_id AND s.category = e.category
+          )
+    ''', (user_id, since))
+    return [category for (category,) in cursor.fetchall()]
+
+
+def remove_from_stats(amount: float, stats: tuple) -> tuple:
+    """Take one expense back out of a category's (count, mean, m2); Welford's update in reverse."""
+    count, mean, m2 = stats
+    if count <= 1:
+        return (0, 0.0, 0.0)
+    mean_without = (count * mean - amount) / (count - 1)
+    m2_without = m2 - (amount - mean) * (amount - mean_without)
+    return (count - 1, mean_without, max(m2_without, 0.0))
+
+
+def score_expense(amount: float, stats: tuple, min_history: int) -> dict:
+    """z-score and multiple-of-mean of an amount against a category's statistics.
+
+    Returns None when the category has fewer than min_history expenses.
+    """
+    count, mean, m2 = stats
+    if count < min_history or mean <= 0:
+        return None
+    # Floor the spread so perfectly regular categories don't flag on cents
+    std = max((m2 / (count - 1)) ** 0.5, mean * 0.05)
+    return {
+        "z_score": round((amount - mean) / std, 2),
+        "ratio_to_mean": round(amount / mean, 2),
+        "category_mean": round(mean, 2),
+        "category_std": round(std, 2),
+        "history_count": count,
+    }
+
+
+def scored_expenses(cursor, user_id: str, since: str, min_history: int) -> list:
+    """Score every expense since a date against the rest of its category's statistics.
+
+    Each expense is left out of the statistics it is scored against, as
+    create_expense scores a new one against the history before it; an
+    outlier folded into its own mean and spread would otherwise hide itself.
+    """
+    cursor.execute('''
+        SELECT e.id, e.date, e.category, e.description, e.amount, s.count, s.mean, s.m2, s.last_expense_id
+        FROM expense e
+        JOIN expense_category_stats s ON s.user_id = e.user_id AND s.category = e.category
+        WHERE e.user_id = ? AND e.date >= ?
+    ''', (user_id, since))
+
+    scored = []
+    for expense_id, date, category, description, amount, count, mean, m2, last_expense_id in cursor.fetchall():
+        stats = (count, mean, m2)
+        if expense_id <= last_expense_id:
+            stats = remove_from_stats(amount, stats)
+        score = score_expense(amount, stats, min_history)
+        if score:
+            scored.append(dict(score, expense_id=expense_id, date=date, category=category,
+                               description=description, amount=amount))
+    return scored
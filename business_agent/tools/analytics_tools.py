@@ -0,0 +1,656 @@
+from google.adk.tools import ToolContext
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import accumulate
+from dateutil.relativedelta import relativedelta
+
+from business_agent import sharding, storage
+from business_agent.changes import latest_change_seq
+from business_agent.tools import analytics
+from business_agent.tools import database_tools
+from business_agent.write_queue import run_write
+
+# Maximum number of buckets a single time series may return
+MAX_SERIES_BUCKETS = 1000
+
+# Default look-back window per granularity when no start date is given
+DEFAULT_SERIES_WINDOWS = {
+    "day": relativedelta(days=29),
+    "week": relativedelta(weeks=11),
+    "month": relativedelta(months=11),
+}
+
+# Series and forecasts cached per shape of request, least recently used
+# evicted first
+MAX_CACHED_SERIES = 256
+
+# Months of complete expense history used to detect recurring spend, and how
+# many of them a category must appear in to be projected forward
+RECURRING_LOOKBACK_MONTHS = 6
+RECURRING_MIN_MONTHS = 3
+MAX_FORECAST_DAYS = 365
+
+# A category is flagged when this month's spend is this multiple of its usual month
+ELEVATED_MONTHLY_RATIO = 2.0
+
+
+
+class ResultCache:
+    """Bounded LRU of tool results, each stored with the version it was computed at.
+
+    The version is the user's newest change_log sequence number, so a write
+    committed by any process (API worker, import script, archiver) invalidates
+    the entry, and dashboards polling an unchanged range stay cheap.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Return the result cached for key at version, or None."""
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is None or cached[0] != version:
+                return None
+            self._results.move_to_end(key)
+            return cached[1]
+
+    def put(self, key, version, result):
+        with self._lock:
+            self._results[key] = (version, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.capacity:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+
+_series_cache = ResultCache(MAX_CACHED_SERIES)
+_forecast_cache = ResultCache(MAX_CACHED_SERIES)
+
+
+# TIME SERIES TOOLS
+def get_financial_timeseries(granularity: str, start_date: str, end_date: str, tool_context: ToolContext) -> dict:
+    """Get revenue, expenses and net profit per day, week or month over a date range.
+
+    Args:
+        granularity: Bucket size (day, week, month)
+        start_date: First date of the range (YYYY-MM-DD format), empty for a default window
+        end_date: Last date of the range (YYYY-MM-DD format), empty for today
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing a gap-filled series of revenue, expenses and net profit
+    """
+    print(f"--- Tool: get_financial_timeseries called for: {granularity} ({start_date} to {end_date}) ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    return compute_financial_timeseries(user_id, granularity, start_date, end_date)
+
+
+def compute_financial_timeseries(user_id: str, granularity: str, start_date: str, end_date: str) -> dict:
+    """Compute (or serve from cache) the get_financial_timeseries result for a user."""
+    granularity = (granularity or "month").strip().lower()
+    if granularity not in analytics.PERIOD_BUCKETS:
+        return {
+            "action": "get_financial_timeseries",
+            "status": "error",
+            "error": f"Unknown granularity: {granularity}",
+            "message": "Granularity must be one of: day, week, month"
+        }
+
+    try:
+        end = datetime.strptime(end_date.strip(), "%Y-%m-%d") if end_date and end_date.strip() else datetime.now()
+        end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+        if start_date and start_date.strip():
+            start = datetime.strptime(start_date.strip(), "%Y-%m-%d")
+        else:
+            start = end - DEFAULT_SERIES_WINDOWS[granularity]
+    except ValueError as e:
+        return {
+            "action": "get_financial_timeseries",
+            "status": "error",
+            "error": str(e),
+            "message": "Dates must be in YYYY-MM-DD format"
+        }
+
+    if start > end:
+        start, end = end, start
+    # Align to a bucket boundary so the first bucket is not partial
+    start = analytics.bucket_start(granularity, start)
+
+    if granularity == "month":
+        buckets = (end.year - start.year) * 12 + end.month - start.month + 1
+    elif granularity == "week":
+        buckets = (end - start).days // 7 + 2
+    else:
+        buckets = (end - start).days + 1
+    if buckets > MAX_SERIES_BUCKETS:
+        return {
+            "action": "get_financial_timeseries",
+            "status": "error",
+            "error": f"Range produces more than {MAX_SERIES_BUCKETS} {granularity} buckets",
+            "message": "Please use a shorter date range or a coarser granularity"
+        }
+
+    # Today is part of the key: an open-ended range ends on a new day tomorrow
+    cache_key = (user_id, granularity, start.date(), end.date(), datetime.now().date())
+    db_path = sharding.db_path_for(user_id)
+    conn = None
+
+    try:
+        conn = storage.read_connection(db_path)
+        cursor = conn.cursor()
+        version = latest_change_seq(cursor, user_id)
+        cached = _series_cache.get(cache_key, version)
+        if cached is not None:
+            return cached
+
+        series = analytics.revenue_expense_series(cursor, user_id, granularity, start, end)
+
+        total_revenue = round(sum(point["revenue"] for point in series), 2)
+        total_expenses = round(sum(point["expenses"] for point in series), 2)
+
+        result = {
+            "action": "get_financial_timeseries",
+            "status": "success",
+            "granularity": granularity,
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": end.strftime("%Y-%m-%d"),
+            "points": len(series),
+            "series": series,
+            "totals": {
+                "revenue": total_revenue,
+                "expenses": total_expenses,
+                "net_profit": round(total_revenue - total_expenses, 2),
+            },
+            "message": f"Generated {len(series)} {granularity} buckets from {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}"
+        }
+        _series_cache.put(cache_key, version, result)
+        return result
+
+    except Exception as e:
+        return {
+            "action": "get_financial_timeseries",
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to generate financial time series"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+
+# RECEIVABLES TOOLS
+def get_ar_aging(tool_context: ToolContext) -> dict:
+    """Get an accounts-receivable aging report of open invoices, bucketed by contact.
+
+    Args:
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing per-contact and total counts and amounts in the
+        current, 1-30, 31-60, 61-90 and over-90 days past due buckets
+    """
+    print("--- Tool: get_ar_aging called ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    db_path = sharding.db_path_for(user_id)
+    as_of = datetime.now().strftime("%Y-%m-%d")
+    conn = None
+
+    try:
+        conn = storage.read_connection(db_path)
+        cursor = conn.cursor()
+        contacts = analytics.receivables_aging(cursor, user_id, as_of)
+
+        totals = {"invoice_count": 0, "total_outstanding": 0.0}
+        for name, _, _ in analytics.AGING_BUCKETS:
+            totals[f"{name}_count"] = sum(row[f"{name}_count"] for row in contacts)
+            totals[f"{name}_amount"] = round(sum(row[f"{name}_amount"] for row in contacts), 2)
+        totals["invoice_count"] = sum(row["invoice_count"] for row in contacts)
+        totals["total_outstanding"] = round(sum(row["total_outstanding"] for row in contacts), 2)
+        overdue_amount = round(totals["total_outstanding"] - totals["current_amount"], 2)
+
+        return {
+            "action": "get_ar_aging",
+            "status": "success",
+            "as_of": as_of,
+            "totals": totals,
+            "overdue_amount": overdue_amount,
+            "contacts_count": len(contacts),
+            "contacts": contacts,
+            "message": f"${totals['total_outstanding']:,.2f} outstanding across {totals['invoice_count']} invoices, ${overdue_amount:,.2f} overdue"
+        }
+
+    except Exception as e:
+        return {
+            "action": "get_ar_aging",
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to generate accounts-receivable aging report"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+
+def list_open_invoices(page: int, page_size: int, aging_bucket: str, tool_context: ToolContext) -> dict:
+    """List open (unpaid or overdue) invoices one page at a time, oldest due date first.
+
+    Args:
+        page: Page number starting at 1
+        page_size: Invoices per page (maximum 100)
+        aging_bucket: Only include one bucket (current, days_1_30, days_31_60, days_61_90, days_over_90), empty for all
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing one page of open invoices with days past due
+    """
+    print(f"--- Tool: list_open_invoices called for page {page} ({aging_bucket or 'all buckets'}) ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    db_path = sharding.db_path_for(user_id)
+    as_of = datetime.now().strftime("%Y-%m-%d")
+
+    page = max(1, page or 1)
+    page_size = min(100, max(1, page_size or 25))
+    aging_bucket = (aging_bucket or "").strip().lower()
+    if aging_bucket and aging_bucket not in [name for name, _, _ in analytics.AGING_BUCKETS]:
+        return {
+            "action": "list_open_invoices",
+            "status": "error",
+            "error": f"Unknown aging bucket: {aging_bucket}",
+            "message": "Aging bucket must be one of: current, days_1_30, days_31_60, days_61_90, days_over_90"
+        }
+
+    conn = None
+    try:
+        conn = storage.read_connection(db_path)
+        cursor = conn.cursor()
+        # Fetch one extra row to know whether another page follows
+        invoices = analytics.open_invoices_page(
+            cursor, user_id, as_of, page_size + 1, (page - 1) * page_size, aging_bucket
+        )
+        has_more = len(invoices) > page_size
+        invoices = invoices[:page_size]
+
+        return {
+            "action": "list_open_invoices",
+            "status": "success",
+            "page": page,
+            "page_size": page_size,
+            "aging_bucket": aging_bucket or "all",
+            "has_more": has_more,
+            "invoices_count": len(invoices),
+            "invoices": invoices,
+            "message": f"Page {page}: {len(invoices)} open invoices" + (" (more available)" if has_more else "")
+        }
+
+    except Exception as e:
+        return {
+            "action": "list_open_invoices",
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to list open invoices"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+
+# FORECASTING TOOLS
+def forecast_cash_flow(horizon_days: int, granularity: str, starting_balance: float, tool_context: ToolContext) -> dict:
+    """Project cash in and out over the coming days from receivables and recurring expenses.
+
+    Args:
+        horizon_days: Number of days to project (maximum 365, 90 if 0)
+        granularity: Projection buckets (day, week)
+        starting_balance: Current cash balance to project from, 0 to show net change only
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing the projected inflows, outflows and running balance
+    """
+    print(f"--- Tool: forecast_cash_flow called for {horizon_days} days ({granularity}) ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    return compute_cash_flow_forecast(user_id, horizon_days, granularity, starting_balance)
+
+
+def compute_cash_flow_forecast(user_id: str, horizon_days: int, granularity: str, starting_balance: float) -> dict:
+    """Compute (or serve from cache) the forecast_cash_flow result for a user.
+
+    Open invoices are expected on their due date shifted by the contact's
+    average historical payment delay (or the user-wide average for contacts
+    without history); overdue invoices are expected today. Categories that
+    appear in at least RECURRING_MIN_MONTHS of the last RECURRING_LOOKBACK_MONTHS
+    complete months are projected at their average monthly amount on their
+    usual day of the month.
+    """
+    horizon_days = min(MAX_FORECAST_DAYS, max(1, int(horizon_days or 90)))
+    granularity = (granularity or "week").strip().lower()
+    starting_balance = float(starting_balance or 0)
+    if granularity not in ("day", "week"):
+        return {
+            "action": "forecast_cash_flow",
+            "status": "error",
+            "error": f"Unknown granularity: {granularity}",
+            "message": "Granularity must be one of: day, week"
+        }
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    cache_key = (user_id, horizon_days, granularity, starting_balance, today)
+    db_path = sharding.db_path_for(user_id)
+    conn = None
+
+    try:
+        conn = storage.read_connection(db_path)
+        cursor = conn.cursor()
+        version = latest_change_seq(cursor, user_id)
+        cached = _forecast_cache.get(cache_key, version)
+        if cached is not None:
+            return cached
+
+        delays, overall_delay = analytics.payment_delays(cursor, user_id)
+        open_invoices = analytics.open_invoice_amounts(cursor, user_id)
+        since = (today.replace(day=1) - relativedelta(months=RECURRING_LOOKBACK_MONTHS)).strftime("%Y-%m-%d")
+        monthly_expenses = analytics.monthly_category_expenses(cursor, user_id, since)
+    except Exception as e:
+        return {
+            "action": "forecast_cash_flow",
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to load data for the cash-flow forecast"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+    # Day-indexed inflow/outflow arrays over the horizon; at most
+    # MAX_FORECAST_DAYS entries, so plain lists and a running sum are enough
+    # and the backend stays free of numpy
+    inflows = [0.0] * horizon_days
+    outflows = [0.0] * horizon_days
+    receivables_beyond_horizon = 0.0
+
+    for contact_id, due_date, amount in open_invoices:
+        try:
+            due = datetime.strptime((due_date or "")[:10], "%Y-%m-%d")
+        except ValueError:
+            due = today
+        expected = due + timedelta(days=round(delays.get(contact_id, overall_delay)))
+        offset = max(0, (expected - today).days)
+        if offset < horizon_days:
+            inflows[offset] += amount
+        else:
+            receivables_beyond_horizon += amount
+
+    recurring = _detect_recurring_expenses(monthly_expenses, today)
+    for item in recurring:
+        month = today.replace(day=1)
+        while (month - today).days < horizon_days:
+            # Skip this month's charge if it has already been paid
+            if not (month.month == today.month and month.year == today.year and item["paid_this_month"]):
+                day = min(item["day_of_month"], calendar.monthrange(month.year, month.month)[1])
+                offset = (month.replace(day=day) - today).days
+                if 0 <= offset < horizon_days:
+                    outflows[offset] += item["monthly_amount"]
+            month += relativedelta(months=1)
+
+    net = [inflow - outflow for inflow, outflow in zip(inflows, outflows)]
+    balances = list(accumulate(net, initial=starting_balance))[1:]
+
+    step = 7 if granularity == "week" else 1
+    projection = []
+    for start in range(0, horizon_days, step):
+        end = min(start + step, horizon_days)
+        projection.append({
+            "period": (today + timedelta(days=start)).strftime("%Y-%m-%d"),
+            "inflows": round(sum(inflows[start:end]), 2),
+            "outflows": round(sum(outflows[start:end]), 2),
+            "net": round(sum(net[start:end]), 2),
+            "balance": round(balances[end - 1], 2),
+        })
+
+    lowest_index = min(range(horizon_days), key=balances.__getitem__)
+    ending_balance = round(balances[-1], 2)
+    result = {
+        "action": "forecast_cash_flow",
+        "status": "success",
+        "as_of": today.strftime("%Y-%m-%d"),
+        "horizon_days": horizon_days,
+        "granularity": granularity,
+        "starting_balance": starting_balance,
+        "summary": {
+            "expected_inflows": round(sum(inflows), 2),
+            "projected_outflows": round(sum(outflows), 2),
+            "ending_balance": ending_balance,
+            "lowest_balance": round(balances[lowest_index], 2),
+            "lowest_balance_date": (today + timedelta(days=lowest_index)).strftime("%Y-%m-%d"),
+            "receivables_beyond_horizon": round(receivables_beyond_horizon, 2),
+        },
+        "recurring_expenses": recurring,
+        "average_payment_delay_days": round(overall_delay, 1),
+        "projection": projection,
+        "message": f"Projected balance in {horizon_days} days: ${ending_balance:,.2f}"
+    }
+
+    _forecast_cache.put(cache_key, version, result)
+    return result
+
+
+def _detect_recurring_expenses(monthly_expenses: list, today: datetime) -> list:
+    """Pick out categories that recur across complete months of expense history."""
+    current_month = today.strftime("%Y-%m")
+    by_category = {}
+    for category, month, total, count, average_day in monthly_expenses:
+        entry = by_category.setdefault(category, {"months": 0, "total": 0.0, "day_sum": 0.0, "paid_this_month": False})
+        if month == current_month:
+            entry["paid_this_month"] = True
+            continue
+        entry["months"] += 1
+        entry["total"] += total
+        entry["day_sum"] += average_day
+
+    recurring = []
+    for category, entry in by_category.items():
+        if entry["months"] >= RECURRING_MIN_MONTHS:
+            recurring.append({
+                "category": category,
+                "monthly_amount": round(entry["total"] / entry["months"], 2),
+                "day_of_month": max(1, round(entry["day_sum"] / entry["months"])),
+                "months_seen": entry["months"],
+                "paid_this_month": entry["paid_this_month"],
+            })
+    return sorted(recurring, key=lambda item: item["monthly_amount"], reverse=True)
+
+
+# RANKING TOOLS
+RANKINGS = {
+    "customers": analytics.top_customers_by_revenue,
+    "expense_categories": analytics.top_expense_categories,
+    "open_invoices": analytics.largest_open_invoices,
+}
+
+
+def get_top_rankings(ranking_type: str, limit: int, period: str, tool_context: ToolContext) -> dict:
+    """Get the top N customers by revenue, expense categories by spend, or largest open invoices.
+
+    Args:
+        ranking_type: What to rank (customers, expense_categories, open_invoices)
+        limit: Number of rows to return (maximum 50, 5 if 0)
+        period: Time period (this_month, last_month, this_quarter, last_quarter, this_year, last_year, all_time)
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing the top N rows with totals and share of the overall total
+    """
+    print(f"--- Tool: get_top_rankings called for: {ranking_type} (top {limit}, {period}) ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    ranking_type = (ranking_type or "").strip().lower()
+    limit = min(50, max(1, int(limit or 5)))
+
+    if ranking_type not in RANKINGS:
+        return {
+            "action": "get_top_rankings",
+            "status": "error",
+            "error": f"Unknown ranking type: {ranking_type}",
+            "message": f"Ranking type must be one of: {', '.join(RANKINGS)}"
+        }
+
+    start, end = analytics.period_bounds(period, datetime.now())
+    db_path = sharding.db_path_for(user_id)
+    conn = None
+
+    try:
+        conn = storage.read_connection(db_path)
+        cursor = conn.cursor()
+        rows = RANKINGS[ranking_type](cursor, user_id, start, end, limit)
+
+        grand_total = rows[0]["grand_total"] if rows else 0
+        for row in rows:
+            del row["grand_total"]
+        top_total = round(sum(row["total"] for row in rows), 2)
+
+        return {
+            "action": "get_top_rankings",
+            "status": "success",
+            "ranking_type": ranking_type,
+            "period": period or "all_time",
+            "limit": limit,
+            "grand_total": grand_total,
+            "top_total": top_total,
+            "top_share_pct": round(100 * top_total / grand_total, 2) if grand_total else 0,
+            "rankings": rows,
+            "message": f"Top {len(rows)} {ranking_type.replace('_', ' ')} account for ${top_total:,.2f} of ${grand_total:,.2f}"
+        }
+
+    except Exception as e:
+        return {
+            "action": "get_top_rankings",
+            "status": "error",
+            "error": str(e),
+            "message": f"Failed to rank {ranking_type}"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+
+# ANOMALY TOOLS
+def detect_expense_anomalies(lookback_days: int, tool_context: ToolContext) -> dict:
+    """Find unusual expenses and categories whose spending this month is well above normal.
+
+    Args:
+        lookback_days: How many days of recent expenses to scan (maximum 365, 30 if 0)
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing unusually large expenses and categories running above their usual monthly level
+    """
+    print(f"--- Tool: detect_expense_anomalies called for the last {lookback_days} days ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    lookback_days = min(365, max(1, int(lookback_days or 30)))
+    today = datetime.now()
+    since = (today - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+    db_path = sharding.db_path_for(user_id)
+    conn = None
+
+    try:
+        conn = storage.read_connection(db_path)
+        cursor = conn.cursor()
+
+        # Triggers keep the statistics current; a category whose row went missing is
+        # rebuilt through the writer lane, then read from a snapshot that includes it
+        missing = analytics.unscored_categories(cursor, user_id, since)
+        if missing:
+            def rebuild(write_cursor):
+                for category in missing:
+                    analytics.rebuild_expense_stats(write_cursor, user_id, category)
+            run_write(db_path, rebuild)
+            storage.renew_snapshot(conn)
+
+        unusual_expenses = sorted(
+            (expense for expense in analytics.scored_expenses(cursor, user_id, since, database_tools.ANOMALY_MIN_HISTORY)
+             if expense["z_score"] >= database_tools.ANOMALY_Z_THRESHOLD),
+            key=lambda expense: expense["z_score"],
+            reverse=True,
+        )
+
+        month_start = today.replace(day=1)
+        history_start = (month_start - relativedelta(months=RECURRING_LOOKBACK_MONTHS)).strftime("%Y-%m-%d")
+        monthly = analytics.monthly_category_expenses(cursor, user_id, history_start)
+    except Exception as e:
+        return {
+            "action": "detect_expense_anomalies",
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to detect expense anomalies"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+    elevated_categories = _elevated_categories(monthly, today)
+
+    alerts = [
+        f"{item['category']} spend is {item['ratio_to_usual']}x its usual monthly level "
+        f"(${item['this_month']:,.2f} vs ${item['usual_monthly']:,.2f})"
+        for item in elevated_categories
+    ] + [
+        f"{expense['category']} expense of ${expense['amount']:,.2f} on {expense['date']} is "
+        f"{expense['ratio_to_mean']}x the usual ${expense['category_mean']:,.2f}"
+        for expense in unusual_expenses
+    ]
+
+    return {
+        "action": "detect_expense_anomalies",
+        "status": "success",
+        "lookback_days": lookback_days,
+        "unusual_expenses": unusual_expenses,
+        "elevated_categories": elevated_categories,
+        "alerts": alerts,
+        "message": f"Found {len(alerts)} spending anomalies" if alerts else "No unusual spending found"
+    }
+
+
+def _elevated_categories(monthly_expenses: list, today: datetime) -> list:
+    """Categories whose spend so far this month is at least ELEVATED_MONTHLY_RATIO times their usual month."""
+    current_month = today.strftime("%Y-%m")
+    by_category = {}
+    for category, month, total, count, average_day in monthly_expenses:
+        entry = by_category.setdefault(category, {"months": 0, "total": 0.0, "this_month": 0.0})
+        if month == current_month:
+            entry["this_month"] = total
+        else:
+            entry["months"] += 1
+            entry["total"] += total
+
+    elevated = []
+    for category, entry in by_category.items():
+        if entry["months"] < RECURRING_MIN_MONTHS or not entry["this_month"]:
+            continue
+        # Average over the whole look-back window so sporadic categories aren't overstated
+        usual = entry["total"] / RECURRING_LOOKBACK_MONTHS
+        if usual > 0 and entry["this_month"] >= ELEVATED_MONTHLY_RATIO * usual:
+            elevated.append({
+                "category": category,
+                "this_month": round(entry["this_month"], 2),
+                "usual_monthly": round(usual, 2),
+                "ratio_to_usual": round(entry["this_month"] / usual, 1),
+                "months_of_history": entry["months"],
+            })
+
+    return sorted(elevated, key=lambda item: item["ratio_to_usual"], reverse=True)
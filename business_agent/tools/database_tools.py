@@ -3,121 +3,264 @@ import sqlite3
 from datetime import datetime
 from dateutil import parser as date_parser
 from dateutil.relativedelta import relativedelta
+from functools import lru_cache
+import hashlib
+import json
 import re
 
+from business_agent import sharding, storage
+from business_agent.changes import change_log_statements, notify_changes
+from business_agent.contact_resolution import resolve_contact_name
+from business_agent.prefetch import take_prefetched
+from business_agent.write_queue import run_write
+from business_agent.tools import analytics
+
 SESSIONS_DB = "sqlite:///./business_agent.db"
+SAMPLE_USER_ID = "huzaifa_ejaz"
+
+# Stored in each database's PRAGMA user_version once migrated. Bump it with
+# every change to models.py, migrate_business_schema or migrate_main_schema,
+# or existing files will skip the new DDL.
+SCHEMA_VERSION = 4
+
+# An expense is flagged as unusual when it is this many standard deviations
+# above its category's mean, once the category has enough history
+ANOMALY_Z_THRESHOLD = 3.0
+ANOMALY_MIN_HISTORY = 5
+
+# Reports total everything in SQL but list only this many of the most recent records
+REPORT_DETAIL_ROWS = 50
+
+def session_service_url() -> str:
+    """SESSIONS_DB as a URL for ADK's DatabaseSessionService, which needs the async SQLite driver."""
+    return SESSIONS_DB.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+
+# Per-user data versions, bumped by every write tool so cached reads can tell
+# whether they are still current (prefetch, forecasts, contact resolution)
+_data_versions = {}
+# Version of every user not in _data_versions; only ever grows, so a version
+# a cache has seen is never handed out again
+_version_floor = 0
+
+def get_data_version(user_id: str) -> int:
+    """Return the current data version for a user's business records."""
+    return _data_versions.get(user_id, _version_floor)
+
+def bump_data_version(user_id: str):
+    """Mark a user's business records as changed, invalidating cached reads."""
+    _data_versions[user_id] = _data_versions.get(user_id, _version_floor) + 1
+    # Every caller has committed by now, so long polls on /changes can pick the write up
+    notify_changes(user_id)
+
+def bump_all_data_versions():
+    """Move every user past any data version seen so far, e.g. after a restore replaced the databases."""
+    global _version_floor
+    _version_floor = max([_version_floor, *_data_versions.values()]) + 1
+    _data_versions.clear()
+
+def _create_search_index(cursor):
+    """Create FTS5 indexes over contacts and interaction summaries, synced by triggers."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('contact_fts', 'interaction_fts')")
+    existing = {row[0] for row in cursor.fetchall()}
+    
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS contact_fts USING fts5(
+            name, company, email, notes,
+            content='contact', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS interaction_fts USING fts5(
+            summary,
+            content='interaction', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    
+    for table, columns in (("contact", ("name", "company", "email", "notes")), ("interaction", ("summary",))):
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        insert_new = f"INSERT INTO {table}_fts (rowid, {column_list}) VALUES (new.id, {new_values});"
+        delete_old = f"INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+        
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table} BEGIN {insert_new} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table} BEGIN {delete_old} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update AFTER UPDATE OF {column_list} ON {table} BEGIN {delete_old} {insert_new} END")
+        
+        if f"{table}_fts" not in existing:
+            # Index rows written before the search tables existed
+            cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+def _idempotency_key(tool_context: ToolContext, tool_name: str, arguments: dict) -> str:
+    """Derive a write's idempotency key from its invocation, tool and arguments.
+    
+    A replay of the same function call (same invocation and function call ID)
+    gets the same key, while two distinct calls with identical arguments stay
+    separate writes. Contexts without an invocation ID (direct API calls) are
+    not deduplicated.
+    """
+    invocation_id = getattr(tool_context, "invocation_id", None)
+    if not invocation_id:
+        return ""
+    
+    user_id = tool_context.state.get("user_id", "demo_user")
+    function_call_id = getattr(tool_context, "function_call_id", None)
+    payload = json.dumps([user_id, invocation_id, function_call_id, tool_name, arguments], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _ensure_user(cursor, user_id: str):
+    """Create a minimal user row for user_id if it doesn't exist yet."""
+    cursor.execute("SELECT id FROM user WHERE id = ?", (user_id,))
+    if not cursor.fetchone():
+        print(f"User {user_id} doesn't exist, creating user entry...")
+        cursor.execute(storage.INSERT_USER, {
+            "id": user_id,
+            "name": user_id.replace('_', ' ').title(),
+            "email": f"{user_id}@example.com",
+            "company": "Unknown Company",
+            "phone": "000-000-0000",
+        })
+        print(f"Created user entry for {user_id}")
+
+def migrate_business_schema(cursor):
+    """Create or upgrade the indexes, triggers and derived tables on one shard.
+    
+    The business tables themselves are created from models.py by
+    storage.create_tables, which sharding.migrate_database runs first.
+    """
+    # Indexes for the per-user aggregations in tools/analytics.py
+    cursor.execute("DROP INDEX IF EXISTS idx_invoice_user_status")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_user_status_due ON invoice (user_id, status, due_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_expense_user_category ON expense (user_id, category)")
+    # Covering indexes so revenue/expense rankings aggregate without touching the tables
+    cursor.execute("DROP INDEX IF EXISTS idx_revenue_invoice")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_revenue_invoice_date ON revenue (invoice_id, date, amount)")
+    cursor.execute("DROP INDEX IF EXISTS idx_expense_user_date")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_expense_user_date_category ON expense (user_id, date, category, amount)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contact_user_status ON contact (user_id, status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interaction_user_type ON interaction (user_id, type)")
+    
+    # Running insight totals folded in incrementally (see analytics.refresh_insight_totals)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS insight_totals (
+            user_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, source, key)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS insight_watermark (
+            user_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            last_rowid INTEGER NOT NULL DEFAULT 0,
+            last_change_id INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, source)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS insight_change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            source TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            old_key TEXT,
+            old_amount REAL,
+            new_key TEXT,
+            new_amount REAL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_insight_change_user ON insight_change_log (user_id, source, id)")
+    for statement in analytics.insight_trigger_statements():
+        cursor.execute(statement)
+    
+    # Append-only change feed for incremental sync (see business_agent/changes.py)
+    for statement in change_log_statements():
+        cursor.execute(statement)
+    
+    # Full-text search over contacts and interaction summaries (see tools/search_tools.py)
+    try:
+        _create_search_index(cursor)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Full-text search unavailable, falling back to LIKE matching: {e}")
+    
+    # Results of idempotent writes, keyed by sha256 of invocation + tool + arguments
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS idempotency_key (
+            key TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_created ON idempotency_key (created_at)")
+    
+    # Running per-category expense statistics for anomaly scoring
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS expense_category_stats (
+            user_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            mean REAL NOT NULL DEFAULT 0,
+            m2 REAL NOT NULL DEFAULT 0,
+            last_expense_id INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, category)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_expense_stats_insert')")
+    maintained = cursor.fetchone()[0]
+    for statement in analytics.expense_stats_trigger_statements():
+        cursor.execute(statement)
+    if not maintained:
+        # Statistics were only updated by create_expense before; recompute them all in one pass
+        analytics.rebuild_expense_stats(cursor)
+
+def migrate_main_schema(cursor):
+    """Create the tables that live only in the main database."""
+    # Per-user daily rollup of model/tool usage (see business_agent/usage.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            user_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            requests INTEGER NOT NULL DEFAULT 0,
+            model_calls INTEGER NOT NULL DEFAULT 0,
+            prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            response_tokens INTEGER NOT NULL DEFAULT 0,
+            tool_calls INTEGER NOT NULL DEFAULT 0,
+            tool_ms REAL NOT NULL DEFAULT 0,
+            latency_ms REAL NOT NULL DEFAULT 0,
+            refused INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+    ''')
 
 def initialize_business_database():
-    """Initialize business tables in the same database and populate with sample data."""
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    """Initialize business tables on the sample user's shard and populate with sample data.
     
-    conn = sqlite3.connect(db_path)
+    Databases already at SCHEMA_VERSION skip the DDL; see sharding.migrate_database.
+    """
+    try:
+        sharding.migrate_database(SESSIONS_DB.replace("sqlite:///", ""))
+    except Exception as e:
+        print(f"❌ Error initializing main database: {e}")
+    
+    try:
+        db_path = sharding.db_path_for(SAMPLE_USER_ID)
+    except Exception as e:
+        print(f"❌ Error initializing business database: {e}")
+        return
+    
+    conn = storage.raw_connection(db_path)
     cursor = conn.cursor()
     
     try:
         # Enable foreign key constraints
         cursor.execute("PRAGMA foreign_keys = ON")
         
-        # Create user table first (referenced by other tables)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                email TEXT,
-                company TEXT,
-                phone TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create business tables with proper foreign key constraints
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contact (
-                id INTEGER PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                name TEXT NOT NULL,
-                email TEXT,
-                company TEXT,
-                phone TEXT,
-                notes TEXT,
-                status TEXT DEFAULT 'lead',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS invoice (
-                id INTEGER PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                contact_id INTEGER,
-                issue_date TEXT,
-                due_date TEXT,
-                total_amount REAL NOT NULL,
-                status TEXT NOT NULL,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user (id),
-                FOREIGN KEY (contact_id) REFERENCES contact (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS revenue (
-                id INTEGER PRIMARY KEY,
-                invoice_id INTEGER,
-                amount REAL NOT NULL,
-                date TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (invoice_id) REFERENCES invoice (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expense (
-                id INTEGER PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                description TEXT,
-                date TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS event (
-                id INTEGER PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                contact_id INTEGER,
-                title TEXT NOT NULL,
-                date TEXT NOT NULL,
-                description TEXT,
-                location TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user (id),
-                FOREIGN KEY (contact_id) REFERENCES contact (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interaction (
-                id INTEGER PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                contact_id INTEGER,
-                date TEXT NOT NULL,
-                type TEXT NOT NULL,
-                summary TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user (id),
-                FOREIGN KEY (contact_id) REFERENCES contact (id)
-            )
-        ''')
-        
         # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM user")
-        if cursor.fetchone()[0] == 0:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM user)")
+        if not cursor.fetchone()[0]:
             # Insert sample user first
             cursor.execute('''
                 INSERT INTO user (id, name, email, company, phone)
@@ -205,42 +348,38 @@ def initialize_business_database():
 def get_business_data_from_db(user_id='demo_user'):
     """Fetch business data from database for a specific user."""
     print(f"--- get_business_data_from_db called with user_id: {user_id} ---")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    db_path = sharding.db_path_for(user_id)
+    conn = storage.read_connection(db_path, sqlite3.Row)
     cursor = conn.cursor()
     
     try:
-        # Enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
         # Fetch user info
-        cursor.execute("SELECT * FROM user WHERE id = ?", (user_id,))
+        cursor.execute(storage.SELECT_USER, {"user_id": user_id})
         user_row = cursor.fetchone()
         user = dict(user_row) if user_row else None
         
         # Fetch contacts
-        cursor.execute("SELECT * FROM contact WHERE user_id = ?", (user_id,))
+        cursor.execute(storage.SELECT_USER_CONTACTS, {"user_id": user_id})
         contacts = [dict(row) for row in cursor.fetchall()]
         
         # Fetch invoices
-        cursor.execute("SELECT * FROM invoice WHERE user_id = ?", (user_id,))
+        cursor.execute(storage.SELECT_USER_INVOICES, {"user_id": user_id})
         invoices = [dict(row) for row in cursor.fetchall()]
         
         # Fetch expenses
-        cursor.execute("SELECT * FROM expense WHERE user_id = ?", (user_id,))
+        cursor.execute(storage.SELECT_USER_EXPENSES, {"user_id": user_id})
         expenses = [dict(row) for row in cursor.fetchall()]
         
         # Fetch events
-        cursor.execute("SELECT * FROM event WHERE user_id = ?", (user_id,))
+        cursor.execute(storage.SELECT_USER_EVENTS, {"user_id": user_id})
         events = [dict(row) for row in cursor.fetchall()]
         
         # Fetch interactions
-        cursor.execute("SELECT * FROM interaction WHERE user_id = ?", (user_id,))
+        cursor.execute(storage.SELECT_USER_INTERACTIONS, {"user_id": user_id})
         interactions = [dict(row) for row in cursor.fetchall()]
         
-        # Fetch revenue
-        cursor.execute("SELECT * FROM revenue")
+        # Fetch revenue (scoped through the invoice; revenue has no user_id)
+        cursor.execute(storage.SELECT_USER_REVENUE, {"user_id": user_id})
         revenue = [dict(row) for row in cursor.fetchall()]
         
         return {
@@ -271,16 +410,59 @@ def get_business_insights(tool_context: ToolContext) -> dict:
     print("--- Tool: get_business_insights called ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    business_data = get_business_data_from_db(user_id)
+    
+    # Use the speculative prefetch started alongside the model call, if any
+    prefetched = take_prefetched(user_id, "get_business_insights")
+    if prefetched is not None:
+        return prefetched
+    
+    return compute_business_insights(user_id)
+
+def compute_business_insights(user_id: str) -> dict:
+    """Compute the get_business_insights result for a user.
+    
+    Folding new rows into the running totals writes, so unlike the other
+    reports the refresh goes through the write queue; the fallback
+    recomputation only reads.
+    """
+    db_path = sharding.db_path_for(user_id)
+    conn = None
+    
+    try:
+        totals = run_write(db_path, lambda cursor: analytics.refresh_insight_totals(cursor, user_id))
+        invoices = {
+            "count": sum(count for count, _ in totals["invoice"].values()),
+            "status_counts": {status: count for status, (count, _) in totals["invoice"].items()},
+            "status_amounts": {status: amount for status, (_, amount) in totals["invoice"].items()},
+        }
+        expenses = {"total": sum(amount for _, amount in totals["expense"].values())}
+        payments_received = sum(amount for _, amount in totals["revenue"].values())
+    except Exception as e:
+        # Fall back to a full recomputation if the running totals can't be refreshed
+        print(f"⚠️ Incremental insights unavailable, recomputing: {e}")
+        try:
+            conn = storage.read_connection(db_path)
+            cursor = conn.cursor()
+            invoices = analytics.invoice_summary(cursor, user_id)
+            expenses = analytics.expense_summary(cursor, user_id)
+            payments_received = analytics.revenue_summary(cursor, user_id)["total"]
+        except Exception as e:
+            print(f"❌ Error computing business insights: {e}")
+            invoices = {"count": 0, "status_counts": {}, "status_amounts": {}}
+            expenses = {"total": 0}
+            payments_received = 0
+    finally:
+        if conn:
+            conn.close()
     
     # Calculate key metrics
-    total_invoices = len(business_data["invoices"])
-    paid_invoices = [inv for inv in business_data["invoices"] if inv["status"] == "paid"]
-    unpaid_invoices = [inv for inv in business_data["invoices"] if inv["status"] == "unpaid"]
+    total_invoices = invoices["count"]
+    paid_invoices_count = invoices["status_counts"].get("paid", 0)
+    unpaid_invoices_count = invoices["status_counts"].get("unpaid", 0)
     
-    total_revenue = sum(inv["total_amount"] for inv in paid_invoices)
-    outstanding_amount = sum(inv["total_amount"] for inv in unpaid_invoices)
-    total_expenses = sum(exp["amount"] for exp in business_data["expenses"])
+    total_revenue = invoices["status_amounts"].get("paid", 0)
+    outstanding_amount = invoices["status_amounts"].get("unpaid", 0)
+    total_expenses = expenses["total"]
     
     profit = total_revenue - total_expenses
     profit_margin = (profit / total_revenue * 100) if total_revenue > 0 else 0
@@ -299,7 +481,7 @@ def get_business_insights(tool_context: ToolContext) -> dict:
     else:
         insights.append("ℹ️ No revenue recorded yet. Focus on securing your first paid invoice.")
         
-    if len(unpaid_invoices) > len(paid_invoices):
+    if unpaid_invoices_count > paid_invoices_count:
         insights.append("🔔 You have more unpaid than paid invoices. It's time to focus on collections.")
     
     if not insights:
@@ -312,11 +494,12 @@ def get_business_insights(tool_context: ToolContext) -> dict:
             "total_revenue": f"${total_revenue:,.2f}",
             "outstanding_amount": f"${outstanding_amount:,.2f}",
             "total_expenses": f"${total_expenses:,.2f}",
+            "payments_received": f"${payments_received:,.2f}",
             "profit": f"${profit:,.2f}",
             "profit_margin": f"{profit_margin:.2f}%",
             "total_invoices": total_invoices,
-            "paid_invoices_count": len(paid_invoices),
-            "unpaid_invoices_count": len(unpaid_invoices)
+            "paid_invoices_count": paid_invoices_count,
+            "unpaid_invoices_count": unpaid_invoices_count
         },
         "insights": insights,
         "recommendations": [
@@ -346,45 +529,28 @@ def create_contact(name: str, tool_context: ToolContext, email: str, phone: str,
     print(f"--- Tool: create_contact called for: {name} at {company} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
+    idempotency_key = _idempotency_key(tool_context, "create_contact", {"name": name, "email": email, "phone": phone, "company": company, "notes": notes, "status": status})
     print(f"--- Using user_id: {user_id} ---")
     print(f"--- Tool context state: {tool_context.state} ---")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     # Validate status
     valid_statuses = ['lead', 'prospect', 'client', 'inactive']
     if status.lower() not in valid_statuses:
         status = 'lead'
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
+    def write(cursor):
+        _ensure_user(cursor, user_id)
         
-        # Check if user exists, if not create them
-        cursor.execute("SELECT id FROM user WHERE id = ?", (user_id,))
-        user_exists = cursor.fetchone()
-        
-        if not user_exists:
-            print(f"User {user_id} doesn't exist, creating user entry...")
-            # Create user entry with minimal required information
-            cursor.execute('''
-                INSERT INTO user (id, name, email, company, phone)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, user_id.replace('_', ' ').title(), f"{user_id}@example.com", "Unknown Company", "000-000-0000"))
-            print(f"Created user entry for {user_id}")
-        
-        cursor.execute('''
-            INSERT INTO contact (user_id, name, email, phone, company, notes, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, name, email, phone, company, notes, status.lower()))
-        
-        contact_id = cursor.lastrowid
-        conn.commit()
+        cursor.execute(storage.INSERT_CONTACT, {
+            "user_id": user_id, "name": name, "email": email, "phone": phone,
+            "company": company, "notes": notes, "status": status.lower(),
+        })
         
         return {
             "action": "create_contact",
             "status": "success",
-            "contact_id": contact_id,
+            "contact_id": cursor.lastrowid,
             "name": name,
             "email": email,
             "company": company,
@@ -393,19 +559,20 @@ def create_contact(name: str, tool_context: ToolContext, email: str, phone: str,
             "contact_status": status.lower(),
             "message": f"Successfully added contact: {name}" + (f" from {company}" if company else "")
         }
-        
+    
+    try:
+        result = run_write(db_path, write, idempotency_key)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "create_contact",
             "status": "error",
             "error": str(e),
             "message": f"Failed to add contact: {name}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success" and not result.get("deduplicated"):
+        bump_data_version(user_id)
+    return result
 
 def read_all_contacts(tool_context: ToolContext) -> dict:
     """Get a list of all contacts for the current user.
@@ -433,6 +600,74 @@ def read_all_contacts(tool_context: ToolContext) -> dict:
         "message": f"Retrieved {len(contacts)} contacts"
     }
 
+def resolve_contact(contact_name: str, tool_context: ToolContext) -> dict:
+    """Find a contact's ID from their name, company or email, tolerating partial names and typos.
+
+    Args:
+        contact_name: Name, company or email to look up, e.g. "Sarah from Design Studio"
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing the matched contact, or the closest candidates if the match is ambiguous
+    """
+    print(f"--- Tool: resolve_contact called for: {contact_name} ---")
+    
+    user_id = tool_context.state.get("user_id", "demo_user")
+    
+    try:
+        resolution = resolve_contact_name(user_id, contact_name)
+    except Exception as e:
+        return {
+            "action": "resolve_contact",
+            "status": "error",
+            "error": str(e),
+            "message": f"Failed to resolve contact: {contact_name}"
+        }
+    
+    if not resolution["contact"]:
+        return _unresolved_contact("resolve_contact", contact_name, resolution["candidates"])
+    
+    contact = resolution["contact"]
+    return {
+        "action": "resolve_contact",
+        "status": "success",
+        "contact_id": contact["id"],
+        "contact": contact,
+        "message": f"'{contact_name}' is {contact['name']} (ID {contact['id']})"
+    }
+
+def _unresolved_contact(action: str, contact_name: str, candidates: list) -> dict:
+    """Error result for a contact name that matched nobody, or more than one contact."""
+    if candidates:
+        names = ", ".join(f"{candidate['name']} (ID {candidate['id']})" for candidate in candidates)
+        message = f"'{contact_name}' is ambiguous - did you mean: {names}?"
+    else:
+        message = f"No contact matches '{contact_name}'"
+    
+    return {
+        "action": action,
+        "status": "error",
+        "error": f"Could not resolve contact: {contact_name}",
+        "candidates": candidates,
+        "message": message
+    }
+
+def _contact_id_from_name(user_id: str, contact_id: int, contact_name: str, action: str) -> tuple:
+    """Resolve contact_name to an ID when no contact_id was given.
+    
+    Returns:
+        Tuple of (contact_id, error result or None)
+    """
+    if contact_id or not contact_name or not contact_name.strip():
+        return contact_id, None
+    
+    resolution = resolve_contact_name(user_id, contact_name)
+    if not resolution["contact"]:
+        return contact_id, _unresolved_contact(action, contact_name, resolution["candidates"])
+    
+    print(f"--- {action}: resolved '{contact_name}' to contact_id {resolution['contact']['id']} ---")
+    return resolution["contact"]["id"], None
+
 def update_contact(contact_id: int, tool_context: ToolContext, name: str, email: str, phone: str,
                   company: str, notes: str, status: str) -> dict:
     """Update an existing contact.
@@ -452,13 +687,9 @@ def update_contact(contact_id: int, tool_context: ToolContext, name: str, email:
     print(f"--- Tool: update_contact called for contact_id: {contact_id} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
+    def write(cursor):
         # Check if contact exists
         cursor.execute("SELECT * FROM contact WHERE id = ? AND user_id = ?", (contact_id, user_id))
         contact = cursor.fetchone()
@@ -505,14 +736,13 @@ def update_contact(contact_id: int, tool_context: ToolContext, name: str, email:
         
         update_values.extend([contact_id, user_id])
         update_query = f"UPDATE contact SET {', '.join(update_fields)} WHERE id = ? AND user_id = ?"
-        
         cursor.execute(update_query, update_values)
-        conn.commit()
         
         # Fetch updated contact
         cursor.execute("SELECT * FROM contact WHERE id = ? AND user_id = ?", (contact_id, user_id))
         updated_row = cursor.fetchone()
-        updated_contact = dict(updated_row) if updated_row else {}
+        columns = [description[0] for description in cursor.description]
+        updated_contact = dict(zip(columns, updated_row)) if updated_row else {}
         
         return {
             "action": "update_contact",
@@ -521,33 +751,35 @@ def update_contact(contact_id: int, tool_context: ToolContext, name: str, email:
             "updated_contact": updated_contact,
             "message": f"Successfully updated contact: {updated_contact.get('name', 'Unknown')}"
         }
-        
+    
+    try:
+        result = run_write(db_path, write)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "update_contact",
             "status": "error",
             "error": str(e),
             "message": f"Failed to update contact {contact_id}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success":
+        bump_data_version(user_id)
+    return result
 
 
 # INVOICE TOOLS
 def create_invoice(contact_id: int, tool_context: ToolContext, issue_date: str, due_date: str, 
-                  total_amount: float, status: str, notes: str) -> dict:
+                  total_amount: float, status: str, notes: str, contact_name: str) -> dict:
     """Create a new invoice for a contact.
 
     Args:
-        contact_id: ID of the contact this invoice is for
+        contact_id: ID of the contact this invoice is for (0 to look the contact up by contact_name)
         issue_date: Invoice issue date (YYYY-MM-DD format)
         due_date: Invoice due date (YYYY-MM-DD format)
         total_amount: Invoice total amount
         status: Invoice status (unpaid, paid, overdue, cancelled)
         notes: Additional notes for the invoice
+        contact_name: Contact name, company or email, used when contact_id is 0
         tool_context: Context for accessing session state
 
     Returns:
@@ -556,7 +788,8 @@ def create_invoice(contact_id: int, tool_context: ToolContext, issue_date: str,
     print(f"--- Tool: create_invoice called for contact_id: {contact_id}, amount: ${total_amount} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    idempotency_key = _idempotency_key(tool_context, "create_invoice", {"contact_id": contact_id, "issue_date": issue_date, "due_date": due_date, "total_amount": total_amount, "status": status, "notes": notes, "contact_name": contact_name})
+    db_path = sharding.db_path_for(user_id)
     
     # Set default dates
     if not issue_date or not issue_date.strip():
@@ -569,22 +802,8 @@ def create_invoice(contact_id: int, tool_context: ToolContext, issue_date: str,
     if status.lower() not in valid_statuses:
         status = 'unpaid'
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Check if user exists, if not create them
-        cursor.execute("SELECT id FROM user WHERE id = ?", (user_id,))
-        user_exists = cursor.fetchone()
-        
-        if not user_exists:
-            print(f"User {user_id} doesn't exist, creating user entry...")
-            cursor.execute('''
-                INSERT INTO user (id, name, email, company, phone)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, user_id.replace('_', ' ').title(), f"{user_id}@example.com", "Unknown Company", "000-000-0000"))
-            print(f"Created user entry for {user_id}")
+    def write(cursor):
+        _ensure_user(cursor, user_id)
         
         # Verify contact exists
         cursor.execute("SELECT name, company FROM contact WHERE id = ? AND user_id = ?", (contact_id, user_id))
@@ -598,18 +817,15 @@ def create_invoice(contact_id: int, tool_context: ToolContext, issue_date: str,
                 "message": f"Contact {contact_id} not found"
             }
         
-        cursor.execute('''
-            INSERT INTO invoice (user_id, contact_id, issue_date, due_date, total_amount, status, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, contact_id, issue_date, due_date, total_amount, status.lower(), notes))
-        
-        invoice_id = cursor.lastrowid
-        conn.commit()
+        cursor.execute(storage.INSERT_INVOICE, {
+            "user_id": user_id, "contact_id": contact_id, "issue_date": issue_date, "due_date": due_date,
+            "total_amount": total_amount, "status": status.lower(), "notes": notes,
+        })
         
         return {
             "action": "create_invoice",
             "status": "success",
-            "invoice_id": invoice_id,
+            "invoice_id": cursor.lastrowid,
             "contact_id": contact_id,
             "contact_name": contact_info[0],
             "company": contact_info[1],
@@ -620,19 +836,23 @@ def create_invoice(contact_id: int, tool_context: ToolContext, issue_date: str,
             "notes": notes,
             "message": f"Successfully created ${total_amount} invoice for {contact_info[0]}"
         }
-        
+    
+    try:
+        contact_id, error = _contact_id_from_name(user_id, contact_id, contact_name, "create_invoice")
+        if error:
+            return error
+        result = run_write(db_path, write, idempotency_key)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "create_invoice",
             "status": "error",
             "error": str(e),
             "message": f"Failed to create invoice for contact {contact_id}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success" and not result.get("deduplicated"):
+        bump_data_version(user_id)
+    return result
 
 def read_invoice(invoice_id: int, tool_context: ToolContext) -> dict:
     """Get detailed invoice information.
@@ -647,20 +867,13 @@ def read_invoice(invoice_id: int, tool_context: ToolContext) -> dict:
     print(f"--- Tool: read_invoice called for invoice_id: {invoice_id} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
-        cursor.execute('''
-            SELECT i.*, c.name as contact_name, c.company, c.email
-            FROM invoice i
-            LEFT JOIN contact c ON i.contact_id = c.id
-            WHERE i.id = ? AND i.user_id = ?
-        ''', (invoice_id, user_id))
+        cursor.execute(storage.SELECT_INVOICE_WITH_CONTACT, {"invoice_id": invoice_id, "user_id": user_id})
         
         invoice = cursor.fetchone()
         
@@ -705,13 +918,9 @@ def mark_invoice_paid(invoice_id: int, tool_context: ToolContext) -> dict:
     print(f"--- Tool: mark_invoice_paid called for invoice_id: {invoice_id} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
+    def write(cursor):
         # Get invoice details
         cursor.execute("SELECT * FROM invoice WHERE id = ? AND user_id = ?", (invoice_id, user_id))
         invoice = cursor.fetchone()
@@ -732,7 +941,7 @@ def mark_invoice_paid(invoice_id: int, tool_context: ToolContext) -> dict:
             }
         
         # Update invoice status
-        cursor.execute("UPDATE invoice SET status = 'paid' WHERE id = ?", (invoice_id,))
+        cursor.execute(storage.MARK_INVOICE_PAID, {"invoice_id": invoice_id})
         
         # Check if revenue record exists
         cursor.execute("SELECT id FROM revenue WHERE invoice_id = ?", (invoice_id,))
@@ -741,12 +950,9 @@ def mark_invoice_paid(invoice_id: int, tool_context: ToolContext) -> dict:
         if not existing_revenue:
             # Create revenue record
             payment_date = datetime.now().strftime("%Y-%m-%d")
-            cursor.execute('''
-                INSERT INTO revenue (invoice_id, amount, date)
-                VALUES (?, ?, ?)
-            ''', (invoice_id, invoice[5], payment_date))  # total_amount column
-        
-        conn.commit()
+            cursor.execute(storage.INSERT_REVENUE, {
+                "invoice_id": invoice_id, "amount": invoice[5], "date": payment_date,  # total_amount column
+            })
         
         return {
             "action": "mark_invoice_paid",
@@ -755,19 +961,20 @@ def mark_invoice_paid(invoice_id: int, tool_context: ToolContext) -> dict:
             "amount": invoice[5],
             "message": f"Successfully marked invoice {invoice_id} as paid (${invoice[5]})"
         }
-        
+    
+    try:
+        result = run_write(db_path, write)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "mark_invoice_paid",
             "status": "error",
             "error": str(e),
             "message": f"Failed to mark invoice {invoice_id} as paid"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success":
+        bump_data_version(user_id)
+    return result
 
 def get_unpaid_invoices(tool_context: ToolContext) -> dict:
     """Get all unpaid invoices for the current user.
@@ -781,13 +988,22 @@ def get_unpaid_invoices(tool_context: ToolContext) -> dict:
     print("--- Tool: get_unpaid_invoices called ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    
+    # Use the speculative prefetch started alongside the model call, if any
+    prefetched = take_prefetched(user_id, "get_unpaid_invoices")
+    if prefetched is not None:
+        return prefetched
+    
+    return query_unpaid_invoices(user_id)
+
+def query_unpaid_invoices(user_id: str) -> dict:
+    """Compute the get_unpaid_invoices result for a user."""
+    db_path = sharding.db_path_for(user_id)
+    conn = None
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
         # Get all unpaid invoices with contact information
         cursor.execute('''
@@ -848,18 +1064,16 @@ def create_revenue(invoice_id: int, amount: float, tool_context: ToolContext, da
     """
     print(f"--- Tool: create_revenue called for invoice_id: {invoice_id}, amount: ${amount} ---")
     
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    user_id = tool_context.state.get("user_id", "demo_user")
+    idempotency_key = _idempotency_key(tool_context, "create_revenue", {"invoice_id": invoice_id, "amount": amount, "date": date})
+    db_path = sharding.db_path_for(user_id)
     
     if not date:
         date = datetime.now().strftime("%Y-%m-%d")
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Verify invoice exists
-        cursor.execute("SELECT id FROM invoice WHERE id = ?", (invoice_id,))
+    def write(cursor):
+        # Verify invoice exists and belongs to this user
+        cursor.execute("SELECT id FROM invoice WHERE id = ? AND user_id = ?", (invoice_id, user_id))
         invoice = cursor.fetchone()
         
         if not invoice:
@@ -881,36 +1095,31 @@ def create_revenue(invoice_id: int, amount: float, tool_context: ToolContext, da
                 "message": f"Revenue record already exists for invoice {invoice_id}"
             }
         
-        cursor.execute('''
-            INSERT INTO revenue (invoice_id, amount, date)
-            VALUES (?, ?, ?)
-        ''', (invoice_id, amount, date))
-        
-        revenue_id = cursor.lastrowid
-        conn.commit()
+        cursor.execute(storage.INSERT_REVENUE, {"invoice_id": invoice_id, "amount": amount, "date": date})
         
         return {
             "action": "create_revenue",
             "status": "success",
-            "revenue_id": revenue_id,
+            "revenue_id": cursor.lastrowid,
             "invoice_id": invoice_id,
             "amount": amount,
             "date": date,
             "message": f"Successfully recorded ${amount} revenue for invoice {invoice_id}"
         }
-        
+    
+    try:
+        result = run_write(db_path, write, idempotency_key)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "create_revenue",
             "status": "error",
             "error": str(e),
             "message": f"Failed to create revenue record for invoice {invoice_id}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success" and not result.get("deduplicated"):
+        bump_data_version(user_id)
+    return result
 
 # EXPENSE TOOLS
 def create_expense(amount: float, category: str, tool_context: ToolContext, description: str, 
@@ -930,37 +1139,26 @@ def create_expense(amount: float, category: str, tool_context: ToolContext, desc
     print(f"--- Tool: create_expense called for: {category} - ${amount} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    idempotency_key = _idempotency_key(tool_context, "create_expense", {"amount": amount, "category": category, "description": description, "date": date})
+    db_path = sharding.db_path_for(user_id)
     
     if not date:
         date = datetime.now().strftime("%Y-%m-%d")
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
+    def write(cursor):
+        _ensure_user(cursor, user_id)
         
-        # Check if user exists, if not create them
-        cursor.execute("SELECT id FROM user WHERE id = ?", (user_id,))
-        user_exists = cursor.fetchone()
+        # Score against the category's history; the insert trigger then folds the new amount in
+        stats = analytics.expense_category_stats(cursor, user_id, category)
+        score = analytics.score_expense(amount, stats, ANOMALY_MIN_HISTORY)
         
-        if not user_exists:
-            print(f"User {user_id} doesn't exist, creating user entry...")
-            cursor.execute('''
-                INSERT INTO user (id, name, email, company, phone)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, user_id.replace('_', ' ').title(), f"{user_id}@example.com", "Unknown Company", "000-000-0000"))
-            print(f"Created user entry for {user_id}")
-        
-        cursor.execute('''
-            INSERT INTO expense (user_id, amount, category, description, date)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, amount, category, description, date))
+        cursor.execute(storage.INSERT_EXPENSE, {
+            "user_id": user_id, "amount": amount, "category": category, "description": description, "date": date,
+        })
         
         expense_id = cursor.lastrowid
-        conn.commit()
         
-        return {
+        result = {
             "action": "create_expense",
             "status": "success",
             "expense_id": expense_id,
@@ -971,31 +1169,42 @@ def create_expense(amount: float, category: str, tool_context: ToolContext, desc
             "message": f"Successfully recorded ${amount} expense for {category}"
         }
         
+        if score and score["z_score"] >= ANOMALY_Z_THRESHOLD:
+            result["anomaly"] = score
+            result["message"] += (
+                f" ⚠️ This is {score['ratio_to_mean']}x the usual {category} expense "
+                f"(${score['category_mean']:,.2f} on average)"
+            )
+        
+        return result
+    
+    try:
+        result = run_write(db_path, write, idempotency_key)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "create_expense",
             "status": "error",
             "error": str(e),
             "message": f"Failed to create expense: {category}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success" and not result.get("deduplicated"):
+        bump_data_version(user_id)
+    return result
 
 # EVENT TOOLS
 def create_event(title: str, tool_context: ToolContext, contact_id: int, date: str,
-                description: str, location: str) -> dict:
+                description: str, location: str, contact_name: str) -> dict:
     """Schedule a new event.
 
     Args:
         title: Event title
         tool_context: Context for accessing session state
-        contact_id: ID of the contact this event is with (optional)
+        contact_id: ID of the contact this event is with (optional, 0 to look up contact_name)
         date: Event date and time (YYYY-MM-DD HH:MM:SS format)
         description: Event description
         location: Event location
+        contact_name: Contact name, company or email, used when contact_id is 0 (optional)
 
     Returns:
         Dictionary containing the result of creating the event
@@ -1003,29 +1212,17 @@ def create_event(title: str, tool_context: ToolContext, contact_id: int, date: s
     print(f"--- Tool: create_event called for: {title} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    idempotency_key = _idempotency_key(tool_context, "create_event", {"title": title, "contact_id": contact_id, "date": date, "description": description, "location": location, "contact_name": contact_name})
+    db_path = sharding.db_path_for(user_id)
     
     if not date:
         date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Check if user exists, if not create them
-        cursor.execute("SELECT id FROM user WHERE id = ?", (user_id,))
-        user_exists = cursor.fetchone()
-        
-        if not user_exists:
-            print(f"User {user_id} doesn't exist, creating user entry...")
-            cursor.execute('''
-                INSERT INTO user (id, name, email, company, phone)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, user_id.replace('_', ' ').title(), f"{user_id}@example.com", "Unknown Company", "000-000-0000"))
-            print(f"Created user entry for {user_id}")
+    def write(cursor):
+        _ensure_user(cursor, user_id)
         
         # Verify contact exists if provided
+        event_contact_name = None
         if contact_id and contact_id > 0:
             cursor.execute("SELECT name FROM contact WHERE id = ? AND user_id = ?", (contact_id, user_id))
             contact = cursor.fetchone()
@@ -1037,49 +1234,45 @@ def create_event(title: str, tool_context: ToolContext, contact_id: int, date: s
                     "error": f"Contact with ID {contact_id} not found",
                     "message": f"Contact {contact_id} not found"
                 }
+            event_contact_name = contact[0]
         
         # Handle contact_id - if 0, set to None for database
         contact_id_for_db = contact_id if contact_id > 0 else None
         
-        cursor.execute('''
-            INSERT INTO event (user_id, contact_id, title, date, description, location)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, contact_id_for_db, title, date, description, location))
-        
-        event_id = cursor.lastrowid
-        conn.commit()
-        
-        contact_name = None
-        if contact_id and contact_id > 0:
-            cursor.execute("SELECT name FROM contact WHERE id = ?", (contact_id,))
-            contact_info = cursor.fetchone()
-            contact_name = contact_info[0] if contact_info else "Unknown"
+        cursor.execute(storage.INSERT_EVENT, {
+            "user_id": user_id, "contact_id": contact_id_for_db, "title": title, "date": date,
+            "description": description, "location": location,
+        })
         
         return {
             "action": "create_event",
             "status": "success",
-            "event_id": event_id,
+            "event_id": cursor.lastrowid,
             "title": title,
             "date": date,
             "contact_id": contact_id,
-            "contact_name": contact_name,
+            "contact_name": event_contact_name,
             "location": location,
             "description": description,
             "message": f"Successfully created event: {title}"
         }
-        
+    
+    try:
+        contact_id, error = _contact_id_from_name(user_id, contact_id, contact_name, "create_event")
+        if error:
+            return error
+        result = run_write(db_path, write, idempotency_key)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "create_event",
             "status": "error",
             "error": str(e),
             "message": f"Failed to create event: {title}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success" and not result.get("deduplicated"):
+        bump_data_version(user_id)
+    return result
 
 def list_upcoming_events(tool_context: ToolContext) -> dict:
     """Get list of upcoming events.
@@ -1093,13 +1286,11 @@ def list_upcoming_events(tool_context: ToolContext) -> dict:
     print("--- Tool: list_upcoming_events called ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
         current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
@@ -1134,15 +1325,16 @@ def list_upcoming_events(tool_context: ToolContext) -> dict:
 
 # INTERACTION TOOLS
 def log_interaction(contact_id: int, tool_context: ToolContext, date: str, 
-                   interaction_type: str, summary: str) -> dict:
+                   interaction_type: str, summary: str, contact_name: str) -> dict:
     """Log an interaction with a contact.
 
     Args:
-        contact_id: ID of the contact
+        contact_id: ID of the contact (0 to look the contact up by contact_name)
         tool_context: Context for accessing session state
         date: Date of interaction (YYYY-MM-DD format)
         interaction_type: Type of interaction (call, email, meeting, note)
         summary: Summary of the interaction
+        contact_name: Contact name, company or email, used when contact_id is 0
 
     Returns:
         Dictionary containing the result of logging the interaction
@@ -1150,7 +1342,8 @@ def log_interaction(contact_id: int, tool_context: ToolContext, date: str,
     print(f"--- Tool: log_interaction called for contact_id: {contact_id}, type: {interaction_type} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    idempotency_key = _idempotency_key(tool_context, "log_interaction", {"contact_id": contact_id, "date": date, "interaction_type": interaction_type, "summary": summary, "contact_name": contact_name})
+    db_path = sharding.db_path_for(user_id)
     
     if not date:
         date = datetime.now().strftime("%Y-%m-%d")
@@ -1160,22 +1353,8 @@ def log_interaction(contact_id: int, tool_context: ToolContext, date: str,
     if interaction_type.lower() not in valid_types:
         interaction_type = 'note'
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Check if user exists, if not create them
-        cursor.execute("SELECT id FROM user WHERE id = ?", (user_id,))
-        user_exists = cursor.fetchone()
-        
-        if not user_exists:
-            print(f"User {user_id} doesn't exist, creating user entry...")
-            cursor.execute('''
-                INSERT INTO user (id, name, email, company, phone)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, user_id.replace('_', ' ').title(), f"{user_id}@example.com", "Unknown Company", "000-000-0000"))
-            print(f"Created user entry for {user_id}")
+    def write(cursor):
+        _ensure_user(cursor, user_id)
         
         # Verify contact exists
         cursor.execute("SELECT name FROM contact WHERE id = ? AND user_id = ?", (contact_id, user_id))
@@ -1189,18 +1368,15 @@ def log_interaction(contact_id: int, tool_context: ToolContext, date: str,
                 "message": f"Contact {contact_id} not found"
             }
         
-        cursor.execute('''
-            INSERT INTO interaction (user_id, contact_id, date, type, summary)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, contact_id, date, interaction_type.lower(), summary))
-        
-        interaction_id = cursor.lastrowid
-        conn.commit()
+        cursor.execute(storage.INSERT_INTERACTION, {
+            "user_id": user_id, "contact_id": contact_id, "date": date,
+            "type": interaction_type.lower(), "summary": summary,
+        })
         
         return {
             "action": "log_interaction",
             "status": "success",
-            "interaction_id": interaction_id,
+            "interaction_id": cursor.lastrowid,
             "contact_id": contact_id,
             "contact_name": contact[0],
             "date": date,
@@ -1208,19 +1384,23 @@ def log_interaction(contact_id: int, tool_context: ToolContext, date: str,
             "summary": summary,
             "message": f"Successfully logged {interaction_type} interaction with {contact[0]}"
         }
-        
+    
+    try:
+        contact_id, error = _contact_id_from_name(user_id, contact_id, contact_name, "log_interaction")
+        if error:
+            return error
+        result = run_write(db_path, write, idempotency_key)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return {
             "action": "log_interaction",
             "status": "error",
             "error": str(e),
             "message": f"Failed to log interaction for contact {contact_id}"
         }
-    finally:
-        if conn:
-            conn.close()
+    
+    if result["status"] == "success" and not result.get("deduplicated"):
+        bump_data_version(user_id)
+    return result
 
 def read_interactions(contact_id: int, tool_context: ToolContext) -> dict:
     """View interaction history for a specific contact.
@@ -1235,13 +1415,11 @@ def read_interactions(contact_id: int, tool_context: ToolContext) -> dict:
     print(f"--- Tool: read_interactions called for contact_id: {contact_id} ---")
     
     user_id = tool_context.state.get("user_id", "demo_user")
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
         # Verify contact exists
         cursor.execute("SELECT name FROM contact WHERE id = ? AND user_id = ?", (contact_id, user_id))
@@ -1327,26 +1505,28 @@ def generate_report(report_type: str, tool_context: ToolContext, period: str) ->
             "message": f"Failed to generate {report_type} report"
         }
 
+# Most recent first, for the detail lists next to the report totals
+_RECENT_REVENUE_SQL = '''
+    SELECT r.*, i.contact_id, c.name as contact_name, c.company
+    FROM revenue r
+    JOIN invoice i ON r.invoice_id = i.id
+    LEFT JOIN contact c ON i.contact_id = c.id
+    WHERE i.user_id = ?
+    ORDER BY r.date DESC, r.id DESC
+'''
+_RECENT_EXPENSES_SQL = "SELECT * FROM expense WHERE user_id = ? ORDER BY date DESC, id DESC"
+
 def _generate_revenue_report(user_id: str, period: str) -> dict:
     """Generate revenue report."""
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
-        cursor.execute('''
-            SELECT r.*, i.contact_id, c.name as contact_name, c.company
-            FROM revenue r
-            JOIN invoice i ON r.invoice_id = i.id
-            LEFT JOIN contact c ON i.contact_id = c.id
-            WHERE i.user_id = ?
-        ''', (user_id,))
-        
-        revenues = [dict(row) for row in cursor.fetchall()]
-        total_revenue = sum(rev['amount'] for rev in revenues)
+        summary = analytics.revenue_summary(cursor, user_id)
+        total_revenue = summary["total"]
+        revenues = analytics.recent_rows(cursor, _RECENT_REVENUE_SQL, (user_id,), REPORT_DETAIL_ROWS)
         
         return {
             "action": "generate_report",
@@ -1354,9 +1534,10 @@ def _generate_revenue_report(user_id: str, period: str) -> dict:
             "report_type": "revenue",
             "period": period,
             "total_revenue": total_revenue,
-            "revenue_entries": len(revenues),
-            "average_revenue": total_revenue / len(revenues) if revenues else 0,
+            "revenue_entries": summary["count"],
+            "average_revenue": total_revenue / summary["count"] if summary["count"] else 0,
             "revenue_details": revenues,
+            "details_truncated": summary["count"] > len(revenues),
             "message": f"Revenue report generated: ${total_revenue:.2f} total"
         }
         
@@ -1373,24 +1554,16 @@ def _generate_revenue_report(user_id: str, period: str) -> dict:
 
 def _generate_expense_report(user_id: str, period: str) -> dict:
     """Generate expense report."""
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        cursor.execute("SELECT * FROM expense WHERE user_id = ?", (user_id,))
-        expenses = [dict(row) for row in cursor.fetchall()]
         
-        total_expenses = sum(exp['amount'] for exp in expenses)
-        
-        # Group by category
-        category_totals = {}
-        for expense in expenses:
-            category = expense['category']
-            category_totals[category] = category_totals.get(category, 0) + expense['amount']
+        # Totals and category grouping are computed in SQL
+        summary = analytics.expense_summary(cursor, user_id)
+        total_expenses = summary["total"]
+        expenses = analytics.recent_rows(cursor, _RECENT_EXPENSES_SQL, (user_id,), REPORT_DETAIL_ROWS)
         
         return {
             "action": "generate_report",
@@ -1398,9 +1571,10 @@ def _generate_expense_report(user_id: str, period: str) -> dict:
             "report_type": "expenses",
             "period": period,
             "total_expenses": total_expenses,
-            "expense_count": len(expenses),
-            "categories": category_totals,
+            "expense_count": summary["count"],
+            "categories": summary["by_category"],
             "expense_details": expenses,
+            "details_truncated": summary["count"] > len(expenses),
             "message": f"Expense report generated: ${total_expenses:.2f} total"
         }
         
@@ -1417,30 +1591,27 @@ def _generate_expense_report(user_id: str, period: str) -> dict:
 
 def _generate_contact_report(user_id: str) -> dict:
     """Generate contact report."""
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        cursor.execute("SELECT * FROM contact WHERE user_id = ?", (user_id,))
-        contacts = [dict(row) for row in cursor.fetchall()]
         
-        status_counts = {}
-        for contact in contacts:
-            status = contact['status']
-            status_counts[status] = status_counts.get(status, 0) + 1
+        status_counts = analytics.contact_status_counts(cursor, user_id)
+        total_contacts = sum(status_counts.values())
+        contacts = analytics.recent_rows(
+            cursor, "SELECT * FROM contact WHERE user_id = ? ORDER BY id DESC", (user_id,), REPORT_DETAIL_ROWS
+        )
         
         return {
             "action": "generate_report",
             "status": "success",
             "report_type": "contacts",
-            "total_contacts": len(contacts),
+            "total_contacts": total_contacts,
             "status_breakdown": status_counts,
             "contact_details": contacts,
-            "message": f"Contact report generated: {len(contacts)} total contacts"
+            "details_truncated": total_contacts > len(contacts),
+            "message": f"Contact report generated: {total_contacts} total contacts"
         }
         
     except Exception as e:
@@ -1456,44 +1627,35 @@ def _generate_contact_report(user_id: str) -> dict:
 
 def _generate_invoice_report(user_id: str, period: str) -> dict:
     """Generate invoice report."""
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
-        cursor.execute('''
+        # Status counts and amounts are computed in SQL
+        summary = analytics.invoice_summary(cursor, user_id)
+        total_amount = summary["total"]
+        invoices = analytics.recent_rows(cursor, '''
             SELECT i.*, c.name as contact_name, c.company
             FROM invoice i
             LEFT JOIN contact c ON i.contact_id = c.id
             WHERE i.user_id = ?
-        ''', (user_id,))
-        
-        invoices = [dict(row) for row in cursor.fetchall()]
-        
-        status_counts = {}
-        status_amounts = {}
-        
-        for invoice in invoices:
-            status = invoice['status']
-            status_counts[status] = status_counts.get(status, 0) + 1
-            status_amounts[status] = status_amounts.get(status, 0) + invoice['total_amount']
-        
-        total_amount = sum(inv['total_amount'] for inv in invoices)
+            ORDER BY i.id DESC
+        ''', (user_id,), REPORT_DETAIL_ROWS)
         
         return {
             "action": "generate_report",
             "status": "success",
             "report_type": "invoices",
             "period": period,
-            "total_invoices": len(invoices),
+            "total_invoices": summary["count"],
             "total_amount": total_amount,
-            "status_counts": status_counts,
-            "status_amounts": status_amounts,
+            "status_counts": summary["status_counts"],
+            "status_amounts": summary["status_amounts"],
             "invoice_details": invoices,
-            "message": f"Invoice report generated: {len(invoices)} invoices, ${total_amount:.2f} total"
+            "details_truncated": summary["count"] > len(invoices),
+            "message": f"Invoice report generated: {summary['count']} invoices, ${total_amount:.2f} total"
         }
         
     except Exception as e:
@@ -1509,37 +1671,32 @@ def _generate_invoice_report(user_id: str, period: str) -> dict:
 
 def _generate_interaction_report(user_id: str, period: str) -> dict:
     """Generate interaction report."""
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
         
-        cursor.execute('''
+        type_counts = analytics.interaction_type_counts(cursor, user_id)
+        total_interactions = sum(type_counts.values())
+        interactions = analytics.recent_rows(cursor, '''
             SELECT i.*, c.name as contact_name, c.company
             FROM interaction i
             LEFT JOIN contact c ON i.contact_id = c.id
             WHERE i.user_id = ?
-        ''', (user_id,))
-        
-        interactions = [dict(row) for row in cursor.fetchall()]
-        
-        type_counts = {}
-        for interaction in interactions:
-            interaction_type = interaction['type']
-            type_counts[interaction_type] = type_counts.get(interaction_type, 0) + 1
+            ORDER BY i.date DESC, i.id DESC
+        ''', (user_id,), REPORT_DETAIL_ROWS)
         
         return {
             "action": "generate_report",
             "status": "success",
             "report_type": "interactions",
             "period": period,
-            "total_interactions": len(interactions),
+            "total_interactions": total_interactions,
             "type_breakdown": type_counts,
             "interaction_details": interactions,
-            "message": f"Interaction report generated: {len(interactions)} total interactions"
+            "details_truncated": total_interactions > len(interactions),
+            "message": f"Interaction report generated: {total_interactions} total interactions"
         }
         
     except Exception as e:
@@ -1563,42 +1720,28 @@ def profit_loss_report(period: str, tool_context: ToolContext) -> dict:
         Dictionary containing the requested report
     """
     
-    db_path = SESSIONS_DB.replace("sqlite:///", "")
     user_id = tool_context.state.get("user_id", "demo_user")
+    db_path = sharding.db_path_for(user_id)
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.read_connection(db_path, sqlite3.Row)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Get all revenue data
-        cursor.execute('''
-            SELECT r.*, i.contact_id, c.name as contact_name, c.company
-            FROM revenue r
-            JOIN invoice i ON r.invoice_id = i.id
-            LEFT JOIN contact c ON i.contact_id = c.id
-            WHERE i.user_id = ?
-        ''', (user_id,))
         
-        revenues = [dict(row) for row in cursor.fetchall()]
-        total_revenue = sum(rev['amount'] for rev in revenues)
+        # Totals and the category breakdown are computed in SQL
+        revenue_totals = analytics.revenue_summary(cursor, user_id)
+        expense_totals = analytics.expense_summary(cursor, user_id)
+        total_revenue = revenue_totals["total"]
+        total_expenses = expense_totals["total"]
+        expense_breakdown = expense_totals["by_category"]
         
-        # Get all expense data
-        cursor.execute("SELECT * FROM expense WHERE user_id = ?", (user_id,))
-        expenses = [dict(row) for row in cursor.fetchall()]
-        total_expenses = sum(exp['amount'] for exp in expenses)
+        # Only the most recent entries are listed
+        revenues = analytics.recent_rows(cursor, _RECENT_REVENUE_SQL, (user_id,), REPORT_DETAIL_ROWS)
+        expenses = analytics.recent_rows(cursor, _RECENT_EXPENSES_SQL, (user_id,), REPORT_DETAIL_ROWS)
         
         # Calculate profit/loss
         net_profit_loss = total_revenue - total_expenses
         profit_margin = (net_profit_loss / total_revenue * 100) if total_revenue > 0 else 0
         
-        # Group expenses by category for detailed breakdown
-        expense_breakdown = {}
-        for expense in expenses:
-            category = expense['category']
-            expense_breakdown[category] = expense_breakdown.get(category, 0) + expense['amount']
-        
         # Determine financial status
         if net_profit_loss > 0:
             financial_status = "profitable"
@@ -1623,18 +1766,19 @@ def profit_loss_report(period: str, tool_context: ToolContext) -> dict:
                 "financial_status": financial_status
             },
             "revenue_details": {
-                "revenue_count": len(revenues),
+                "revenue_count": revenue_totals["count"],
                 "revenue_entries": revenues
             },
             "expense_details": {
-                "expense_count": len(expenses),
+                "expense_count": expense_totals["count"],
                 "expense_breakdown": expense_breakdown,
                 "expense_entries": expenses
             },
+            "details_truncated": revenue_totals["count"] > len(revenues) or expense_totals["count"] > len(expenses),
             "insights": [
                 status_message,
                 f"Profit margin: {profit_margin:.2f}%",
-                f"Revenue from {len(revenues)} transactions",
+                f"Revenue from {revenue_totals['count']} transactions",
                 f"Expenses across {len(expense_breakdown)} categories"
             ],
             "message": f"P&L report generated: {status_message}"
@@ -1651,6 +1795,108 @@ def profit_loss_report(period: str, tool_context: ToolContext) -> dict:
         if conn:
             conn.close()
             
+# Precompiled patterns for natural date parsing
+_RELATIVE_OFFSET_PATTERN = re.compile(r'in (\d+) (day|days|week|weeks|month|months)')
+_DAY_TIME_PATTERN = re.compile(r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday).*?(\d{1,2})(am|pm)')
+_TIME_SUFFIX_PATTERN = re.compile(r'^(.+?)\s+at\s+(?:(\d{1,2})(?::(\d{2}))?\s*(am|pm)|(noon))$')
+_WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_WEEKDAY_PHRASE_PATTERN = re.compile(r'^(?:(this|next)\s+)?(' + '|'.join(_WEEKDAYS) + r')$')
+# "tonight" without a time means this evening at this hour
+TONIGHT_HOUR = 20
+
+@lru_cache(maxsize=1024)
+def resolve_natural_date(date_text: str, reference: datetime) -> datetime:
+    """Resolve a cleaned, lower-cased date phrase against a reference time.
+
+    Memoized per (phrase, reference) so callers should pass a reference
+    truncated to the minute to get useful cache hits.
+    """
+    now = reference
+    
+    # Resolve "<day> at <time>" as the day first, then apply the time of day
+    time_match = _TIME_SUFFIX_PATTERN.match(date_text)
+    if time_match:
+        day_text, hour, minute, ampm, noon = time_match.groups()
+        hour = 12 if noon else int(hour)
+        if ampm == 'pm' and hour != 12:
+            hour += 12
+        elif ampm == 'am' and hour == 12:
+            hour = 0
+        parsed_day = resolve_natural_date(day_text.strip(), reference)
+        parsed = parsed_day.replace(hour=hour, minute=int(minute or 0), second=0, microsecond=0)
+        if parsed < now and _WEEKDAY_PHRASE_PATTERN.match(day_text.strip()):
+            # "monday at 9:30am" said on Monday at 10:30 means next week's Monday
+            parsed += relativedelta(weeks=1)
+        return parsed
+    
+    # Handle special cases first
+    if date_text in ['today', 'now']:
+        return now
+    if date_text in ['tomorrow']:
+        return now + relativedelta(days=1)
+    if date_text in ['yesterday']:
+        return now - relativedelta(days=1)
+    if date_text in ['tonight']:
+        return max(now, now.replace(hour=TONIGHT_HOUR, minute=0, second=0, microsecond=0))
+    if 'next week' in date_text:
+        return now + relativedelta(weeks=1)
+    if 'next month' in date_text:
+        return now + relativedelta(months=1)
+    
+    # "friday" and "this friday" may be today; "next friday" is always a later day
+    weekday_match = _WEEKDAY_PHRASE_PATTERN.match(date_text)
+    if weekday_match:
+        prefix, day_name = weekday_match.groups()
+        days_ahead = _WEEKDAYS.index(day_name) - now.weekday()
+        if days_ahead < 0 or (days_ahead == 0 and prefix == 'next'):
+            days_ahead += 7
+        return now + relativedelta(days=days_ahead)
+    
+    # Handle relative expressions like "in 3 days", "in 2 weeks"
+    relative_match = _RELATIVE_OFFSET_PATTERN.search(date_text)
+    if relative_match:
+        number = int(relative_match.group(1))
+        unit = relative_match.group(2)
+        
+        if 'day' in unit:
+            return now + relativedelta(days=number)
+        elif 'week' in unit:
+            return now + relativedelta(weeks=number)
+        elif 'month' in unit:
+            return now + relativedelta(months=number)
+        return now
+    
+    # Try parsing with dateutil - it handles many natural language formats
+    try:
+        return date_parser.parse(date_text, default=now, fuzzy=True)
+    except:
+        # If parsing fails, try with some preprocessing
+        # Handle day names with times
+        day_time_match = _DAY_TIME_PATTERN.search(date_text)
+        if day_time_match:
+            day_name = day_time_match.group(1)
+            hour = int(day_time_match.group(2))
+            ampm = day_time_match.group(3)
+            
+            if ampm == 'pm' and hour != 12:
+                hour += 12
+            elif ampm == 'am' and hour == 12:
+                hour = 0
+            
+            # Find next occurrence of the day
+            target_day = _WEEKDAYS.index(day_name)
+            current_day = now.weekday()
+            
+            days_ahead = target_day - current_day
+            if days_ahead <= 0:  # Target day already happened this week
+                days_ahead += 7
+            
+            parsed_date = now + relativedelta(days=days_ahead)
+            return parsed_date.replace(hour=hour, minute=0, second=0, microsecond=0)
+        
+        # Final fallback - just parse what we can
+        return date_parser.parse(date_text, default=now, fuzzy=True)
+
 def parse_natural_date(date_text: str) -> dict:
     """Parse natural language date/time expressions into standard formats.
     
@@ -1669,64 +1915,7 @@ def parse_natural_date(date_text: str) -> dict:
         # Clean the input text
         date_text = date_text.strip().lower()
         
-        # Handle special cases first
-        if date_text in ['today', 'now']:
-            parsed_date = now
-        elif date_text in ['tomorrow']:
-            parsed_date = now + relativedelta(days=1)
-        elif date_text in ['yesterday']:
-            parsed_date = now - relativedelta(days=1)
-        elif 'next week' in date_text:
-            parsed_date = now + relativedelta(weeks=1)
-        elif 'next month' in date_text:
-            parsed_date = now + relativedelta(months=1)
-        else:
-            # Handle relative expressions like "in 3 days", "in 2 weeks"
-            relative_match = re.search(r'in (\d+) (day|days|week|weeks|month|months)', date_text)
-            if relative_match:
-                number = int(relative_match.group(1))
-                unit = relative_match.group(2)
-                
-                if 'day' in unit:
-                    parsed_date = now + relativedelta(days=number)
-                elif 'week' in unit:
-                    parsed_date = now + relativedelta(weeks=number)
-                elif 'month' in unit:
-                    parsed_date = now + relativedelta(months=number)
-                else:
-                    parsed_date = now
-            else:
-                # Try parsing with dateutil - it handles many natural language formats
-                try:
-                    parsed_date = date_parser.parse(date_text, default=now, fuzzy=True)
-                except:
-                    # If parsing fails, try with some preprocessing
-                    # Handle day names with times
-                    day_time_match = re.search(r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday).*?(\d{1,2})(am|pm)', date_text)
-                    if day_time_match:
-                        day_name = day_time_match.group(1)
-                        hour = int(day_time_match.group(2))
-                        ampm = day_time_match.group(3)
-                        
-                        if ampm == 'pm' and hour != 12:
-                            hour += 12
-                        elif ampm == 'am' and hour == 12:
-                            hour = 0
-                        
-                        # Find next occurrence of the day
-                        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-                        target_day = days.index(day_name)
-                        current_day = now.weekday()
-                        
-                        days_ahead = target_day - current_day
-                        if days_ahead <= 0:  # Target day already happened this week
-                            days_ahead += 7
-                        
-                        parsed_date = now + relativedelta(days=days_ahead)
-                        parsed_date = parsed_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                    else:
-                        # Final fallback - just parse what we can
-                        parsed_date = date_parser.parse(date_text, default=now, fuzzy=True)
+        parsed_date = resolve_natural_date(date_text, now.replace(second=0, microsecond=0))
         
         # Format the parsed date in various useful formats
         return {
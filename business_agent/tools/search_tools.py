@@ -0,0 +1,155 @@
+from google.adk.tools import ToolContext
+import re
+import sqlite3
+
+from business_agent import sharding, storage
+
+# Words that carry no meaning in a search like "the designer we talked to about the logo"
+SEARCH_STOPWORDS = {
+    "a", "about", "an", "and", "at", "for", "from", "i", "in", "is", "me", "my", "of", "on",
+    "or", "our", "the", "to", "was", "we", "who", "with", "that", "this", "talked", "spoke",
+}
+MAX_SEARCH_RESULTS = 50
+_SEARCH_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(text: str) -> list:
+    """Lower-cased, de-duplicated meaningful words of a search phrase."""
+    terms = [term.lower() for term in _SEARCH_TERM_PATTERN.findall(text or "")]
+    meaningful = [term for term in terms if term not in SEARCH_STOPWORDS]
+    return list(dict.fromkeys(meaningful or terms))
+
+
+def build_match_query(terms: list) -> str:
+    """FTS5 MATCH expression: any term, each as a quoted prefix so 'design' finds 'designer'."""
+    return " OR ".join(f'"{term}"*' for term in terms)
+
+
+# SEARCH TOOLS
+def search_business_records(query: str, limit: int, tool_context: ToolContext) -> dict:
+    """Search contacts (name, company, email, notes) and interaction summaries by keywords.
+
+    Args:
+        query: Free-text search, e.g. "designer logo" or "pricing call with acme"
+        limit: Maximum number of results to return (maximum 50, 10 if 0)
+        tool_context: Context for accessing session state
+
+    Returns:
+        Dictionary containing the best-matching contacts and interactions, ranked by relevance, with snippets
+    """
+    print(f"--- Tool: search_business_records called for: {query} ---")
+
+    user_id = tool_context.state.get("user_id", "demo_user")
+    limit = min(MAX_SEARCH_RESULTS, max(1, int(limit or 10)))
+    terms = search_terms(query)
+
+    if not terms:
+        return {
+            "action": "search_business_records",
+            "status": "error",
+            "error": "Empty search query",
+            "message": "Please provide something to search for"
+        }
+
+    db_path = sharding.db_path_for(user_id)
+    conn = None
+
+    try:
+        conn = storage.read_connection(db_path, sqlite3.Row)
+        cursor = conn.cursor()
+
+        try:
+            results = _fts_search(cursor, user_id, build_match_query(terms), limit)
+            search_mode = "fts5"
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Full-text search unavailable, using LIKE matching: {e}")
+            results = _like_search(cursor, user_id, terms, limit)
+            search_mode = "like"
+
+        return {
+            "action": "search_business_records",
+            "status": "success",
+            "query": query,
+            "search_mode": search_mode,
+            "results_count": len(results),
+            "results": results,
+            "message": f"Found {len(results)} matching records for '{query}'"
+        }
+
+    except Exception as e:
+        return {
+            "action": "search_business_records",
+            "status": "error",
+            "error": str(e),
+            "message": f"Failed to search for '{query}'"
+        }
+    finally:
+        if conn:
+            conn.close()
+
+
+def _fts_search(cursor, user_id: str, match_query: str, limit: int) -> list:
+    """Rank contacts and interactions by bm25 (lower is better) and merge them."""
+    # Weight name and company matches above email and free-text notes
+    cursor.execute('''
+        SELECT 'contact' AS record_type, c.id AS contact_id, c.name AS contact_name, c.company,
+               c.email, c.status, NULL AS interaction_id, NULL AS date, NULL AS type,
+               snippet(contact_fts, -1, '[', ']', '…', 12) AS snippet,
+               bm25(contact_fts, 10.0, 6.0, 3.0, 1.0) AS score
+        FROM contact_fts
+        JOIN contact c ON c.id = contact_fts.rowid
+        WHERE contact_fts MATCH ? AND c.user_id = ?
+        ORDER BY score
+        LIMIT ?
+    ''', (match_query, user_id, limit))
+    results = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute('''
+        SELECT 'interaction' AS record_type, i.contact_id, c.name AS contact_name, c.company,
+               c.email, c.status, i.id AS interaction_id, i.date, i.type,
+               snippet(interaction_fts, 0, '[', ']', '…', 16) AS snippet,
+               bm25(interaction_fts) AS score
+        FROM interaction_fts
+        JOIN interaction i ON i.id = interaction_fts.rowid
+        LEFT JOIN contact c ON c.id = i.contact_id
+        WHERE interaction_fts MATCH ? AND i.user_id = ?
+        ORDER BY score
+        LIMIT ?
+    ''', (match_query, user_id, limit))
+    results.extend(dict(row) for row in cursor.fetchall())
+
+    results.sort(key=lambda result: result["score"])
+    for result in results:
+        result["relevance"] = round(-result.pop("score"), 3)
+    return results[:limit]
+
+
+def _like_search(cursor, user_id: str, terms: list, limit: int) -> list:
+    """Unranked substring search for SQLite builds without FTS5."""
+    patterns = [f"%{term}%" for term in terms]
+
+    contact_match = " OR ".join(
+        "(name LIKE ? OR company LIKE ? OR email LIKE ? OR notes LIKE ?)" for _ in patterns
+    )
+    cursor.execute(f'''
+        SELECT 'contact' AS record_type, id AS contact_id, name AS contact_name, company,
+               email, status, NULL AS interaction_id, NULL AS date, NULL AS type, notes AS snippet
+        FROM contact
+        WHERE user_id = ? AND ({contact_match})
+        LIMIT ?
+    ''', (user_id, *[pattern for pattern in patterns for _ in range(4)], limit))
+    results = [dict(row) for row in cursor.fetchall()]
+
+    interaction_match = " OR ".join("i.summary LIKE ?" for _ in patterns)
+    cursor.execute(f'''
+        SELECT 'interaction' AS record_type, i.contact_id, c.name AS contact_name, c.company,
+               c.email, c.status, i.id AS interaction_id, i.date, i.type, i.summary AS snippet
+        FROM interaction i
+        LEFT JOIN contact c ON c.id = i.contact_id
+        WHERE i.user_id = ? AND ({interaction_match})
+        ORDER BY i.date DESC
+        LIMIT ?
+    ''', (user_id, *patterns, limit))
+    results.extend(dict(row) for row in cursor.fetchall())
+
+    return results[:limit]
@@ -0,0 +1,161 @@
+"""Per-user model and tool usage accounting built from the ADK event stream.
+
+Each chat turn is summarized (model round trips, prompt/response tokens,
+tool calls and tool time) and folded into a compact per-day rollup row in
+the usage_daily table. Daily token budgets are read from the environment:
+
+    DAILY_TOKEN_SOFT_BUDGET - above this the session history is compacted
+    DAILY_TOKEN_HARD_BUDGET - above this new turns are refused
+
+A budget of 0 (the default) disables the check.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from business_agent import storage
+from business_agent.tools import database_tools
+
+DAILY_TOKEN_SOFT_BUDGET = int(os.getenv("DAILY_TOKEN_SOFT_BUDGET", "0"))
+DAILY_TOKEN_HARD_BUDGET = int(os.getenv("DAILY_TOKEN_HARD_BUDGET", "0"))
+
+
+class BudgetExceededError(Exception):
+    """Raised when a user has used up their hard daily token budget."""
+
+
+def summarize_events(events: list) -> dict:
+    """Summarize model round trips, tokens and tool time from a turn's events."""
+    summary = {
+        "model_calls": 0,
+        "prompt_tokens": 0,
+        "response_tokens": 0,
+        "tool_calls": 0,
+        "tool_ms": 0.0,
+    }
+    pending_call_time = None
+
+    for event in events:
+        usage = getattr(event, "usage_metadata", None)
+        if usage:
+            summary["model_calls"] += 1
+            summary["prompt_tokens"] += usage.prompt_token_count or 0
+            summary["response_tokens"] += usage.candidates_token_count or 0
+
+        parts = event.content.parts if getattr(event, "content", None) and event.content.parts else []
+        if any(getattr(part, "function_call", None) for part in parts):
+            summary["tool_calls"] += sum(1 for part in parts if getattr(part, "function_call", None))
+            pending_call_time = event.timestamp
+        elif pending_call_time is not None and any(getattr(part, "function_response", None) for part in parts):
+            # Tool time is the gap between the model's call and the tool's response event
+            summary["tool_ms"] += max(0.0, (event.timestamp - pending_call_time) * 1000)
+            pending_call_time = None
+
+    summary["tool_ms"] = round(summary["tool_ms"], 2)
+    return summary
+
+
+def record_usage(user_id: str, summary: dict, latency_ms: float, refused: bool = False):
+    """Fold one request's usage into today's rollup row for the user."""
+    db_path = database_tools.SESSIONS_DB.replace("sqlite:///", "")
+    day = datetime.now().strftime("%Y-%m-%d")
+
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute('''
+            INSERT INTO usage_daily (user_id, day, requests, model_calls, prompt_tokens,
+                                     response_tokens, tool_calls, tool_ms, latency_ms, refused)
+            VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                requests = requests + 1,
+                model_calls = model_calls + excluded.model_calls,
+                prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                response_tokens = response_tokens + excluded.response_tokens,
+                tool_calls = tool_calls + excluded.tool_calls,
+                tool_ms = tool_ms + excluded.tool_ms,
+                latency_ms = latency_ms + excluded.latency_ms,
+                refused = refused + excluded.refused
+        ''', (
+            user_id, day,
+            summary.get("model_calls", 0), summary.get("prompt_tokens", 0),
+            summary.get("response_tokens", 0), summary.get("tool_calls", 0),
+            summary.get("tool_ms", 0.0), latency_ms, 1 if refused else 0,
+        ))
+        conn.commit()
+    except Exception as e:
+        print(f"❌ Error recording usage for {user_id}: {e}")
+    finally:
+        conn.close()
+
+
+def get_usage(user_id: str, days: int = 30) -> dict:
+    """Return the daily usage rollups and totals for a user over the last `days` days."""
+    db_path = database_tools.SESSIONS_DB.replace("sqlite:///", "")
+    since = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+
+    conn = storage.read_connection(db_path, sqlite3.Row)
+    try:
+        rows = [dict(row) for row in conn.execute('''
+            SELECT * FROM usage_daily
+            WHERE user_id = ? AND day >= ?
+            ORDER BY day
+        ''', (user_id, since))]
+    finally:
+        conn.close()
+
+    totals = {}
+    for key in ("requests", "model_calls", "prompt_tokens", "response_tokens", "tool_calls", "tool_ms", "latency_ms", "refused"):
+        totals[key] = sum(row[key] for row in rows)
+    totals["total_tokens"] = totals["prompt_tokens"] + totals["response_tokens"]
+    totals["avg_latency_ms"] = round(totals["latency_ms"] / totals["requests"], 2) if totals["requests"] else 0.0
+
+    return {
+        "user_id": user_id,
+        "days": days,
+        "daily": rows,
+        "totals": totals,
+        "budget": check_budget(user_id),
+    }
+
+
+def tokens_used_today(user_id: str) -> int:
+    """Total prompt + response tokens recorded for the user today."""
+    db_path = database_tools.SESSIONS_DB.replace("sqlite:///", "")
+    day = datetime.now().strftime("%Y-%m-%d")
+
+    conn = storage.read_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT prompt_tokens + response_tokens FROM usage_daily WHERE user_id = ? AND day = ?",
+            (user_id, day),
+        ).fetchone()
+        return row[0] if row else 0
+    except Exception as e:
+        print(f"❌ Error reading usage for {user_id}: {e}")
+        return 0
+    finally:
+        conn.close()
+
+
+def check_budget(user_id: str) -> dict:
+    """Compare today's token usage against the configured soft and hard budgets.
+
+    Returns:
+        Dictionary with tokens_today, the budgets and a state of
+        'ok', 'soft_exceeded' or 'hard_exceeded'
+    """
+    tokens_today = tokens_used_today(user_id)
+
+    state = "ok"
+    if DAILY_TOKEN_HARD_BUDGET and tokens_today >= DAILY_TOKEN_HARD_BUDGET:
+        state = "hard_exceeded"
+    elif DAILY_TOKEN_SOFT_BUDGET and tokens_today >= DAILY_TOKEN_SOFT_BUDGET:
+        state = "soft_exceeded"
+
+    return {
+        "state": state,
+        "tokens_today": tokens_today,
+        "soft_budget": DAILY_TOKEN_SOFT_BUDGET,
+        "hard_budget": DAILY_TOKEN_HARD_BUDGET,
+    }
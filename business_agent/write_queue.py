@@ -0,0 +1,285 @@
+"""Group-commit queue for the business-table write tools.
+
+Write tools hand their statements to a single writer thread as a callable
+taking a cursor. The writer gathers the writes that arrive within a short
+window (GROUP_COMMIT_WINDOW_MS, up to GROUP_COMMIT_MAX_BATCH of them), runs
+each inside its own SAVEPOINT and commits the whole batch once, so
+concurrent writers share one fsync. A write that raises is rolled back to
+its savepoint alone; its caller gets the exception while the rest of the
+batch still commits. Callers block until the batch holding their write is
+durable and get back exactly what their callable returned (lastrowid etc).
+The agent's tools are synchronous and run on ADK's tool thread pool (see
+TOOL_THREAD_WORKERS in agent.py), so that wait parks a worker thread rather
+than the event loop, and writes from concurrent turns land in one batch.
+
+Writes may carry an idempotency key. The key is looked up inside the write's
+own transaction; a replay returns the stored original result (marked
+deduplicated) instead of writing again, and a first write stores its result
+under the key in the same commit. Keys expire after IDEMPOTENCY_TTL_HOURS.
+
+With sharding (see sharding.py) each database gets its writes committed
+independently: shards are spread over WRITE_QUEUE_LANES writer threads, so
+commits to different shards proceed in parallel, and each lane keeps a
+bounded LRU of open shard handles.
+
+Set WRITE_QUEUE_ENABLED=false to run every write in its own transaction.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+from business_agent import storage
+from business_agent.sharding import MAX_OPEN_SHARDS, HandleCache
+
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "true").lower() != "false"
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "2"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+WRITE_QUEUE_LANES = max(1, int(os.getenv("WRITE_QUEUE_LANES", "4")))
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+_idempotency_lock = threading.Lock()
+_idempotency_stats = {"keyed_writes": 0, "deduplicated": 0}
+
+
+def _connect(db_path: str):
+    # Autocommit mode: transactions are issued explicitly below
+    return storage.raw_connection(db_path, autocommit=True)
+
+
+class WriteQueue:
+    """Single writer thread that commits concurrent writes in groups."""
+
+    def __init__(self, window_ms: float, max_batch: int, max_open: int, name: str = "group-commit-writer"):
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.name = name
+        self._queue = queue.Queue()
+        self._connections = HandleCache(max_open, _connect)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "writes": 0,
+            "failed_writes": 0,
+            "failed_commits": 0,
+            "max_batch_size": 0,
+            "commit_ms_total": 0.0,
+            "max_commit_ms": 0.0,
+            "latency_ms_total": 0.0,
+            "max_latency_ms": 0.0,
+        }
+
+    def submit(self, db_path: str, write):
+        """Queue a write and block until its batch commits; returns write(cursor)'s result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((db_path, write, future, time.perf_counter()))
+        return future.result()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _gather(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            # One group per shard database routed to this lane
+            by_path = {}
+            for item in batch:
+                by_path.setdefault(item[0], []).append(item)
+            for db_path, items in by_path.items():
+                self._commit_group(db_path, items)
+
+    def _commit_group(self, db_path: str, items: list):
+        outcomes = []
+        try:
+            conn = self._connections.get(db_path)
+            cursor = conn.cursor()
+
+            cursor.execute("BEGIN IMMEDIATE")
+            for _, write, _, _ in items:
+                cursor.execute("SAVEPOINT group_write")
+                try:
+                    outcomes.append((True, write(cursor)))
+                    cursor.execute("RELEASE group_write")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO group_write")
+                    cursor.execute("RELEASE group_write")
+                    outcomes.append((False, e))
+
+            commit_started = time.perf_counter()
+            cursor.execute("COMMIT")
+            commit_ms = (time.perf_counter() - commit_started) * 1000
+        except Exception as e:
+            print(f"❌ Group commit of {len(items)} writes failed: {e}")
+            # Drop the handle; a fresh one is opened for the next batch
+            self._connections.discard(db_path)
+            with self._stats_lock:
+                self._stats["failed_commits"] += 1
+            for _, _, future, _ in items:
+                future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        latencies = [(finished - queued) * 1000 for _, _, _, queued in items]
+        with self._stats_lock:
+            stats = self._stats
+            stats["batches"] += 1
+            stats["writes"] += len(items)
+            stats["failed_writes"] += sum(1 for succeeded, _ in outcomes if not succeeded)
+            stats["max_batch_size"] = max(stats["max_batch_size"], len(items))
+            stats["commit_ms_total"] += commit_ms
+            stats["max_commit_ms"] = max(stats["max_commit_ms"], commit_ms)
+            stats["latency_ms_total"] += sum(latencies)
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], max(latencies))
+
+        for (_, _, future, _), (succeeded, value) in zip(items, outcomes):
+            if succeeded:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self) -> dict:
+        """Raw counters so far, plus queue depth and open shard handles."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        stats["handles"] = self._connections.stats()
+        return stats
+
+
+_write_queues = [
+    WriteQueue(
+        GROUP_COMMIT_WINDOW_MS,
+        GROUP_COMMIT_MAX_BATCH,
+        max(1, MAX_OPEN_SHARDS // WRITE_QUEUE_LANES),
+        name=f"group-commit-writer-{lane}",
+    )
+    for lane in range(WRITE_QUEUE_LANES)
+]
+
+
+def _queue_for(db_path: str) -> WriteQueue:
+    """Writer lane of a shard; a shard always maps to the same lane, keeping its writes ordered."""
+    return _write_queues[zlib.crc32(db_path.encode("utf-8")) % len(_write_queues)]
+
+
+def _keyed(write, idempotency_key: str):
+    """Wrap a write so a replay of the same key returns the stored result instead."""
+    def keyed_write(cursor):
+        cursor.execute("SELECT result FROM idempotency_key WHERE key = ?", (idempotency_key,))
+        row = cursor.fetchone()
+        if row:
+            print(f"♻️ Replayed write deduplicated ({idempotency_key[:12]})")
+            return dict(json.loads(row[0]), deduplicated=True)
+
+        result = write(cursor)
+        # Only successful writes are remembered; failures may be retried
+        if isinstance(result, dict) and result.get("status") == "success":
+            cursor.execute(
+                "INSERT INTO idempotency_key (key, result) VALUES (?, ?)",
+                (idempotency_key, json.dumps(result, default=str)),
+            )
+        return result
+
+    return keyed_write
+
+
+def run_write(db_path: str, write, idempotency_key: str = ""):
+    """Run write(cursor) in a transaction and return its result once committed.
+
+    Goes through the group-commit queue when enabled; otherwise uses a
+    dedicated connection and commit. Exceptions raised by write propagate
+    to the caller after its changes are rolled back. With an idempotency
+    key, a repeated call returns the first call's result without writing.
+    """
+    if not idempotency_key:
+        return _run(db_path, write)
+
+    result = _run(db_path, _keyed(write, idempotency_key))
+    # Counted only once the write's transaction has committed
+    with _idempotency_lock:
+        _idempotency_stats["keyed_writes"] += 1
+        if isinstance(result, dict) and result.get("deduplicated"):
+            _idempotency_stats["deduplicated"] += 1
+    return result
+
+
+def _run(db_path: str, write):
+    """Commit write(cursor) through the group-commit queue or a dedicated connection."""
+    if WRITE_QUEUE_ENABLED:
+        return _queue_for(db_path).submit(db_path, write)
+
+    conn = _connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            result = write(cursor)
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+        return result
+    finally:
+        conn.close()
+
+
+def prune_idempotency_keys(cursor):
+    """Delete idempotency keys older than IDEMPOTENCY_TTL_HOURS."""
+    cursor.execute(
+        "DELETE FROM idempotency_key WHERE created_at < datetime('now', ?)",
+        (f"-{IDEMPOTENCY_TTL_HOURS} hours",),
+    )
+
+
+def get_write_queue_stats() -> dict:
+    """Group-commit batch size and latency statistics across lanes, plus idempotency dedupe counts."""
+    lanes = [write_queue.stats() for write_queue in _write_queues]
+    summed = ("batches", "writes", "failed_writes", "failed_commits", "commit_ms_total", "latency_ms_total", "queued")
+    totals = {key: sum(lane[key] for lane in lanes) for key in summed}
+    batches = totals["batches"] or 1
+    writes = totals["writes"] or 1
+    stats = {
+        "enabled": WRITE_QUEUE_ENABLED,
+        "window_ms": GROUP_COMMIT_WINDOW_MS,
+        "max_batch": GROUP_COMMIT_MAX_BATCH,
+        "lanes": len(lanes),
+        "batches": totals["batches"],
+        "writes": totals["writes"],
+        "failed_writes": totals["failed_writes"],
+        "failed_commits": totals["failed_commits"],
+        "avg_batch_size": round(totals["writes"] / batches, 2),
+        "max_batch_size": max(lane["max_batch_size"] for lane in lanes),
+        "avg_commit_ms": round(totals["commit_ms_total"] / batches, 3),
+        "max_commit_ms": round(max(lane["max_commit_ms"] for lane in lanes), 3),
+        "avg_write_latency_ms": round(totals["latency_ms_total"] / writes, 3),
+        "max_write_latency_ms": round(max(lane["max_latency_ms"] for lane in lanes), 3),
+        "queued": totals["queued"],
+        "open_handles": sum(lane["handles"]["open"] for lane in lanes),
+        "evicted_handles": sum(lane["handles"]["evicted"] for lane in lanes),
+    }
+    with _idempotency_lock:
+        stats["idempotency"] = dict(_idempotency_stats)
+    return stats
@@ -0,0 +1,62 @@
+"""
+Export CLI - streams a user's business tables to CSV, NDJSON, Parquet or
+Arrow files in constant memory, without going through the Flask app.
+
+Usage:
+    python export_data.py huzaifa_ejaz --table invoices --format csv > invoices.csv
+    python export_data.py huzaifa_ejaz --table all --format parquet --output-dir exports/
+
+Parquet and Arrow need pyarrow installed.
+"""
+
+import argparse
+import os
+import sys
+
+
+def main():
+    from business_agent.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_QUERIES, ExportError, stream_export, validate_export
+
+    parser = argparse.ArgumentParser(description="Stream a user's business tables to files")
+    parser.add_argument("user_id", help="User whose records to export")
+    parser.add_argument("--table", default="all", help=f"One of: {', '.join(EXPORT_QUERIES)}, or 'all'")
+    parser.add_argument("--format", default="csv", choices=list(EXPORT_FORMATS), help="Output format")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per chunk")
+    parser.add_argument("--output-dir", help="Write one file per table here (required for --table all)")
+    parser.add_argument("--database", help="SQLite database path (defaults to the app's business_agent.db)")
+    args = parser.parse_args()
+
+    if args.database:
+        from business_agent.tools import database_tools
+        database_tools.SESSIONS_DB = f"sqlite:///{args.database}"
+
+    tables = list(EXPORT_QUERIES) if args.table == "all" else [args.table]
+    if len(tables) > 1 and not args.output_dir:
+        parser.error("--output-dir is required when exporting more than one table")
+
+    try:
+        for table in tables:
+            validate_export(table, args.format)
+    except ExportError as e:
+        parser.error(str(e))
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    for table in tables:
+        extension = EXPORT_FORMATS[args.format][1]
+        path = os.path.join(args.output_dir, f"{args.user_id}_{table}.{extension}") if args.output_dir else None
+        output = open(path, "wb") if path else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in stream_export(args.user_id, table, args.format, args.chunk_size):
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if path:
+                output.close()
+        print(f"📤 {table}: {written:,} bytes{f' -> {path}' if path else ''}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
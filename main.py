@@ -3,27 +3,50 @@ Simple Daily Agent Demo - Uses ONE Database (Session DB) with proper ADK tools
 Perfect for consultation demos and simple explanations.
 """
 
-from flask import Flask, request, jsonify
-from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
-from google.adk.tools import ToolContext
-from google.genai import types
+import time
+
+# Phase timings of this process's startup, served by /admin/startup
+_process_started = time.perf_counter()
+STARTUP_PROFILE = {}
+
+from flask import Flask, Response, request, jsonify
+from types import SimpleNamespace
 import uuid
 import os
+import json
+import queue
 import asyncio
-import sqlite3
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Import the agent from 1ess_agent module
-from business_agent.agent import root_agent
+from business_agent.agent import TOOLS
+from business_agent.date_resolution import annotate_message_with_dates
+from business_agent.backup import create_snapshot, get_backup_stats, list_snapshots
+from business_agent.changes import CHANGES_LONG_POLL_SECONDS, CHANGES_PAGE_LIMIT, get_change_feed_stats, wait_for_changes
+from business_agent.export import EXPORT_FORMATS, ExportError, stream_export, validate_export
+from business_agent.prefetch import finish_prefetch, get_prefetch_stats, start_prefetch
+from business_agent.retention import run_retention
+from business_agent import storage
+from business_agent.sharding import SHARD_MODE, shard_summary
+from business_agent.write_queue import get_write_queue_stats
+from business_agent.usage import (
+    BudgetExceededError,
+    check_budget,
+    get_usage,
+    record_usage,
+    summarize_events,
+)
 from business_agent.tools.database_tools import (
     initialize_business_database,
     SESSIONS_DB,
+    session_service_url,
     get_business_data_from_db,
     get_business_insights,
     generate_report,
 )
+from business_agent.tools.analytics_tools import compute_financial_timeseries
 
 # Load environment variables first - following ADK conventions
 load_dotenv()
@@ -31,6 +54,15 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = 'business-analyst-secret-key'
 
+# Default number of concurrent agent turns for /chat/batch and batch_chat.py
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Hours between background retention runs (0 disables; see archive_data.py)
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "0"))
+
+# Hours between background snapshots (0 disables; see backup_data.py)
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "0"))
+
 # Configure Google AI authentication following ADK documentation
 # The API key should be set via environment variables, not hardcoded
 # Environment variables will be loaded from .env file or system environment
@@ -43,24 +75,79 @@ if not os.getenv("GOOGLE_API_KEY") and not (os.getenv("GOOGLE_CLOUD_PROJECT") an
     print("  - Or GOOGLE_CLOUD_PROJECT + GOOGLE_GENAI_USE_VERTEXAI=true (for Vertex AI)")
     exit(1)
 
+STARTUP_PROFILE['imports_ms'] = round((time.perf_counter() - _process_started) * 1000, 1)
+
 # Initialize database with business data
+_phase_started = time.perf_counter()
 initialize_business_database()
+STARTUP_PROFILE['database_init_ms'] = round((time.perf_counter() - _phase_started) * 1000, 1)
 
-# Setup database session service
-try:
-    session_service = DatabaseSessionService(db_url=SESSIONS_DB)
-    print(f"✅ Database session service initialized")
-    print(f"🔗 Database: {SESSIONS_DB}")
-except Exception as e:
-    print(f"❌ Error initializing database session service: {e}")
-    exit(1)
+# The ADK runner, session service and agent load on the first request that
+# needs them, so /health, /data and the other read endpoints start fast
+_agent_runtime = None
+_agent_runtime_lock = threading.Lock()
 
-# Initialize runner with both required arguments
-runner = Runner(
-    agent=root_agent, 
-    session_service=session_service,
-    app_name="business_agent"
-)
+def get_agent_runtime() -> SimpleNamespace:
+    """Import the ADK runtime and build the session service and runner once.
+    
+    Returns:
+        Namespace with root_agent, session_service, runner, run_config and the genai types module
+    """
+    global _agent_runtime
+    if _agent_runtime is None:
+        with _agent_runtime_lock:
+            if _agent_runtime is None:
+                started = time.perf_counter()
+                from google.adk.runners import Runner
+                from google.adk.sessions import DatabaseSessionService
+                from google.genai import types
+                from business_agent.agent import build_run_config, root_agent
+                
+                session_service = DatabaseSessionService(db_url=session_service_url())
+                print(f"✅ Database session service initialized")
+                print(f"🔗 Database: {SESSIONS_DB}")
+                
+                # Initialize runner with both required arguments
+                runner = Runner(
+                    agent=root_agent, 
+                    session_service=session_service,
+                    app_name="business_agent"
+                )
+                run_config = build_run_config()
+                _agent_runtime = SimpleNamespace(
+                    root_agent=root_agent, session_service=session_service, runner=runner,
+                    run_config=run_config, types=types
+                )
+                STARTUP_PROFILE['agent_runtime_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                print(f"🧠 Agent runtime loaded in {STARTUP_PROFILE['agent_runtime_ms']:.0f}ms")
+    return _agent_runtime
+
+def retention_loop():
+    """Periodically archive old events and interactions and vacuum the hot databases."""
+    while True:
+        time.sleep(RETENTION_INTERVAL_HOURS * 3600)
+        try:
+            report = run_retention()
+            print(f"🗄️ Retention: archived {report['events']['rows']} events and {report['interactions']['rows']} interactions, reclaimed {report['reclaimed_bytes']:,} bytes")
+        except Exception as e:
+            print(f"❌ Retention run failed: {e}")
+
+if RETENTION_INTERVAL_HOURS > 0:
+    threading.Thread(target=retention_loop, name="retention", daemon=True).start()
+    print(f"🗄️ Retention job every {RETENTION_INTERVAL_HOURS:g}h")
+
+def backup_loop():
+    """Periodically snapshot every database online and rotate old snapshots."""
+    while True:
+        time.sleep(BACKUP_INTERVAL_HOURS * 3600)
+        try:
+            create_snapshot()
+        except Exception as e:
+            print(f"❌ Backup failed: {e}")
+
+if BACKUP_INTERVAL_HOURS > 0:
+    threading.Thread(target=backup_loop, name="backup", daemon=True).start()
+    print(f"💾 Backup job every {BACKUP_INTERVAL_HOURS:g}h")
 
 async def get_or_create_session(user_id: str):
     """Get or create a session for the user and ensure business data is in state."""
@@ -68,6 +155,8 @@ async def get_or_create_session(user_id: str):
         session_id = f"session_{user_id}"
         app_name = "business_agent"  # Match the app_name in Runner
         
+        session_service = get_agent_runtime().session_service
+        
         # Try to get existing session
         try:
             session = await session_service.get_session(
@@ -102,6 +191,121 @@ async def get_or_create_session(user_id: str):
         print(f"Session error: {e}")
         return f"fallback_{user_id}"
 
+FALLBACK_RESPONSE = "Hello! I'm your business assistant. I can help you check unpaid invoices, manage contacts, create invoices, track expenses, and provide business insights. What would you like to know?"
+
+async def compact_session(user_id: str, session_id: str):
+    """Drop a session's event history while keeping its state, to shrink future prompts."""
+    app_name = "business_agent"
+    session_service = get_agent_runtime().session_service
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if not session:
+        return
+    
+    # app:/user:/temp: keys are stored outside the session and survive on their own
+    state = {key: value for key, value in session.state.items() if ':' not in key}
+    await session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    await session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id, state=state)
+    print(f"🗜️ Compacted session {session_id} ({len(session.events)} events dropped)")
+
+async def run_chat_turn(user_id: str, user_message: str) -> dict:
+    """Run one agent turn for a user and build the chat response payload."""
+    print(f"Processing message: '{user_message}' for user: {user_id}")
+    started = time.perf_counter()
+    
+    # Enforce daily token budgets before spending anything on the model
+    budget = check_budget(user_id)
+    if budget['state'] == 'hard_exceeded':
+        record_usage(user_id, {}, 0.0, refused=True)
+        raise BudgetExceededError(
+            f"Daily token budget of {budget['hard_budget']} exhausted for {user_id} ({budget['tokens_today']} used)"
+        )
+    
+    session_id = await get_or_create_session(user_id)
+    print(f"Using session: {session_id}")
+    
+    if budget['state'] == 'soft_exceeded':
+        await compact_session(user_id, session_id)
+    
+    # Resolve date phrases locally so the model can skip parse_natural_date
+    agent_message, resolved_dates = annotate_message_with_dates(user_message)
+    if resolved_dates:
+        print(f"Pre-resolved {len(resolved_dates)} date phrase(s): {[d['phrase'] for d in resolved_dates]}")
+    
+    # Run the proper ADK agent with tools
+    runtime = get_agent_runtime()
+    content = runtime.types.Content(role='user', parts=[runtime.types.Part(text=agent_message)])
+    
+    # Start likely read-only queries while the first model call is in flight
+    prefetched_tools = start_prefetch(user_id, user_message)
+    
+    print("Running agent...")
+    event_list = []
+    try:
+        async for event in runtime.runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=content,
+            run_config=runtime.run_config
+        ):
+            event_list.append(event)
+    finally:
+        finish_prefetch(user_id)
+    
+    print("Agent executed, processing events...")
+    
+    # Process events to get response
+    agent_response = None
+    tool_calls_count = 0
+    all_text_parts = []
+    
+    print(f"Got {len(event_list)} events")
+    
+    for i, event in enumerate(event_list):
+        print(f"Event {i}: {type(event).__name__}")
+        
+        # Look for any content in events
+        if hasattr(event, 'content') and event.content:
+            if hasattr(event.content, 'parts') and event.content.parts:
+                for part in event.content.parts:
+                    # Check for text content
+                    if hasattr(part, 'text') and part.text and part.text.strip():
+                        text = part.text.strip()
+                        all_text_parts.append(text)
+                        print(f"Found text: {text[:100]}...")
+                    # Check for function calls
+                    elif hasattr(part, 'function_call') and part.function_call:
+                        tool_calls_count += 1
+                        print(f"Found tool call: {part.function_call}")
+    
+    # Combine all text parts or use the last meaningful one
+    if all_text_parts:
+        # Use the last non-empty text part as the final response
+        agent_response = all_text_parts[-1]
+        print(f"Using final text response: {agent_response[:100]}...")
+    
+    # Account model/tool usage for this turn in the daily rollup
+    usage = summarize_events(event_list)
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    record_usage(user_id, usage, latency_ms)
+    
+    result = {
+        'response': agent_response,
+        'session_id': session_id,
+        'tool_calls': tool_calls_count,
+        'events_processed': len(event_list),
+        'resolved_dates': resolved_dates,
+        'prefetched': prefetched_tools,
+        'usage': dict(usage, latency_ms=latency_ms, budget_state=budget['state']),
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    if not (agent_response and agent_response.strip()):
+        # Fallback response when no text response is found
+        result['response'] = FALLBACK_RESPONSE
+        result['fallback'] = True
+    
+    return result
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Proper ADK agent chat endpoint with tools."""
@@ -113,84 +317,12 @@ def chat():
         if not user_message:
             return jsonify({'error': 'Message is required'}), 400
         
-        print(f"Processing message: '{user_message}' for user: {user_id}")
-        
-        # Get session (using asyncio.run for async function in sync context)
-        session_id = asyncio.run(get_or_create_session(user_id))
-        print(f"Using session: {session_id}")
-        
-        # Run the proper ADK agent with tools
-        content = types.Content(role='user', parts=[types.Part(text=user_message)])
-        
         try:
-            print("Running agent...")
-            
-            # Use asyncio.run to handle the async generator
-            async def run_agent():
-                events = []
-                async for event in runner.run_async(
-                    user_id=user_id,
-                    session_id=session_id,
-                    new_message=content
-                ):
-                    events.append(event)
-                return events
-            
-            event_list = asyncio.run(run_agent())
-            
-            print("Agent executed, processing events...")
-            
-            # Process events to get response
-            agent_response = None
-            tool_calls_count = 0
-            all_text_parts = []
-            
-            print(f"Got {len(event_list)} events")
-            
-            for i, event in enumerate(event_list):
-                print(f"Event {i}: {type(event).__name__}")
-                
-                # Look for any content in events
-                if hasattr(event, 'content') and event.content:
-                    if hasattr(event.content, 'parts') and event.content.parts:
-                        for part in event.content.parts:
-                            # Check for text content
-                            if hasattr(part, 'text') and part.text and part.text.strip():
-                                text = part.text.strip()
-                                all_text_parts.append(text)
-                                print(f"Found text: {text[:100]}...")
-                            # Check for function calls
-                            elif hasattr(part, 'function_call') and part.function_call:
-                                tool_calls_count += 1
-                                print(f"Found tool call: {part.function_call}")
-            
-            # Combine all text parts or use the last meaningful one
-            if all_text_parts:
-                # Use the last non-empty text part as the final response
-                agent_response = all_text_parts[-1]
-                print(f"Using final text response: {agent_response[:100]}...")
-            
-            # Return response
-            if agent_response and agent_response.strip():
-                return jsonify({
-                    'response': agent_response,
-                    'session_id': session_id,
-                    'tool_calls': tool_calls_count,
-                    'events_processed': len(event_list),
-                    'timestamp': datetime.now().isoformat()
-                })
-            else:
-                # Fallback response when no text response is found
-                return jsonify({
-                    'response': "Hello! I'm your business assistant. I can help you check unpaid invoices, manage contacts, create invoices, track expenses, and provide business insights. What would you like to know?",
-                    'session_id': session_id,
-                    'tool_calls': tool_calls_count,
-                    'events_processed': len(event_list),
-                    'fallback': True,
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-                
+            # Use asyncio.run to drive the async agent from this sync endpoint
+            return jsonify(asyncio.run(run_chat_turn(user_id, user_message)))
+        except BudgetExceededError as e:
+            print(f"⛔ {e}")
+            return jsonify({'error': str(e), 'budget': check_budget(user_id)}), 429
         except Exception as e:
             print(f"Error running agent: {e}")
             return jsonify({'error': f'Agent execution error: {str(e)}'}), 500
@@ -199,6 +331,91 @@ def chat():
         print(f"Chat endpoint error: {e}")
         return jsonify({'error': str(e)}), 500
 
+async def run_batch(jobs: list, concurrency: int = DEFAULT_BATCH_CONCURRENCY):
+    """Run chat jobs concurrently and yield each result as it completes.
+
+    Jobs for different users run in parallel up to `concurrency`; jobs for the
+    same user are serialized because they share one session.
+
+    Args:
+        jobs: List of dicts with user_id, message and an optional job_id
+        concurrency: Maximum number of turns in flight at once
+
+    Yields:
+        One result dict per job, in completion order
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    user_locks = {}
+    
+    async def run_job(index: int, job: dict) -> dict:
+        job_id = job.get('job_id', index)
+        user_id = job.get('user_id', 'demo_user')
+        user_message = job.get('message', '')
+        
+        if not user_message:
+            return {'job_id': job_id, 'user_id': user_id, 'status': 'error',
+                    'error': 'Message is required', 'elapsed_ms': 0.0}
+        
+        lock = user_locks.setdefault(user_id, asyncio.Lock())
+        async with semaphore, lock:
+            started = time.perf_counter()
+            try:
+                result = await run_chat_turn(user_id, user_message)
+                result.update({'job_id': job_id, 'user_id': user_id, 'status': 'success'})
+            except Exception as e:
+                print(f"❌ Batch job {job_id} failed: {e}")
+                result = {'job_id': job_id, 'user_id': user_id, 'status': 'error',
+                          'error': f'Agent execution error: {str(e)}'}
+            result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+    
+    tasks = [asyncio.ensure_future(run_job(i, job)) for i, job in enumerate(jobs)]
+    for completed in asyncio.as_completed(tasks):
+        yield await completed
+
+def stream_batch_ndjson(jobs: list, concurrency: int = DEFAULT_BATCH_CONCURRENCY):
+    """Run a batch on a background event loop and yield NDJSON lines as jobs finish."""
+    results = queue.Queue()
+    done = object()
+    
+    def worker():
+        async def drain():
+            async for result in run_batch(jobs, concurrency):
+                results.put(result)
+        try:
+            asyncio.run(drain())
+        except Exception as e:
+            results.put({'status': 'error', 'error': f'Batch execution error: {str(e)}'})
+        finally:
+            results.put(done)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    
+    while True:
+        result = results.get()
+        if result is done:
+            break
+        yield json.dumps(result, default=str) + "\n"
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Run many users' messages concurrently and stream results back as NDJSON."""
+    data = request.json or {}
+    jobs = data.get('jobs', [])
+    
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({'error': 'jobs must be a non-empty list of {user_id, message}'}), 400
+    try:
+        concurrency = int(data.get('concurrency', DEFAULT_BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        concurrency = 0
+    if concurrency < 1:
+        return jsonify({'error': 'concurrency must be a positive integer'}), 400
+    
+    print(f"📦 Batch of {len(jobs)} jobs with concurrency {concurrency}")
+    return Response(stream_batch_ndjson(jobs, concurrency), mimetype='application/x-ndjson')
+
+
 @app.route('/data', methods=['GET'])
 def get_data():
     """Direct endpoint to get business data from database."""
@@ -226,6 +443,48 @@ def get_data():
         print(f"❌ Data endpoint error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/changes', methods=['GET'])
+def changes():
+    """Long-poll a user's change feed for rows inserted, updated or deleted after the since cursor."""
+    user_id = request.args.get('user_id', 'demo_user')
+    try:
+        since = int(request.args.get('since', 0))
+        timeout = min(max(float(request.args.get('timeout', CHANGES_LONG_POLL_SECONDS)), 0.0), CHANGES_LONG_POLL_SECONDS)
+        limit = min(max(int(request.args.get('limit', CHANGES_PAGE_LIMIT)), 1), CHANGES_PAGE_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers, timeout a number of seconds'}), 400
+    
+    try:
+        return jsonify(wait_for_changes(user_id, since, timeout, limit))
+    except Exception as e:
+        print(f"❌ Changes endpoint error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/changes/stats', methods=['GET'])
+def change_feed_stats():
+    """Long polls answered immediately, woken by a write, timed out or reset."""
+    return jsonify(get_change_feed_stats())
+
+@app.route('/export', methods=['GET'])
+def export():
+    """Stream one of a user's tables as CSV, NDJSON, Parquet or Arrow in constant memory."""
+    user_id = request.args.get('user_id', 'demo_user')
+    table = request.args.get('table', 'invoices')
+    export_format = request.args.get('format', 'csv').lower()
+    
+    try:
+        validate_export(table, export_format)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    print(f"📤 Exporting {table} for {user_id} as {export_format}")
+    return Response(
+        stream_export(user_id, table, export_format),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{user_id}_{table}.{extension}"'},
+    )
+
 @app.route('/sessions', methods=['GET'])
 def list_sessions():
     """List sessions."""
@@ -235,7 +494,7 @@ def list_sessions():
         
         async def get_session_info():
             try:
-                session = await session_service.get_session(
+                session = await get_agent_runtime().session_service.get_session(
                     app_name="business_agent",
                     user_id=user_id,
                     session_id=session_id
@@ -264,36 +523,95 @@ def list_sessions():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/timeseries', methods=['GET'])
+def timeseries():
+    """Gap-filled revenue/expense/net profit series for dashboards."""
+    try:
+        user_id = request.args.get('user_id', 'demo_user')
+        result = compute_financial_timeseries(
+            user_id,
+            request.args.get('granularity', 'month'),
+            request.args.get('start', ''),
+            request.args.get('end', ''),
+        )
+        return jsonify(result), 200 if result['status'] == 'success' else 400
+    except Exception as e:
+        print(f"❌ Timeseries endpoint error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/usage', methods=['GET'])
+def usage():
+    """Per-user daily token, round-trip and tool-time usage with budget state."""
+    try:
+        user_id = request.args.get('user_id', 'demo_user')
+        days = int(request.args.get('days', 30))
+        return jsonify(get_usage(user_id, days))
+    except Exception as e:
+        print(f"❌ Usage endpoint error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/prefetch/stats', methods=['GET'])
+def prefetch_stats():
+    """Hit and waste ratios of the speculative data prefetch."""
+    return jsonify(get_prefetch_stats())
+
+@app.route('/writes/stats', methods=['GET'])
+def write_stats():
+    """Group-commit batch sizes and commit latency of the write queue."""
+    return jsonify(get_write_queue_stats())
+
+@app.route('/admin/shards', methods=['GET'])
+def admin_shards():
+    """Per-shard file sizes and row counts, fanned out across every shard."""
+    try:
+        return jsonify(shard_summary())
+    except Exception as e:
+        print(f"❌ Shard summary error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/backups', methods=['GET'])
+def admin_backups():
+    """Backup duration and pages-per-step metrics, plus the snapshots on disk."""
+    try:
+        return jsonify({'stats': get_backup_stats(), 'snapshots': list_snapshots()})
+    except Exception as e:
+        print(f"❌ Backup listing error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/startup', methods=['GET'])
+def admin_startup():
+    """Startup phase timings: imports, database init and (once loaded) the agent runtime."""
+    return jsonify(STARTUP_PROFILE)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
     try:
         # Check database connectivity and table status
         db_path = SESSIONS_DB.replace("sqlite:///", "")
-        conn = sqlite3.connect(db_path)
+        conn = storage.raw_connection(db_path)
         cursor = conn.cursor()
         
         # Get table info
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
         tables = [row[0] for row in cursor.fetchall()]
-        
-        # Get counts for business tables
-        table_counts = {}
-        business_tables = ['user', 'contact', 'invoice', 'revenue', 'expense', 'event', 'interaction']
-        for table in business_tables:
-            if table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                table_counts[table] = cursor.fetchone()[0]
-        
         conn.close()
         
+        # Business tables may be spread over shards; count across all of them
+        shards = shard_summary()
+        table_counts = shards['totals']
+        
         return jsonify({
             'status': 'healthy',
             'app': 'business_analyst_agent',
             'database': SESSIONS_DB,
-            'tools_available': len(root_agent.tools),
+            'shard_mode': SHARD_MODE,
+            'shard_count': shards['shard_count'],
+            'tools_available': len(TOOLS),
+            'agent_loaded': _agent_runtime is not None,
             'database_tables': tables,
             'business_data_counts': table_counts,
+            'connection_pools': storage.pool_stats(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -305,12 +623,22 @@ def health():
 
 if __name__ == '__main__':
     print("🚀 Starting Business Analyst Agent...")
-    print(f"🧠 Agent: {root_agent.name} | Model: {root_agent.model}")
-    print(f"🛠️  Tools Available: {len(root_agent.tools)}")
-    print(f"🗃️  Database: {SESSIONS_DB}")
+    print(f"🧠 Agent loads on the first chat request (startup took {STARTUP_PROFILE['imports_ms'] + STARTUP_PROFILE['database_init_ms']:.0f}ms)")
+    print(f"🛠️  Tools Available: {len(TOOLS)}")
+    print(f"🗃️  Database: {SESSIONS_DB} (shard mode: {SHARD_MODE})")
     print("💬 Chat endpoint: POST http://localhost:5000/chat")
+    print("📦 Batch chat: POST http://localhost:5000/chat/batch (NDJSON stream)")
     print("📊 Data endpoint: GET http://localhost:5000/data?type=insights")
     print("📝 Sessions: GET /sessions?user_id=huzaifa_ejaz")
+    print("📈 Time series: GET /timeseries?user_id=huzaifa_ejaz&granularity=month")
+    print("🔁 Changes: GET /changes?user_id=huzaifa_ejaz&since=0 (long poll)")
+    print("📤 Export: GET /export?user_id=huzaifa_ejaz&table=invoices&format=csv")
+    print("💸 Usage: GET /usage?user_id=huzaifa_ejaz&days=30")
+    print("⚡ Prefetch stats: GET /prefetch/stats")
+    print("✍️  Write queue stats: GET /writes/stats")
+    print("🧩 Shards: GET /admin/shards")
+    print("💾 Backups: GET /admin/backups")
+    print("⏱️  Startup profile: GET /admin/startup")
     print("🔍 Health check: GET http://localhost:5000/health")
     print("\n🌐 Starting Flask server...")
     
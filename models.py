@@ -1,22 +1,31 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
 
 db = SQLAlchemy()
 
+# These models are the single source of truth for the business tables:
+# business_agent/storage.py creates the tables and compiles the tools'
+# statements from them. User IDs are the session user_id strings and dates
+# are stored as ISO-8601 text ("2025-01-15", events "2025-01-15 14:00:00"),
+# exactly as the agent tools read and write them.
+
 class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(255), unique=True, nullable=False)
-    name = db.Column(db.String(255))
+    id = db.Column(db.Text, primary_key=True)
+    name = db.Column(db.Text, nullable=False)
+    email = db.Column(db.Text)
+    company = db.Column(db.Text)
+    phone = db.Column(db.Text)
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
 class Contact(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    name = db.Column(db.String(100))
-    email = db.Column(db.String(120))
-    phone = db.Column(db.String(20))
-    company = db.Column(db.String(100))
+    user_id = db.Column(db.Text, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.Text, nullable=False)
+    email = db.Column(db.Text)
+    company = db.Column(db.Text)
+    phone = db.Column(db.Text)
     notes = db.Column(db.Text)
-    status = db.Column(db.String(20), default='lead')
+    status = db.Column(db.Text, server_default='lead')  # 'lead', 'prospect', 'client', 'inactive'
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
     user = db.relationship('User', backref=db.backref('contacts', lazy=True))
 
@@ -25,54 +34,59 @@ class Contact(db.Model):
 
 class Invoice(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'), nullable=False)
-    issue_date = db.Column(db.Date, default=datetime.today)
-    due_date = db.Column(db.Date)
-    total_amount = db.Column(db.Float)
-    status = db.Column(db.String(20), default='unpaid')  # 'unpaid', 'paid'
+    user_id = db.Column(db.Text, db.ForeignKey('user.id'), nullable=False)
+    contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'))
+    issue_date = db.Column(db.Text)
+    due_date = db.Column(db.Text)
+    total_amount = db.Column(db.REAL, nullable=False)
+    status = db.Column(db.Text, nullable=False)  # 'unpaid', 'paid', 'overdue'
     notes = db.Column(db.Text)
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
     user = db.relationship('User', backref=db.backref('invoices', lazy=True))
     contact = db.relationship('Contact', backref=db.backref('invoices', lazy=True))
 
 class Revenue(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    invoice_id = db.Column(db.Integer, db.ForeignKey('invoice.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
-    date = db.Column(db.Date, default=datetime.today)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoice.id'))
+    amount = db.Column(db.REAL, nullable=False)
+    date = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
-    invoice = db.relationship('Invoice', backref=db.backref('revenue', uselist=False))
+    invoice = db.relationship('Invoice', backref=db.backref('revenue', lazy=True))
 
 class Interaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'), nullable=False)
-    date = db.Column(db.Date, default=datetime.today)
-    type = db.Column(db.String(20))  # 'call', 'email', etc.
+    user_id = db.Column(db.Text, db.ForeignKey('user.id'), nullable=False)
+    contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'))
+    date = db.Column(db.Text, nullable=False)
+    type = db.Column(db.Text, nullable=False)  # 'call', 'email', 'meeting', 'note'
     summary = db.Column(db.Text)
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
     user = db.relationship('User', backref=db.backref('interactions', lazy=True))
     contact = db.relationship('Contact', backref=db.backref('interactions', lazy=True))
 
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'), nullable=True)
-    title = db.Column(db.String(200), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Text, db.ForeignKey('user.id'), nullable=False)
+    contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'))
+    title = db.Column(db.Text, nullable=False)
+    date = db.Column(db.Text, nullable=False)
     description = db.Column(db.Text)
-    location = db.Column(db.String(200))
+    location = db.Column(db.Text)
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
     user = db.relationship('User', backref=db.backref('events', lazy=True))
     contact = db.relationship('Contact', backref=db.backref('events', lazy=True))
 
 class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
-    category = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Text, db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.REAL, nullable=False)
+    category = db.Column(db.Text, nullable=False)
     description = db.Column(db.Text)
-    date = db.Column(db.Date, default=datetime.today)
+    date = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
-    user = db.relationship('User', backref=db.backref('expenses', lazy=True)) 
\ No newline at end of file
+    user = db.relationship('User', backref=db.backref('expenses', lazy=True))
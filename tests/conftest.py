@@ -0,0 +1,37 @@
+"""Shared fixtures: every test gets its own scratch database files."""
+
+import pytest
+
+from business_agent import contact_resolution, sharding
+from business_agent.tools import analytics_tools, database_tools
+
+USER_ID = database_tools.SAMPLE_USER_ID
+
+
+class FakeToolContext:
+    """Stand-in for the ADK ToolContext the tools read user_id and the call IDs from."""
+
+    def __init__(self, user_id: str = USER_ID, invocation_id: str = None, function_call_id: str = None):
+        self.state = {"user_id": user_id}
+        self.invocation_id = invocation_id
+        self.function_call_id = function_call_id
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fresh main database seeded with the sample data; returns its path."""
+    path = str(tmp_path / "business_agent.db")
+    monkeypatch.setattr(database_tools, "SESSIONS_DB", f"sqlite:///{path}")
+    monkeypatch.setattr(sharding, "_migrated", set())
+    monkeypatch.setattr(database_tools, "_data_versions", {})
+    monkeypatch.setattr(database_tools, "_version_floor", 0)
+    monkeypatch.setattr(contact_resolution, "_indexes", {})
+    monkeypatch.setattr(analytics_tools, "_series_cache", analytics_tools.ResultCache(analytics_tools.MAX_CACHED_SERIES))
+    monkeypatch.setattr(analytics_tools, "_forecast_cache", analytics_tools.ResultCache(analytics_tools.MAX_CACHED_SERIES))
+    database_tools.initialize_business_database()
+    return path
+
+
+@pytest.fixture
+def tool_context():
+    return FakeToolContext()
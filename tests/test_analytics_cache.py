@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from business_agent.tools import analytics_tools
+from business_agent.tools.analytics_tools import ResultCache, compute_cash_flow_forecast, compute_financial_timeseries
+from tests.conftest import USER_ID
+
+
+def _write_from_another_process(db_path, sql, params):
+    """Commit on a plain connection, bypassing the tools and their in-process version bump."""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_unchanged_data_is_served_from_cache(db_path):
+    first = compute_financial_timeseries(USER_ID, "month", "2024-01-01", "2024-12-31")
+    assert first["status"] == "success"
+    assert compute_financial_timeseries(USER_ID, "month", "2024-01-01", "2024-12-31") is first
+
+
+def test_series_sees_writes_committed_elsewhere(db_path):
+    before = compute_financial_timeseries(USER_ID, "month", "2024-01-01", "2024-12-31")
+    _write_from_another_process(
+        db_path,
+        "INSERT INTO expense (user_id, description, amount, category, date) VALUES (?, ?, ?, ?, ?)",
+        (USER_ID, "Printer", 300.0, "Office Supplies", "2024-06-15"),
+    )
+
+    after = compute_financial_timeseries(USER_ID, "month", "2024-01-01", "2024-12-31")
+    assert after is not before
+    assert after["totals"]["expenses"] == before["totals"]["expenses"] + 300.0
+
+
+def test_forecast_sees_writes_committed_elsewhere(db_path):
+    before = compute_cash_flow_forecast(USER_ID, 365, "week", 0)
+    assert compute_cash_flow_forecast(USER_ID, 365, "week", 0) is before
+
+    due = (datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d")
+    _write_from_another_process(
+        db_path,
+        "INSERT INTO invoice (user_id, contact_id, due_date, total_amount, status) VALUES (?, ?, ?, ?, ?)",
+        (USER_ID, None, due, 900.0, "unpaid"),
+    )
+
+    after = compute_cash_flow_forecast(USER_ID, 365, "week", 0)
+    assert after["summary"]["expected_inflows"] == before["summary"]["expected_inflows"] + 900.0
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(2)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    assert cache.get("a", 1) == "A"
+    cache.put("c", 1, "C")
+
+    assert len(cache) == 2
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "A"
+    assert cache.get("c", 1) == "C"
+
+
+def test_result_cache_ignores_other_versions():
+    cache = ResultCache(analytics_tools.MAX_CACHED_SERIES)
+    cache.put("a", 1, "A")
+    assert cache.get("a", 2) is None
+    cache.put("a", 2, "A2")
+    assert cache.get("a", 2) == "A2"
+    assert len(cache) == 1
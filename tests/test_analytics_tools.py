@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+import pytest
+
+from business_agent import storage
+from business_agent.tools.analytics_tools import (
+    compute_financial_timeseries,
+    get_ar_aging,
+    get_top_rankings,
+    list_open_invoices,
+)
+from tests.conftest import USER_ID, FakeToolContext
+
+# Days past due of one open invoice each, on both sides of every bucket edge
+DAYS_PAST_DUE = [-5, 0, 1, 30, 31, 60, 61, 90, 91]
+
+
+@pytest.fixture
+def aging_context(db_path):
+    """A user whose only invoices are open ones due DAYS_PAST_DUE days ago."""
+    user_id = "aging_user"
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute("INSERT INTO user (id, name, email) VALUES (?, 'Aging User', 'aging@example.com')", (user_id,))
+        for days in DAYS_PAST_DUE:
+            due = (date.today() - timedelta(days=days)).isoformat()
+            conn.execute(
+                "INSERT INTO invoice (user_id, contact_id, issue_date, due_date, total_amount, status, notes) "
+                "VALUES (?, NULL, ?, ?, ?, 'unpaid', ?)",
+                (user_id, due, due, 100.0 + days, f"{days} days"),
+            )
+        conn.execute(
+            "INSERT INTO invoice (user_id, contact_id, issue_date, due_date, total_amount, status, notes) "
+            "VALUES (?, NULL, '2020-01-01', '2020-01-31', 5000.0, 'paid', 'Paid long ago')",
+            (user_id,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return FakeToolContext(user_id)
+
+
+def _periods(result):
+    return [(point["period"], point["revenue"], point["expenses"]) for point in result["series"]]
+
+
+def test_monthly_series_is_gap_filled_from_the_first_full_month(db_path):
+    result = compute_financial_timeseries(USER_ID, "month", "2024-10-15", "2025-01-10")
+
+    assert result["start_date"] == "2024-10-01"
+    assert _periods(result) == [
+        ("2024-10-01", 0, 0),
+        ("2024-11-01", 0, 0),
+        ("2024-12-01", 4000.0, 2200.0),
+        ("2025-01-01", 0, 0),
+    ]
+    assert result["totals"] == {"revenue": 4000.0, "expenses": 2200.0, "net_profit": 1800.0}
+
+
+def test_weekly_buckets_start_on_monday(db_path):
+    # 2024-12-01 and 2024-12-15 are Sundays and close the week before them
+    result = compute_financial_timeseries(USER_ID, "week", "2024-11-28", "2024-12-22")
+
+    assert _periods(result) == [
+        ("2024-11-25", 0, 1200.0),
+        ("2024-12-02", 0, 0),
+        ("2024-12-09", 1500.0, 450.0),
+        ("2024-12-16", 2500.0, 550.0),
+    ]
+
+
+def test_an_unknown_granularity_is_an_error(db_path):
+    assert compute_financial_timeseries(USER_ID, "year", "", "")["status"] == "error"
+
+
+def test_aging_buckets_split_at_30_60_and_90_days(aging_context):
+    result = get_ar_aging(aging_context)
+    totals = result["totals"]
+
+    assert totals["invoice_count"] == len(DAYS_PAST_DUE)
+    assert [totals[f"{name}_count"] for name in ("current", "days_1_30", "days_31_60", "days_61_90", "days_over_90")] \
+        == [2, 2, 2, 2, 1]
+    assert totals["days_31_60_amount"] == 131.0 + 160.0
+    assert totals["days_over_90_amount"] == 191.0
+    assert result["overdue_amount"] == round(totals["total_outstanding"] - 95.0 - 100.0, 2)
+    assert result["contacts"][0]["oldest_days_past_due"] == 91
+
+
+def test_open_invoice_pages_cover_every_invoice_once(aging_context):
+    pages = [list_open_invoices(page, 4, "", aging_context) for page in (1, 2, 3)]
+
+    assert [page["has_more"] for page in pages] == [True, True, False]
+    days = [invoice["days_past_due"] for page in pages for invoice in page["invoices"]]
+    assert days == sorted(DAYS_PAST_DUE, reverse=True)
+    assert list_open_invoices(4, 4, "", aging_context)["invoices"] == []
+
+
+def test_open_invoices_filtered_to_one_bucket(aging_context):
+    result = list_open_invoices(1, 10, "days_61_90", aging_context)
+
+    assert [invoice["days_past_due"] for invoice in result["invoices"]] == [90, 61]
+    assert list_open_invoices(1, 10, "days_91_plus", aging_context)["status"] == "error"
+
+
+def test_rankings_report_each_rows_share_of_the_total(db_path, tool_context):
+    result = get_top_rankings("expense_categories", 2, "all_time", tool_context)
+
+    assert [(row["name"], row["total"], row["share_pct"]) for row in result["rankings"]] == [
+        ("Software", 1200.0, 54.55),
+        ("Travel", 450.0, 20.45),
+    ]
+    assert result["grand_total"] == 2200.0
+    assert result["top_share_pct"] == 75.0
+
+
+def test_open_invoice_rankings_share_the_outstanding_total(db_path, tool_context):
+    result = get_top_rankings("open_invoices", 5, "all_time", tool_context)
+
+    assert [(row["invoice_id"], row["share_pct"]) for row in result["rankings"]] == [(3, 64.0), (2, 36.0)]
+    assert result["top_share_pct"] == 100.0
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+
+import pytest
+
+from business_agent import backup, contact_resolution
+from business_agent.tools import database_tools
+from business_agent.tools.analytics_tools import compute_financial_timeseries
+from tests.conftest import USER_ID
+
+
+@pytest.fixture
+def backups(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path / "backups"))
+    monkeypatch.setattr(backup, "BACKUP_STEP_PAUSE_MS", 0)
+    return db_path
+
+
+def _expense_total(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT SUM(amount) FROM expense").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_snapshots_are_verified_and_listed(backups):
+    manifest = backup.create_snapshot(compress=True, keep=0)
+
+    assert [entry["name"] for entry in manifest["files"]] == ["business_agent.db.gz"]
+    entry = manifest["files"][0]
+    assert entry["integrity"] == "ok"
+    assert entry["compressed_bytes"] < entry["size_bytes"]
+    assert os.path.exists(os.path.join(backup.backup_dir(), manifest["snapshot"], entry["name"]))
+    assert [listed["snapshot"] for listed in backup.list_snapshots()] == [manifest["snapshot"]]
+
+
+def test_restore_in_place_rolls_back_later_writes(backups, tool_context):
+    before = _expense_total(backups)
+    snapshot = backup.create_snapshot(compress=True, keep=0)["snapshot"]
+
+    database_tools.create_expense(999.0, "Equipment", tool_context, "Laptop", "2025-05-01")
+    assert _expense_total(backups) == before + 999.0
+
+    backup.restore_snapshot(snapshot)
+    assert _expense_total(backups) == before
+
+
+def test_cached_series_do_not_survive_a_restore(backups, tool_context):
+    snapshot = backup.create_snapshot(compress=True, keep=0)["snapshot"]
+    database_tools.create_expense(999.0, "Equipment", tool_context, "Laptop", "2025-05-01")
+    compute_financial_timeseries(USER_ID, "month", "2025-01-01", "2025-12-31")
+
+    # After the restore the next write reuses the change_log sequence number the cached series saw
+    backup.restore_snapshot(snapshot)
+    database_tools.create_expense(5.0, "Meals", tool_context, "Coffee", "2025-05-01")
+
+    may = compute_financial_timeseries(USER_ID, "month", "2025-01-01", "2025-12-31")["series"][4]
+    assert may["expenses"] == 5.0
+
+
+def test_contact_index_does_not_survive_a_restore(backups, tool_context):
+    snapshot = backup.create_snapshot(compress=True, keep=0)["snapshot"]
+    created = database_tools.create_contact("Priya Raman", tool_context, "priya@example.com", "", "", "", "lead")
+    assert contact_resolution.resolve_contact_name(USER_ID, "Priya Raman")["contact"]["id"] == created["contact_id"]
+
+    backup.restore_snapshot(snapshot)
+    # One unrelated write used to bring the data version back to the one the index was built at
+    database_tools.create_expense(12.0, "Meals", tool_context, "Lunch", "2025-05-03")
+
+    assert contact_resolution.resolve_contact_name(USER_ID, "Priya Raman")["contact"] is None
+
+
+def test_restore_to_a_directory_leaves_live_files_alone(backups, tmp_path, tool_context):
+    snapshot = backup.create_snapshot(compress=False, keep=0)["snapshot"]
+    database_tools.create_expense(50.0, "Meals", tool_context, "Dinner", "2025-05-02")
+
+    restored = backup.restore_snapshot(snapshot, str(tmp_path / "inspect"))
+    assert restored == [("business_agent.db", str(tmp_path / "inspect" / "business_agent.db"))]
+    assert _expense_total(restored[0][1]) == _expense_total(backups) - 50.0
+
+
+def test_a_corrupted_snapshot_is_refused(backups):
+    manifest = backup.create_snapshot(compress=True, keep=0)
+    with open(os.path.join(backup.backup_dir(), manifest["snapshot"], "business_agent.db.gz"), "ab") as f:
+        f.write(b"tampered")
+
+    with pytest.raises(backup.BackupError, match="Checksum mismatch"):
+        backup.restore_snapshot(manifest["snapshot"])
+    with pytest.raises(backup.BackupError, match="not found"):
+        backup.restore_snapshot("19700101T000000Z")
+
+
+def test_rotation_keeps_the_newest(backups):
+    names = [backup.create_snapshot(compress=False, keep=0)["snapshot"] for _ in range(3)]
+
+    assert backup.rotate_snapshots(keep=2) == [names[0]]
+    assert [manifest["snapshot"] for manifest in backup.list_snapshots()] == names[:0:-1]
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from business_agent import changes, storage
+from business_agent.tools import database_tools
+from tests.conftest import USER_ID, FakeToolContext
+
+
+def _head():
+    return changes.read_changes(USER_ID, 0, 1)["head"]
+
+
+def test_writes_are_logged_in_order(db_path, tool_context):
+    since = _head()
+    created = database_tools.create_expense(80.0, "Travel", tool_context, "Train", "2025-04-01")
+    database_tools.create_contact("Nora Quinn", tool_context, "nora@example.com", "", "", "", "lead")
+
+    feed = changes.read_changes(USER_ID, since, 10)
+    assert [(change["table"], change["op"]) for change in feed["changes"]] == [("expense", "insert"), ("contact", "insert")]
+    assert feed["changes"][0]["row_id"] == created["expense_id"]
+    assert feed["next_since"] == feed["head"] == feed["changes"][-1]["seq"]
+    assert not feed["reset"]
+
+
+def test_feeds_are_per_user(db_path):
+    since = _head()
+    database_tools.create_expense(5.0, "Meals", FakeToolContext("other_user"), "Coffee", "2025-04-02")
+
+    assert changes.read_changes(USER_ID, since, 10)["changes"] == []
+    assert len(changes.read_changes("other_user", since, 10)["changes"]) == 1
+
+
+def test_pages_are_bounded(db_path):
+    feed = changes.read_changes(USER_ID, 0, 5)
+    assert len(feed["changes"]) == 5
+    assert feed["more"]
+    assert changes.read_changes(USER_ID, feed["next_since"], 500)["changes"][0]["seq"] > feed["next_since"]
+
+
+def test_a_cursor_behind_pruned_entries_is_reset(db_path, monkeypatch):
+    head = _head()
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute("UPDATE change_log SET changed_at = datetime('now', '-30 days')")
+        monkeypatch.setattr(changes, "CHANGE_LOG_RETENTION_HOURS", 24)
+        assert changes.prune_change_log(conn.cursor()) == head
+        conn.commit()
+    finally:
+        conn.close()
+
+    feed = changes.read_changes(USER_ID, 1, 10)
+    assert feed["reset"] and feed["next_since"] == head
+    # Following on from head after a reload misses nothing
+    assert not changes.read_changes(USER_ID, head, 10)["reset"]
+
+
+def test_a_cursor_ahead_of_the_log_is_reset(db_path):
+    assert changes.read_changes(USER_ID, _head() + 100, 10)["reset"]
+
+
+def test_an_idle_long_poll_times_out_empty(db_path):
+    feed = changes.wait_for_changes(USER_ID, _head(), timeout=0.05)
+    assert feed["changes"] == [] and not feed["reset"]
+
+
+def test_a_long_poll_wakes_on_commit(db_path, monkeypatch):
+    # A long recheck interval proves the wake-up came from the notification, not polling
+    monkeypatch.setattr(changes, "CHANGES_RECHECK_SECONDS", 30)
+    since = _head()
+    writer = threading.Timer(
+        0.1, database_tools.create_expense, (15.0, "Meals", FakeToolContext(), "Bagels", "2025-04-03")
+    )
+
+    started = time.monotonic()
+    writer.start()
+    feed = changes.wait_for_changes(USER_ID, since, timeout=10)
+    writer.join()
+
+    assert time.monotonic() - started < 5
+    assert [change["table"] for change in feed["changes"]] == ["expense"]
+    assert changes.get_change_feed_stats()["woken"] >= 1
@@ -0,0 +1,57 @@
+import importlib
+import json
+
+import pytest
+
+from business_agent import agent
+from business_agent.tools import database_tools
+
+
+@pytest.fixture(scope="module")
+def main_module(tmp_path_factory):
+    """Import main.py against a scratch working directory so its startup database init stays out of the repo."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("main"))
+        patch.setenv("GOOGLE_API_KEY", "test-key")
+        yield importlib.import_module("main")
+
+
+@pytest.fixture
+def client(main_module, monkeypatch):
+    async def fake_chat_turn(user_id, message):
+        return {"response": f"echo: {message}"}
+
+    monkeypatch.setattr(main_module, "run_chat_turn", fake_chat_turn)
+    return main_module.app.test_client()
+
+
+JOBS = [{"user_id": "a", "message": "hi"}, {"user_id": "b", "message": "hello"}]
+
+
+@pytest.mark.parametrize("concurrency", ["lots", None, [2], 0, -3])
+def test_invalid_concurrency_is_rejected(client, concurrency):
+    response = client.post("/chat/batch", json={"jobs": JOBS, "concurrency": concurrency})
+    assert response.status_code == 400
+    assert "concurrency" in response.get_json()["error"]
+
+
+def test_missing_jobs_are_rejected(client):
+    response = client.post("/chat/batch", json={"jobs": [], "concurrency": 2})
+    assert response.status_code == 400
+
+
+def test_batch_streams_one_line_per_job(client):
+    response = client.post("/chat/batch", json={"jobs": JOBS, "concurrency": "2"})
+    assert response.status_code == 200
+
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(result["response"] for result in results) == ["echo: hello", "echo: hi"]
+    assert all(result["status"] == "success" for result in results)
+
+
+def test_sync_tools_run_on_a_thread_pool(main_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(database_tools, "SESSIONS_DB", f"sqlite:///{tmp_path / 'sessions.db'}")
+    monkeypatch.setattr(main_module, "_agent_runtime", None)
+
+    run_config = main_module.get_agent_runtime().run_config
+    assert run_config.tool_thread_pool_config.max_workers == agent.TOOL_THREAD_WORKERS
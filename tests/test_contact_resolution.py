@@ -0,0 +1,47 @@
+import pytest
+
+from business_agent import contact_resolution
+from business_agent.tools import database_tools
+from business_agent.tools.database_tools import create_event, create_invoice, log_interaction
+
+
+@pytest.mark.parametrize("query", ["Sara Jonson", "Sarah from Design Studio", "sarah@designstudio.com"])
+def test_fuzzy_names_resolve_to_one_contact(db_path, query):
+    resolution = contact_resolution.resolve_contact_name("huzaifa_ejaz", query)
+    assert resolution["contact"]["id"] == 2
+
+
+def test_unknown_names_return_no_contact(db_path):
+    assert contact_resolution.resolve_contact_name("huzaifa_ejaz", "Zebulon Quartz")["contact"] is None
+
+
+def test_create_invoice_by_contact_name(db_path, tool_context):
+    result = create_invoice(contact_id=0, tool_context=tool_context, issue_date="2025-02-01", due_date="2025-03-01",
+                            total_amount=900.0, status="unpaid", notes="", contact_name="Mike Wilson")
+    assert result["status"] == "success"
+    assert result["contact_id"] == 3
+
+
+def test_index_is_rebuilt_after_a_write(db_path, tool_context):
+    assert contact_resolution.resolve_contact_name("huzaifa_ejaz", "Priya Raman")["contact"] is None
+    database_tools.create_contact(name="Priya Raman", tool_context=tool_context, email="priya@example.com",
+                                  phone="", company="Raman Labs", notes="", status="lead")
+    assert contact_resolution.resolve_contact_name("huzaifa_ejaz", "Priya Raman")["contact"]["name"] == "Priya Raman"
+
+
+@pytest.mark.parametrize("call", [
+    lambda context: create_invoice(contact_id=0, tool_context=context, issue_date="", due_date="", total_amount=1.0,
+                                   status="unpaid", notes="", contact_name="Sarah"),
+    lambda context: create_event(title="Sync", tool_context=context, contact_id=0, date="2025-02-01 10:00:00",
+                                 description="", location="", contact_name="Sarah"),
+    lambda context: log_interaction(contact_id=0, tool_context=context, date="2025-02-01", interaction_type="call",
+                                    summary="", contact_name="Sarah"),
+])
+def test_resolution_failures_return_error_results(db_path, tool_context, monkeypatch, call):
+    def broken(user_id, contact_name):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(database_tools, "resolve_contact_name", broken)
+    result = call(tool_context)
+    assert result["status"] == "error"
+    assert result["error"] == "index unavailable"
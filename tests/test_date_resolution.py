@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from business_agent.date_resolution import annotate_message_with_dates, find_date_phrases, resolve_message_dates
+
+# A Monday morning
+NOW = datetime(2025, 1, 6, 10, 30)
+
+
+def _resolved(message, now=NOW):
+    return {entry["phrase"].lower(): entry for entry in resolve_message_dates(message, now)}
+
+
+def test_finds_the_longest_phrases_in_order():
+    message = "Book a call next Friday at 2pm and follow up in 3 days"
+    assert find_date_phrases(message) == ["next Friday at 2pm", "in 3 days"]
+
+
+@pytest.mark.parametrize("phrase, expected", [
+    ("tomorrow at 9am", "2025-01-07 09:00:00"),
+    ("friday at noon", "2025-01-10 12:00:00"),
+    ("jan 20 at 3:15pm", "2025-01-20 15:15:00"),
+    ("tonight", "2025-01-06 20:00:00"),
+    ("tonight at 9pm", "2025-01-06 21:00:00"),
+])
+def test_phrases_with_a_time_resolve_to_datetimes(phrase, expected):
+    assert _resolved(f"Schedule it {phrase}, thanks")[phrase]["formatted_datetime"] == expected
+
+
+def test_tonight_after_the_evening_starts_is_not_in_the_past():
+    late = datetime(2025, 1, 6, 22, 15)
+    assert _resolved("Call me tonight", late)["tonight"]["formatted_datetime"] == "2025-01-06 22:15:00"
+
+
+def test_a_weekday_time_already_past_rolls_to_next_week():
+    resolved = _resolved("Meet on monday at 9:30am and again on monday at 11am")
+    assert resolved["on monday at 9:30am"]["formatted_datetime"] == "2025-01-13 09:30:00"
+    assert resolved["on monday at 11am"]["formatted_datetime"] == "2025-01-06 11:00:00"
+
+
+# A Friday morning
+FRIDAY = datetime(2025, 1, 10, 10, 30)
+
+
+@pytest.mark.parametrize("phrase, now, expected", [
+    ("next friday at 2pm", FRIDAY, "2025-01-17 14:00:00"),
+    ("friday at 2pm", FRIDAY, "2025-01-10 14:00:00"),
+    ("this friday at 2pm", FRIDAY, "2025-01-10 14:00:00"),
+    ("next monday at 9am", NOW, "2025-01-13 09:00:00"),
+    ("next wednesday at 9am", NOW, "2025-01-08 09:00:00"),
+    ("next monday at 9am", FRIDAY, "2025-01-13 09:00:00"),
+    ("next week at 3pm", NOW, "2025-01-13 15:00:00"),
+    ("next month at 9am", NOW, "2025-02-06 09:00:00"),
+])
+def test_next_weekday_and_period_phrases(phrase, now, expected):
+    assert _resolved(f"Let's do {phrase}", now)[phrase]["formatted_datetime"] == expected
+
+
+def test_next_weekday_without_a_time_is_never_today():
+    assert _resolved("See you next monday")["next monday"]["formatted_date"] == "2025-01-13"
+    assert _resolved("See you monday")["monday"]["formatted_date"] == "2025-01-06"
+
+
+def test_an_explicit_today_is_kept_even_when_past():
+    assert _resolved("It happened today at 9am")["today at 9am"]["formatted_datetime"] == "2025-01-06 09:00:00"
+
+
+def test_messages_without_dates_are_unchanged():
+    assert annotate_message_with_dates("Show my unpaid invoices", NOW) == ("Show my unpaid invoices", [])
+
+
+def test_resolved_dates_are_appended_for_the_model():
+    message, resolved = annotate_message_with_dates("Remind me in 2 weeks", NOW)
+    assert len(resolved) == 1
+    assert message.endswith('- "in 2 weeks" = 2025-01-20 (Monday)')
@@ -0,0 +1,163 @@
+from datetime import date, timedelta
+
+import pytest
+
+from business_agent import sharding, storage
+from business_agent.tools import analytics
+from business_agent.tools.analytics_tools import detect_expense_anomalies
+from business_agent.tools.database_tools import create_expense
+
+AMOUNTS = [95.0, 102.0, 98.0, 105.0, 100.0, 99.0]
+
+
+def _add_expense(tool_context, amount, days_ago=0):
+    spent_on = (date.today() - timedelta(days=days_ago)).isoformat()
+    return create_expense(amount=amount, category="Software", tool_context=tool_context,
+                          description="License", date=spent_on)
+
+
+def _stats(db_path, user_id):
+    conn = storage.raw_connection(db_path)
+    try:
+        return conn.execute(
+            "SELECT count, mean, m2 FROM expense_category_stats WHERE user_id = ? AND category = 'Software'",
+            (user_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def test_running_stats_match_a_full_rebuild(db_path, tool_context):
+    for days_ago, amount in enumerate(AMOUNTS):
+        _add_expense(tool_context, amount, days_ago + 1)
+    incremental = _stats(db_path, "huzaifa_ejaz")
+
+    conn = storage.raw_connection(db_path)
+    try:
+        analytics.rebuild_expense_stats(conn.cursor(), "huzaifa_ejaz", "Software")
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert _stats(db_path, "huzaifa_ejaz") == pytest.approx(incremental)
+
+
+def test_remove_from_stats_reverses_an_update():
+    amounts = [10.0, 12.0, 9.0, 30.0]
+    count, mean, m2 = 0, 0.0, 0.0
+    history = []
+    for amount in amounts:
+        history.append((count, mean, m2))
+        count += 1
+        delta = amount - mean
+        mean += delta / count
+        m2 += delta * (amount - mean)
+
+    assert analytics.remove_from_stats(30.0, (count, mean, m2)) == pytest.approx(history[-1])
+    assert analytics.remove_from_stats(10.0, (1, 10.0, 0.0)) == (0, 0.0, 0.0)
+
+
+def test_on_demand_detection_flags_what_create_expense_flagged(db_path, tool_context):
+    for days_ago, amount in enumerate(AMOUNTS):
+        _add_expense(tool_context, amount, days_ago + 1)
+
+    created = _add_expense(tool_context, 2000.0)
+    assert created["anomaly"]["z_score"] >= 3
+
+    detected = detect_expense_anomalies(lookback_days=365, tool_context=tool_context)
+    flagged = [expense["amount"] for expense in detected["unusual_expenses"]]
+    assert flagged == [2000.0]
+    assert detected["unusual_expenses"][0]["z_score"] == created["anomaly"]["z_score"]
+
+
+def _rebuilt_stats(db_path):
+    """Every stats row as a full recompute from the expense table would have it."""
+    conn = storage.raw_connection(db_path)
+    try:
+        query = "SELECT user_id, category, count, mean, m2 FROM expense_category_stats WHERE count > 0 ORDER BY 1, 2"
+        maintained = conn.execute(query).fetchall()
+        conn.execute("SAVEPOINT rebuild")
+        analytics.rebuild_expense_stats(conn.cursor())
+        rebuilt = conn.execute(query).fetchall()
+        conn.execute("ROLLBACK TO rebuild")
+        return maintained, rebuilt
+    finally:
+        conn.close()
+
+
+def test_writes_outside_create_expense_keep_stats_current(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        for amount in AMOUNTS:
+            conn.execute(
+                "INSERT INTO expense (user_id, amount, category, description, date) VALUES (?, ?, 'Hosting', 'Server', '2025-01-01')",
+                ("huzaifa_ejaz", amount),
+            )
+        conn.execute("UPDATE expense SET amount = amount * 2 WHERE category = 'Hosting' AND amount > 100")
+        conn.execute("UPDATE expense SET category = 'Hosting' WHERE category = 'Software'")
+        conn.execute("DELETE FROM expense WHERE category = 'Hosting' AND amount < 97")
+        conn.commit()
+    finally:
+        conn.close()
+
+    maintained, rebuilt = _rebuilt_stats(db_path)
+    assert [row[:3] for row in maintained] == [row[:3] for row in rebuilt]
+    for kept, expected in zip(maintained, rebuilt):
+        assert kept[3:] == pytest.approx(expected[3:])
+
+
+def test_detection_scores_expenses_inserted_directly(db_path, tool_context):
+    for days_ago, amount in enumerate(AMOUNTS):
+        _add_expense(tool_context, amount, days_ago + 1)
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO expense (user_id, amount, category, description, date) VALUES (?, 2000.0, 'Software', 'Import', ?)",
+            ("huzaifa_ejaz", date.today().isoformat()),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    detected = detect_expense_anomalies(lookback_days=365, tool_context=tool_context)
+    assert [expense["amount"] for expense in detected["unusual_expenses"]] == [2000.0]
+
+
+def test_detection_backfills_a_missing_category(db_path, tool_context):
+    for days_ago, amount in enumerate(AMOUNTS + [2000.0]):
+        _add_expense(tool_context, amount, days_ago + 1)
+    conn = storage.raw_connection(db_path)
+    try:
+        # Other categories keep their rows; only Software's goes missing
+        conn.execute("DELETE FROM expense_category_stats WHERE category = 'Software'")
+        conn.commit()
+    finally:
+        conn.close()
+
+    detected = detect_expense_anomalies(lookback_days=365, tool_context=tool_context)
+    assert detected["status"] == "success"
+    assert [expense["amount"] for expense in detected["unusual_expenses"]] == [2000.0]
+    conn = storage.raw_connection(db_path)
+    try:
+        software = conn.execute("SELECT COUNT(*) FROM expense WHERE category = 'Software'").fetchone()[0]
+    finally:
+        conn.close()
+    assert _stats(db_path, "huzaifa_ejaz")[0] == software
+
+
+def test_migration_installs_triggers_and_rebuilds_stats(db_path, monkeypatch):
+    conn = storage.raw_connection(db_path)
+    try:
+        for operation in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER trg_expense_stats_{operation}")
+        conn.execute("DELETE FROM expense_category_stats")
+        conn.execute("PRAGMA user_version = 3")
+        conn.commit()
+    finally:
+        conn.close()
+
+    monkeypatch.setattr(sharding, "_migrated", set())
+    sharding.migrate_database(db_path)
+
+    maintained, rebuilt = _rebuilt_stats(db_path)
+    assert maintained and maintained == rebuilt
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+
+from business_agent import storage
+from business_agent.export import ExportError, column_types, iter_chunks, stream_export, validate_export
+from tests.conftest import USER_ID
+
+
+def _export(user_id, table, export_format, chunk_size=1000):
+    return b"".join(stream_export(user_id, table, export_format, chunk_size)).decode("utf-8")
+
+
+def _csv_rows(text):
+    return list(csv.reader(io.StringIO(text)))
+
+
+def test_csv_export_of_an_empty_table_is_just_the_header(db_path):
+    rows = _csv_rows(_export("nobody", "contacts", "csv"))
+
+    assert rows == [[column for column, _ in column_types("nobody", "contacts")]]
+
+
+def test_ndjson_export_of_an_empty_table_is_empty(db_path):
+    assert _export("nobody", "contacts", "ndjson") == ""
+
+
+def test_csv_export_across_chunks(db_path):
+    chunks = list(iter_chunks(USER_ID, "interactions", chunk_size=3))
+    assert [len(rows) for _, rows in chunks] == [3, 1]
+
+    rows = _csv_rows(_export(USER_ID, "interactions", "csv", chunk_size=3))
+    header, body = rows[0], rows[1:]
+    assert header.count("summary") == 1
+    assert [row[header.index("id")] for row in body] == ["1", "2", "3", "4"]
+    assert body[1][header.index("summary")] == "Sent design proposals"
+
+
+def test_ndjson_export_across_chunks(db_path):
+    text = _export(USER_ID, "expenses", "ndjson", chunk_size=3)
+    records = [json.loads(line) for line in text.splitlines()]
+
+    assert [record["id"] for record in records] == [1, 2, 3, 4]
+    assert records[1]["category"] == "Software"
+    assert records[1]["amount"] == 1200.0
+
+
+def test_revenue_is_scoped_through_its_invoice(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute("INSERT INTO user (id, name, email) VALUES ('other_user', 'Other User', 'other@example.com')")
+        conn.execute(
+            "INSERT INTO invoice (id, user_id, contact_id, issue_date, due_date, total_amount, status, notes) "
+            "VALUES (99, 'other_user', NULL, '2025-01-01', '2025-02-01', 700.0, 'paid', 'Other invoice')"
+        )
+        conn.execute("INSERT INTO revenue (invoice_id, amount, date) VALUES (99, 700.0, '2025-01-05')")
+        conn.commit()
+    finally:
+        conn.close()
+
+    own = [json.loads(line) for line in _export(USER_ID, "revenue", "ndjson").splitlines()]
+    other = [json.loads(line) for line in _export("other_user", "revenue", "ndjson").splitlines()]
+
+    assert sorted(record["invoice_id"] for record in own) == [1, 4]
+    assert [record["invoice_id"] for record in other] == [99]
+
+
+@pytest.mark.parametrize("table, export_format", [("users", "csv"), ("contacts", "xlsx")])
+def test_unknown_tables_and_formats_are_rejected(table, export_format):
+    with pytest.raises(ExportError):
+        validate_export(table, export_format)
+    with pytest.raises(ExportError):
+        next(stream_export(USER_ID, table, export_format))
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_columnar_formats_need_pyarrow(export_format, monkeypatch):
+    # A None entry makes the import fail as it would without pyarrow installed
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ExportError, match="pyarrow"):
+        validate_export("contacts", export_format)
@@ -0,0 +1,57 @@
+import sqlite3
+
+from business_agent import write_queue
+from business_agent.tools import database_tools
+from tests.conftest import FakeToolContext
+
+
+def _count_expenses(db_path, description):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM expense WHERE description = ?", (description,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_a_replayed_call_writes_once(db_path):
+    context = FakeToolContext(invocation_id="inv-1", function_call_id="call-1")
+    first = database_tools.create_expense(40.0, "Travel", context, "Parking", "2025-06-01")
+    replay = database_tools.create_expense(40.0, "Travel", context, "Parking", "2025-06-01")
+
+    assert replay["expense_id"] == first["expense_id"]
+    assert replay["deduplicated"] is True
+    assert _count_expenses(db_path, "Parking") == 1
+    assert write_queue.get_write_queue_stats()["idempotency"]["deduplicated"] >= 1
+
+
+def test_different_arguments_or_invocations_are_separate_writes(db_path):
+    database_tools.create_expense(40.0, "Travel", FakeToolContext(invocation_id="inv-1"), "Parking", "2025-06-01")
+    database_tools.create_expense(45.0, "Travel", FakeToolContext(invocation_id="inv-1"), "Parking", "2025-06-01")
+    database_tools.create_expense(40.0, "Travel", FakeToolContext(invocation_id="inv-2"), "Parking", "2025-06-01")
+
+    assert _count_expenses(db_path, "Parking") == 3
+
+
+def test_distinct_identical_calls_in_one_invocation_both_write(db_path):
+    first = database_tools.create_expense(
+        40.0, "Travel", FakeToolContext(invocation_id="inv-1", function_call_id="call-1"), "Parking", "2025-06-01")
+    second = database_tools.create_expense(
+        40.0, "Travel", FakeToolContext(invocation_id="inv-1", function_call_id="call-2"), "Parking", "2025-06-01")
+
+    assert second["expense_id"] != first["expense_id"]
+    assert "deduplicated" not in second
+    assert _count_expenses(db_path, "Parking") == 2
+
+
+def test_calls_without_an_invocation_are_not_deduplicated(db_path):
+    assert database_tools._idempotency_key(FakeToolContext(), "create_expense", {"amount": 1}) == ""
+    for _ in range(2):
+        database_tools.create_expense(40.0, "Travel", FakeToolContext(), "Parking", "2025-06-01")
+
+    assert _count_expenses(db_path, "Parking") == 2
+
+
+def test_keys_are_scoped_to_the_user(db_path):
+    arguments = {"amount": 40.0}
+    assert (database_tools._idempotency_key(FakeToolContext("a", "inv-1"), "create_expense", arguments)
+            != database_tools._idempotency_key(FakeToolContext("b", "inv-1"), "create_expense", arguments))
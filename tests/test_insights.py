@@ -0,0 +1,72 @@
+from business_agent import retention, storage
+from business_agent.tools import analytics
+from business_agent.tools.database_tools import compute_business_insights, create_expense, mark_invoice_paid
+
+
+def _execute(db_path, sql, params=()):
+    conn = storage.raw_connection(db_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+def _pending(db_path):
+    return _execute(db_path, "SELECT COUNT(*) FROM insight_change_log")[0][0]
+
+
+def _full_recompute(db_path, user_id):
+    conn = storage.raw_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        return analytics.invoice_summary(cursor, user_id), analytics.expense_summary(cursor, user_id)["total"]
+    finally:
+        conn.close()
+
+
+def test_incremental_totals_match_a_full_recompute(db_path, tool_context):
+    compute_business_insights("huzaifa_ejaz")
+
+    mark_invoice_paid(invoice_id=2, tool_context=tool_context)
+    create_expense(amount=75.0, category="Travel", tool_context=tool_context, description="Train", date="2025-01-03")
+    _execute(db_path, "UPDATE expense SET amount = 500 WHERE id = 1")
+    _execute(db_path, "DELETE FROM expense WHERE id = 3")
+
+    metrics = compute_business_insights("huzaifa_ejaz")["key_metrics"]
+    invoices, expenses_total = _full_recompute(db_path, "huzaifa_ejaz")
+    assert metrics["paid_invoices_count"] == invoices["status_counts"]["paid"]
+    assert metrics["unpaid_invoices_count"] == invoices["status_counts"]["unpaid"]
+    assert metrics["total_revenue"] == f"${invoices['status_amounts']['paid']:,.2f}"
+    assert metrics["total_expenses"] == f"${expenses_total:,.2f}"
+    assert _pending(db_path) == 0
+
+
+def test_users_without_a_watermark_log_nothing(db_path):
+    _execute(db_path, "UPDATE invoice SET status = 'paid' WHERE id = 2")
+    _execute(db_path, "UPDATE expense SET amount = amount + 1")
+    _execute(db_path, "DELETE FROM revenue")
+    assert _pending(db_path) == 0
+
+
+def test_only_changes_to_folded_rows_are_logged(db_path, tool_context):
+    compute_business_insights("huzaifa_ejaz")
+    create_expense(amount=20.0, category="Meals", tool_context=tool_context, description="Lunch", date="2025-01-04")
+    _execute(db_path, "UPDATE expense SET amount = 25 WHERE category = 'Meals'")
+    assert _pending(db_path) == 0
+
+    _execute(db_path, "UPDATE expense SET amount = 260 WHERE id = 1")
+    assert _pending(db_path) == 1
+
+
+def test_retention_folds_pending_entries(db_path):
+    compute_business_insights("huzaifa_ejaz")
+    _execute(db_path, "UPDATE invoice SET total_amount = total_amount + 10")
+    assert _pending(db_path) > 0
+
+    assert retention.fold_insight_change_logs() == 1
+    assert _pending(db_path) == 0
+    invoices, _ = _full_recompute(db_path, "huzaifa_ejaz")
+    totals = dict(_execute(db_path, "SELECT key, amount FROM insight_totals WHERE source = 'invoice'"))
+    assert totals == invoices["status_amounts"]
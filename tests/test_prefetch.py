@@ -0,0 +1,81 @@
+import pytest
+
+from business_agent import prefetch
+from business_agent.tools import database_tools
+from tests.conftest import USER_ID
+
+
+@pytest.fixture(autouse=True)
+def fresh_prefetch(monkeypatch):
+    monkeypatch.setattr(prefetch, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(prefetch, "_pending", {})
+    monkeypatch.setattr(prefetch, "_stats", {})
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Who still owes me money?", ["get_unpaid_invoices"]),
+    ("Show me the overdue invoices", ["get_unpaid_invoices"]),
+    ("How is my business doing?", ["get_business_insights"]),
+    ("Give me an overview of outstanding receivables", ["get_unpaid_invoices", "get_business_insights"]),
+    ("Add a contact named Priya", []),
+    ("The ownership details changed", []),
+])
+def test_classify_message(message, expected):
+    assert prefetch.classify_message(message) == expected
+
+
+def test_a_tool_call_picks_up_the_prefetched_result(db_path, tool_context):
+    assert prefetch.start_prefetch(USER_ID, "Who owes me money?") == ["get_unpaid_invoices"]
+
+    result = database_tools.get_unpaid_invoices(tool_context)
+
+    assert result == database_tools.query_unpaid_invoices(USER_ID)
+    assert prefetch.get_prefetch_stats()["per_tool"]["get_unpaid_invoices"]["hits"] == 1
+    assert prefetch._pending == {}
+
+
+def test_a_pending_prefetch_is_not_started_twice(db_path):
+    assert prefetch.start_prefetch(USER_ID, "unpaid invoices?") == ["get_unpaid_invoices"]
+    assert prefetch.start_prefetch(USER_ID, "any unpaid invoices?") == []
+    assert prefetch.get_prefetch_stats()["totals"]["started"] == 1
+
+
+def test_a_write_after_the_prefetch_discards_it(db_path):
+    prefetch.start_prefetch(USER_ID, "Show me overdue invoices")
+    database_tools.bump_data_version(USER_ID)
+
+    assert prefetch.take_prefetched(USER_ID, "get_unpaid_invoices") is None
+    assert prefetch.get_prefetch_stats()["per_tool"]["get_unpaid_invoices"]["stale"] == 1
+
+
+def test_an_expired_prefetch_is_discarded(db_path):
+    prefetch.start_prefetch(USER_ID, "Show me overdue invoices")
+    key = (USER_ID, "get_unpaid_invoices")
+    future, version, created = prefetch._pending[key]
+    prefetch._pending[key] = (future, version, created - prefetch.PREFETCH_TTL_SECONDS - 1)
+
+    assert prefetch.take_prefetched(USER_ID, "get_unpaid_invoices") is None
+    assert prefetch.get_prefetch_stats()["per_tool"]["get_unpaid_invoices"]["stale"] == 1
+
+
+def test_nothing_is_started_when_disabled(db_path, monkeypatch):
+    monkeypatch.setattr(prefetch, "PREFETCH_ENABLED", False)
+
+    assert prefetch.start_prefetch(USER_ID, "Who owes me money?") == []
+    assert prefetch.take_prefetched(USER_ID, "get_unpaid_invoices") is None
+
+
+def test_prefetch_stats_count_hits_and_waste(db_path):
+    started = prefetch.start_prefetch(USER_ID, "Overview of what is still outstanding")
+    assert sorted(started) == ["get_business_insights", "get_unpaid_invoices"]
+
+    assert prefetch.take_prefetched(USER_ID, "get_unpaid_invoices")["status"] == "success"
+    prefetch.finish_prefetch(USER_ID)
+
+    stats = prefetch.get_prefetch_stats()
+    assert stats["totals"] == {
+        "started": 2, "hits": 1, "wasted": 1, "stale": 0, "errors": 0, "hit_ratio": 0.5, "waste_ratio": 0.5,
+    }
+    assert stats["per_tool"]["get_unpaid_invoices"]["hit_ratio"] == 1.0
+    assert stats["per_tool"]["get_business_insights"]["waste_ratio"] == 1.0
+    assert stats["in_flight"] == 0
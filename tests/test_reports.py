@@ -0,0 +1,54 @@
+import pytest
+
+from business_agent import storage
+from business_agent.tools import database_tools
+from business_agent.tools.database_tools import generate_report, profit_loss_report
+
+
+@pytest.fixture
+def many_expenses(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.executemany(
+            "INSERT INTO expense (user_id, amount, category, description, date) VALUES (?, ?, ?, ?, ?)",
+            [("huzaifa_ejaz", 10.0, "Meals", f"Lunch {day}", f"2025-03-{day % 28 + 1:02d}") for day in range(120)],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return 4 + 120
+
+
+def test_expense_report_totals_everything_but_lists_recent_rows(many_expenses, tool_context):
+    report = generate_report(report_type="expenses", tool_context=tool_context, period="all_time")
+
+    assert report["expense_count"] == many_expenses
+    assert report["total_expenses"] == pytest.approx(2200.0 + 1200.0)
+    assert report["categories"]["Meals"] == pytest.approx(1200.0)
+    assert len(report["expense_details"]) == database_tools.REPORT_DETAIL_ROWS
+    assert report["details_truncated"] is True
+    dates = [expense["date"] for expense in report["expense_details"]]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_profit_loss_counts_come_from_sql(many_expenses, tool_context):
+    report = profit_loss_report(period="all_time", tool_context=tool_context)
+
+    assert report["expense_details"]["expense_count"] == many_expenses
+    assert len(report["expense_details"]["expense_entries"]) == database_tools.REPORT_DETAIL_ROWS
+    assert report["revenue_details"]["revenue_count"] == 2
+    assert report["financial_summary"]["total_revenue"] == pytest.approx(4000.0)
+
+
+@pytest.mark.parametrize("report_type, total_key, total", [
+    ("revenue", "revenue_entries", 2),
+    ("contacts", "total_contacts", 3),
+    ("invoices", "total_invoices", 4),
+    ("interactions", "total_interactions", 4),
+])
+def test_small_reports_list_every_row(db_path, tool_context, report_type, total_key, total):
+    report = generate_report(report_type=report_type, tool_context=tool_context, period="all_time")
+
+    assert report["status"] == "success"
+    assert report[total_key] == total
+    assert report["details_truncated"] is False
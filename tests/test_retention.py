@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from business_agent import retention, storage
+from tests.conftest import USER_ID
+
+
+def _days_ago(days, fmt="%Y-%m-%d"):
+    return (datetime.now() - timedelta(days=days)).strftime(fmt)
+
+
+def _count(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def old_interactions(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        for days in (1000, 900, 10):
+            conn.execute(
+                "INSERT INTO interaction (user_id, contact_id, date, type, summary) VALUES (?, NULL, ?, 'note', ?)",
+                (USER_ID, _days_ago(days), f"Note from {days} days ago"),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return db_path
+
+
+@pytest.fixture
+def adk_events(db_path):
+    """A minimal ADK events table: one session with three two-event invocations, the first a year old."""
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute('''
+            CREATE TABLE events (
+                id TEXT, app_name TEXT, user_id TEXT, session_id TEXT,
+                invocation_id TEXT, timestamp TEXT, actions BLOB
+            )
+        ''')
+        for number, days in enumerate((365, 2, 1)):
+            for part in range(2):
+                conn.execute(
+                    "INSERT INTO events VALUES (?, 'business_agent', ?, 's1', ?, ?, ?)",
+                    (f"e{number}{part}", USER_ID, f"inv{number}",
+                     _days_ago(days, "%Y-%m-%d %H:%M:%S") + f".{part}", b"\x80pickled"),
+                )
+        conn.commit()
+    finally:
+        conn.close()
+    return db_path
+
+
+def test_old_interactions_move_to_the_archive(old_interactions):
+    report = retention.run_retention(event_days=0, keep_per_session=0, interaction_days=730)
+
+    assert report["interactions"]["rows"] == 2
+    assert report["interactions"]["compressed_bytes"] < report["interactions"]["raw_bytes"]
+    assert _count(old_interactions, "SELECT COUNT(*) FROM interaction WHERE summary LIKE 'Note from%'") == 1
+    archived = sorted(row["summary"] for row in retention.iter_archived("interaction", USER_ID))
+    assert archived == ["Note from 1000 days ago", "Note from 900 days ago"]
+
+
+def test_a_dry_run_only_counts(old_interactions):
+    report = retention.run_retention(event_days=0, keep_per_session=0, interaction_days=730, dry_run=True)
+
+    assert report["interactions"]["rows"] == 2
+    assert _count(old_interactions, "SELECT COUNT(*) FROM interaction WHERE summary LIKE 'Note from%'") == 3
+    assert list(retention.iter_archived("interaction", USER_ID)) == []
+
+
+def _invocations(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {invocation for (invocation,) in conn.execute("SELECT invocation_id FROM events")}
+    finally:
+        conn.close()
+
+
+def test_events_are_archived_by_whole_invocation(adk_events):
+    # The last three events reach into inv1, so all of inv1 stays; inv0 is past the cutoff
+    report = retention.run_retention(event_days=30, keep_per_session=3, interaction_days=0)
+    assert report["events"]["rows"] == 2
+    assert _invocations(adk_events) == {"inv1", "inv2"}
+
+    archived = list(retention.iter_archived("events", USER_ID))
+    assert {row["invocation_id"] for row in archived} == {"inv0"}
+    assert all(row["actions"] == b"\x80pickled" for row in archived)
+
+
+def test_events_beyond_the_per_session_cap_are_archived(adk_events):
+    report = retention.run_retention(event_days=0, keep_per_session=2, interaction_days=0)
+    assert report["events"]["rows"] == 4
+    assert _invocations(adk_events) == {"inv2"}
+
+
+def test_vacuum_returns_freed_pages(old_interactions):
+    conn = storage.raw_connection(old_interactions)
+    try:
+        conn.execute("CREATE TABLE filler (blob TEXT)")
+        conn.executemany("INSERT INTO filler VALUES (?)", [("x" * 4000,) for _ in range(200)])
+        conn.commit()
+        conn.execute("DROP TABLE filler")
+        conn.commit()
+    finally:
+        conn.close()
+
+    report = retention.incremental_vacuum(old_interactions)
+    assert report["reclaimed_bytes"] > 0
+    assert report["free_pages"] == 0
@@ -0,0 +1,87 @@
+from business_agent import storage
+from business_agent.tools import database_tools
+from business_agent.tools.search_tools import build_match_query, search_business_records, search_terms
+from tests.conftest import FakeToolContext
+
+
+def _search(tool_context, query):
+    result = search_business_records(query, 10, tool_context)
+    assert result["status"] == "success"
+    return result
+
+
+def _found(result, record_type="contact"):
+    key = "contact_name" if record_type == "contact" else "interaction_id"
+    return [row[key] for row in result["results"] if row["record_type"] == record_type]
+
+
+def _execute(db_path, sql, parameters=()):
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute(sql, parameters)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_search_terms_drop_stopwords_and_build_prefix_queries():
+    terms = search_terms("The designer we talked to about the logo")
+
+    assert terms == ["designer", "logo"]
+    assert build_match_query(terms) == '"designer"* OR "logo"*'
+    assert search_terms("the") == ["the"]
+
+
+def test_stemming_and_prefixes_match_related_words(db_path, tool_context):
+    assert _found(_search(tool_context, "the designer")) == ["Sarah Johnson"]
+    assert _found(_search(tool_context, "consult")) == ["Mike Wilson"]
+    assert _found(_search(tool_context, "proposal"), "interaction") == [2]
+
+
+def test_results_are_scoped_to_the_user(db_path, tool_context):
+    other = FakeToolContext("other_user")
+    database_tools.create_contact("Dana Designer", other, "dana@example.com", "", "Design Studio", "", "lead")
+
+    assert _found(_search(tool_context, "design")) == ["Sarah Johnson"]
+    assert _found(_search(other, "design")) == ["Dana Designer"]
+
+
+def test_index_follows_contact_writes(db_path, tool_context):
+    created = database_tools.create_contact("Priya Raman", tool_context, "priya@example.com", "", "Lumen Labs", "", "lead")
+    contact_id = created["contact_id"]
+    assert _found(_search(tool_context, "lumen")) == ["Priya Raman"]
+
+    database_tools.update_contact(contact_id, tool_context, "Priya Raman", "priya@example.com", "",
+                                  "Northwind", "", "lead")
+    assert _found(_search(tool_context, "lumen")) == []
+    assert _found(_search(tool_context, "northwind")) == ["Priya Raman"]
+
+    _execute(db_path, "DELETE FROM contact WHERE id = ?", (contact_id,))
+    assert _found(_search(tool_context, "northwind")) == []
+
+
+def test_index_follows_interaction_writes(db_path, tool_context):
+    logged = database_tools.log_interaction(3, tool_context, "2025-01-05", "call", "Negotiated the retainer", "")
+    interaction_id = logged["interaction_id"]
+    assert _found(_search(tool_context, "retainer"), "interaction") == [interaction_id]
+
+    _execute(db_path, "UPDATE interaction SET summary = 'Walked through the roadmap' WHERE id = ?", (interaction_id,))
+    assert _found(_search(tool_context, "retainer"), "interaction") == []
+    assert _found(_search(tool_context, "roadmap"), "interaction") == [interaction_id]
+
+    _execute(db_path, "DELETE FROM interaction WHERE id = ?", (interaction_id,))
+    assert _found(_search(tool_context, "roadmap"), "interaction") == []
+
+
+def test_like_fallback_without_a_search_index(db_path, tool_context):
+    _execute(db_path, "DROP TABLE contact_fts")
+
+    result = _search(tool_context, "design proposals")
+
+    assert result["search_mode"] == "like"
+    assert _found(result) == ["Sarah Johnson"]
+    assert _found(result, "interaction") == [2]
+
+
+def test_an_empty_query_is_an_error(db_path, tool_context):
+    assert search_business_records("  ", 10, tool_context)["status"] == "error"
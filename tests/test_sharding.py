@@ -0,0 +1,103 @@
+import os
+import sqlite3
+
+import pytest
+
+from business_agent import contact_resolution, sharding
+from business_agent.tools import database_tools
+from tests.conftest import USER_ID, FakeToolContext
+
+
+@pytest.fixture
+def shard_mode(tmp_path, monkeypatch):
+    """Switch routing to a shard mode over scratch files; returns a function taking the mode."""
+    def use(mode):
+        monkeypatch.setattr(database_tools, "SESSIONS_DB", f"sqlite:///{tmp_path / 'business_agent.db'}")
+        monkeypatch.setattr(sharding, "SHARD_MODE", mode)
+        monkeypatch.setattr(sharding, "SHARD_DIR", str(tmp_path / "shards"))
+        monkeypatch.setattr(sharding, "SHARD_COUNT", 4)
+        monkeypatch.setattr(sharding, "_migrated", set())
+        monkeypatch.setattr(database_tools, "_data_versions", {})
+        monkeypatch.setattr(database_tools, "_version_floor", 0)
+        monkeypatch.setattr(contact_resolution, "_indexes", {})
+        database_tools.initialize_business_database()
+    return use
+
+
+def _tables(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+def _expense_descriptions(db_path, user_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [text for (text,) in conn.execute("SELECT description FROM expense WHERE user_id = ?", (user_id,))]
+    finally:
+        conn.close()
+
+
+def test_single_mode_routes_everyone_to_the_main_database(shard_mode):
+    shard_mode("single")
+    assert sharding.db_path_for("someone_else") == sharding.main_db_path()
+    assert sharding.list_shards() == [sharding.main_db_path()]
+
+
+def test_tenant_names_are_stable_and_never_collide_after_sanitizing(shard_mode):
+    shard_mode("tenant")
+    assert sharding.shard_name("a/b") == sharding.shard_name("a/b")
+    assert sharding.shard_name("a/b") != sharding.shard_name("a_b")
+    assert sharding.shard_name("../../etc").startswith("tenant_.._.._etc_")
+
+
+def test_hash_mode_spreads_users_over_shard_count_files(shard_mode):
+    shard_mode("hash")
+    names = {sharding.shard_name(f"user_{i}") for i in range(64)}
+    assert names <= {f"shard_{i:03d}" for i in range(4)}
+    assert len(names) > 1
+
+
+def test_tenant_writes_land_in_the_users_own_file(shard_mode):
+    shard_mode("tenant")
+    result = database_tools.create_expense(25.0, "Meals", FakeToolContext("new_tenant"), "Lunch", "2025-03-01")
+    assert result["status"] == "success"
+
+    tenant_path = sharding.shard_path("new_tenant")
+    assert os.path.dirname(tenant_path) == sharding.shard_dir()
+    assert _expense_descriptions(tenant_path, "new_tenant") == ["Lunch"]
+    assert _expense_descriptions(sharding.shard_path(USER_ID), "new_tenant") == []
+    # The main database keeps sessions and usage only
+    assert "expense" not in _tables(sharding.main_db_path())
+
+
+def test_shards_are_migrated_once_per_process(shard_mode, monkeypatch):
+    shard_mode("tenant")
+    db_path = sharding.db_path_for("migrated_once")
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == database_tools.SCHEMA_VERSION
+    finally:
+        conn.close()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("schema applied twice")
+
+    monkeypatch.setattr(sharding, "_apply_schema", fail)
+    assert sharding.db_path_for("migrated_once") == db_path
+    # A file already at SCHEMA_VERSION skips the DDL even in a fresh process
+    monkeypatch.setattr(sharding, "_migrated", set())
+    assert sharding.db_path_for("migrated_once") == db_path
+
+
+def test_shard_summary_totals_span_every_shard(shard_mode):
+    shard_mode("tenant")
+    for user_id in ("tenant_a", "tenant_b"):
+        database_tools.create_expense(10.0, "Travel", FakeToolContext(user_id), "Taxi", "2025-03-02")
+
+    summary = sharding.shard_summary()
+    assert summary["shard_count"] == 3
+    assert summary["totals"]["expense"] == sum(shard["counts"]["expense"] for shard in summary["shards"])
+    assert summary["totals"]["user"] == 3
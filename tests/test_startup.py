@@ -0,0 +1,9 @@
+from benchmarks.startup_profile import DEFAULT_FORBIDDEN, profile_startup
+
+
+def test_importing_main_defers_the_heavy_adk_modules():
+    profile = profile_startup()
+    loaded = {module["module"] for module in profile["modules"]}
+
+    assert [name for name in DEFAULT_FORBIDDEN if name in loaded] == []
+    assert set(profile["phases"]) >= {"imports_ms", "database_init_ms"}
@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from business_agent import storage
+
+
+def test_read_connection_refuses_writes(db_path):
+    conn = storage.read_connection(db_path)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM expense")
+    finally:
+        conn.close()
+
+
+def test_read_connection_keeps_one_snapshot_until_renewed(db_path):
+    reader = storage.read_connection(db_path)
+    writer = storage.raw_connection(db_path)
+    try:
+        before = reader.execute("SELECT COUNT(*) FROM expense").fetchone()[0]
+        writer.execute(
+            "INSERT INTO expense (user_id, amount, category, description, date) "
+            "VALUES ('huzaifa_ejaz', 10.0, 'Travel', 'Taxi', '2025-01-05')"
+        )
+        writer.commit()
+
+        assert reader.execute("SELECT COUNT(*) FROM expense").fetchone()[0] == before
+        storage.renew_snapshot(reader)
+        assert reader.execute("SELECT COUNT(*) FROM expense").fetchone()[0] == before + 1
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_database_files_run_in_wal_mode(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_precompiled_statements_round_trip(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        conn.execute(storage.INSERT_EXPENSE, {
+            "user_id": "huzaifa_ejaz", "amount": 42.0, "category": "Travel",
+            "description": "Train", "date": "2025-02-01",
+        })
+        conn.commit()
+        rows = conn.execute(storage.SELECT_USER_EXPENSES, {"user_id": "huzaifa_ejaz"}).fetchall()
+    finally:
+        conn.close()
+
+    assert any(row[4] == "Train" and row[2] == 42.0 for row in rows)
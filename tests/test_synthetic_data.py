@@ -0,0 +1,65 @@
+from datetime import date
+
+import pytest
+
+from benchmarks.synthetic_data import load_dataset
+from business_agent import storage
+from business_agent.tools import analytics, database_tools
+
+TENANTS = {"tenant_a": 120, "tenant_b": 40}
+ANCHOR = date(2025, 3, 31)
+# Filled in by SQLite at insert time, so they differ between loads
+TIMESTAMP_COLUMNS = {"created_at", "updated_at"}
+
+
+def _dump(db_path):
+    conn = storage.raw_connection(db_path)
+    try:
+        dump = {}
+        for table in ("contact", "invoice", "revenue", "expense", "event", "interaction"):
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+                       if row[1] not in TIMESTAMP_COLUMNS]
+            dump[table] = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+        return dump
+    finally:
+        conn.close()
+
+
+def _load_into(path, monkeypatch, seed):
+    monkeypatch.setattr(database_tools, "SESSIONS_DB", f"sqlite:///{path}")
+    summary = load_dataset(TENANTS, seed=seed, anchor=ANCHOR)
+    return summary, _dump(path)
+
+
+def test_same_seed_and_anchor_load_the_same_rows(tmp_path, monkeypatch):
+    first, first_rows = _load_into(tmp_path / "first.db", monkeypatch, seed=7)
+    second, second_rows = _load_into(tmp_path / "second.db", monkeypatch, seed=7)
+    _, other_rows = _load_into(tmp_path / "other.db", monkeypatch, seed=8)
+
+    assert first["rows"] == second["rows"]
+    assert first["rows"]["invoice"] == sum(TENANTS.values())
+    assert first_rows == second_rows
+    assert first_rows["invoice"] != other_rows["invoice"]
+
+
+def test_loaded_expenses_are_in_the_anomaly_statistics(tmp_path, monkeypatch):
+    path = str(tmp_path / "stats.db")
+    _load_into(path, monkeypatch, seed=7)
+
+    conn = storage.raw_connection(path)
+    try:
+        query = "SELECT user_id, category, count, mean, m2 FROM expense_category_stats ORDER BY 1, 2"
+        loaded = conn.execute(query).fetchall()
+        counted = conn.execute("SELECT SUM(count) FROM expense_category_stats").fetchone()[0]
+        assert counted == conn.execute("SELECT COUNT(*) FROM expense").fetchone()[0]
+
+        analytics.rebuild_expense_stats(conn.cursor())
+        rebuilt = conn.execute(query).fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    assert [row[:3] for row in loaded] == [row[:3] for row in rebuilt]
+    for kept, expected in zip(loaded, rebuilt):
+        assert kept[3] == pytest.approx(expected[3])
+        assert kept[4] == pytest.approx(expected[4])
@@ -0,0 +1,26 @@
+from business_agent import usage
+
+
+def test_record_usage_accumulates_daily_rollup(db_path):
+    summary = {"model_calls": 2, "prompt_tokens": 100, "response_tokens": 40, "tool_calls": 1, "tool_ms": 12.5}
+    usage.record_usage("alice", summary, latency_ms=250.0)
+    usage.record_usage("alice", summary, latency_ms=150.0, refused=True)
+
+    report = usage.get_usage("alice", days=1)
+    assert report["totals"]["requests"] == 2
+    assert report["totals"]["total_tokens"] == 280
+    assert report["totals"]["refused"] == 1
+    assert report["totals"]["avg_latency_ms"] == 200.0
+    assert usage.tokens_used_today("alice") == 280
+
+
+def test_budget_states_follow_recorded_tokens(db_path, monkeypatch):
+    monkeypatch.setattr(usage, "DAILY_TOKEN_SOFT_BUDGET", 100)
+    monkeypatch.setattr(usage, "DAILY_TOKEN_HARD_BUDGET", 200)
+    assert usage.check_budget("bob")["state"] == "ok"
+
+    usage.record_usage("bob", {"prompt_tokens": 90, "response_tokens": 20}, latency_ms=1.0)
+    assert usage.check_budget("bob")["state"] == "soft_exceeded"
+
+    usage.record_usage("bob", {"prompt_tokens": 90, "response_tokens": 20}, latency_ms=1.0)
+    assert usage.check_budget("bob")["state"] == "hard_exceeded"
@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+
+import pytest
+
+from business_agent.write_queue import WriteQueue, get_write_queue_stats, run_write
+from tests.conftest import USER_ID
+
+
+def _insert_note(text):
+    def write(cursor):
+        cursor.execute("INSERT INTO note (text) VALUES (?)", (text,))
+        return cursor.lastrowid
+    return write
+
+
+@pytest.fixture
+def notes_db(tmp_path):
+    path = str(tmp_path / "notes.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE note (id INTEGER PRIMARY KEY, text TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _notes(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [text for (text,) in conn.execute("SELECT text FROM note ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def _submit_concurrently(write_queue, path, writes):
+    """Submit every write from its own thread at once; returns results (or exceptions) in order."""
+    outcomes = [None] * len(writes)
+    start = threading.Barrier(len(writes))
+
+    def submit(index, write):
+        start.wait()
+        try:
+            outcomes[index] = write_queue.submit(path, write)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=submit, args=(i, write)) for i, write in enumerate(writes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_concurrent_writes_share_a_commit(notes_db):
+    write_queue = WriteQueue(window_ms=100, max_batch=64, max_open=2)
+    outcomes = _submit_concurrently(write_queue, notes_db, [_insert_note(f"note {i}") for i in range(16)])
+
+    assert sorted(outcomes) == list(range(1, 17))
+    assert len(_notes(notes_db)) == 16
+    stats = write_queue.stats()
+    assert stats["writes"] == 16
+    assert stats["batches"] < 16
+    assert stats["max_batch_size"] > 1
+
+
+def test_a_failing_write_does_not_sink_its_batch(notes_db):
+    def failing(cursor):
+        cursor.execute("INSERT INTO note (text) VALUES ('rolled back')")
+        raise ValueError("bad write")
+
+    write_queue = WriteQueue(window_ms=100, max_batch=64, max_open=2)
+    outcomes = _submit_concurrently(write_queue, notes_db, [_insert_note("a"), failing, _insert_note("b")])
+
+    assert isinstance(outcomes[1], ValueError)
+    assert sorted(_notes(notes_db)) == ["a", "b"]
+    assert write_queue.stats()["failed_writes"] == 1
+
+
+def test_replayed_idempotency_key_writes_once(db_path):
+    def write(cursor):
+        cursor.execute(
+            "INSERT INTO expense (user_id, description, amount, category, date) VALUES (?, 'Replayed lunch', 12.5, 'Meals', '2024-05-01')",
+            (USER_ID,),
+        )
+        return {"status": "success", "expense_id": cursor.lastrowid}
+
+    first = run_write(db_path, write, idempotency_key="replay-1")
+    second = run_write(db_path, write, idempotency_key="replay-1")
+
+    assert second == dict(first, deduplicated=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM expense WHERE description = 'Replayed lunch'").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_failed_results_are_not_remembered(db_path):
+    calls = []
+
+    def write(cursor):
+        calls.append(1)
+        return {"status": "error", "error": "try again"}
+
+    run_write(db_path, write, idempotency_key="retry-1")
+    assert run_write(db_path, write, idempotency_key="retry-1") == {"status": "error", "error": "try again"}
+    assert len(calls) == 2
+
+
+def test_keyed_writes_are_counted_only_once_committed(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE parent (id INTEGER PRIMARY KEY);
+            CREATE TABLE child (parent_id INTEGER REFERENCES parent (id) DEFERRABLE INITIALLY DEFERRED);
+        """)
+    finally:
+        conn.close()
+
+    def orphan(cursor):
+        # The deferred foreign key only fails at COMMIT, after the write itself returned
+        cursor.execute("INSERT INTO child (parent_id) VALUES (99)")
+        return {"status": "success"}
+
+    before = get_write_queue_stats()["idempotency"]
+    with pytest.raises(sqlite3.IntegrityError):
+        run_write(db_path, orphan, idempotency_key="fails-at-commit")
+    assert get_write_queue_stats()["idempotency"] == before
+
+    run_write(db_path, lambda cursor: {"status": "success"}, idempotency_key="commits-1")
+    run_write(db_path, lambda cursor: {"status": "success"}, idempotency_key="commits-1")
+    after = get_write_queue_stats()["idempotency"]
+    assert after["keyed_writes"] == before["keyed_writes"] + 2
+    assert after["deduplicated"] == before["deduplicated"] + 1